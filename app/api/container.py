@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Iterator
+
+import structlog
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import Settings
+from app.domain.user.repositories import UserRepository
+from app.domain.user.services import UserService
+from app.infrastructure.cache.password_reset_store import (
+    InMemoryPasswordResetStore,
+    RedisPasswordResetStore,
+    SharedMemoryPasswordResetStore,
+)
+from app.infrastructure.cache.rate_limiter import InMemoryRateLimiter, RedisRateLimiter
+from app.infrastructure.cache.redis_client import GuardedRedis, create_redis_client
+from app.infrastructure.cache.token_store import (
+    InMemoryTokenStore,
+    RedisTokenStore,
+    SharedMemoryTokenStore,
+)
+from app.infrastructure.cache.token_store_sql import SQLPasswordResetStore, SQLTokenStore
+from app.infrastructure.cache.version_cache import (
+    InMemoryUserVersionCache,
+    RedisUserVersionCache,
+)
+from app.infrastructure.db.session import (
+    create_all,
+    create_app_engine,
+    create_session_factory,
+    create_shard_tables,
+    create_store_engine,
+    create_token_tables,
+    session_scope,
+    shard_session_scope,
+)
+from app.infrastructure.repositories.user_changes import SQLUserChangeFeed
+from app.infrastructure.repositories.user_inmemory import InMemoryUserRepository
+from app.infrastructure.repositories.user_sharded import ShardedUserRepository
+from app.infrastructure.repositories.user_sqlalchemy import SQLUserRepository
+
+
+logger = structlog.get_logger()
+
+_UNSET = object()
+
+
+class AppContainer:
+    """Resources owned by one application instance.
+
+    Built by ``create_app`` and kept on ``app.state.container``: the settings,
+    the database engine and session factory, the user shard engines (with
+    ``USER_SHARD_URLS``), the Redis client (pool and
+    circuit breaker), token/reset stores, the login limiter and the in-memory
+    repository. Request dependencies resolve through it, so apps created in
+    one process share nothing. Resources are built on first use; ``startup``
+    builds the ones a worker needs before serving traffic and ``shutdown``
+    disposes engines and closes the Redis pool.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self._lock = threading.RLock()
+        self._resources: dict[str, Any] = {}
+        self._engines: list[Engine] = []
+
+    def _resource(self, name: str, build: Callable[[], Any]) -> Any:
+        value = self._resources.get(name, _UNSET)
+        if value is _UNSET:
+            with self._lock:
+                value = self._resources.get(name, _UNSET)
+                if value is _UNSET:
+                    value = build()
+                    self._resources[name] = value
+        return value
+
+    # --- lifecycle -----------------------------------------------------------
+    def startup(self) -> None:
+        """Build engines (and tables) before the first request; errors propagate."""
+        engines = [self.engine, *self.shard_engines]
+        if self.token_backend == "sql":
+            engines.append(self.token_store_engine)
+        logger.info("container.started", engines=sum(e is not None for e in engines))
+
+    def shutdown(self) -> None:
+        """Dispose engines and close the Redis pool; the container can start again."""
+        with self._lock:
+            redis = self._resources.get("redis")
+            engines, self._engines = self._engines, []
+            self._resources.clear()
+        for engine in engines:
+            engine.dispose()
+        if redis is not None:
+            redis.close()
+        logger.info("container.shutdown", engines=len(engines), redis=redis is not None)
+
+    # --- database ------------------------------------------------------------
+    def _own(self, engine: Engine) -> Engine:
+        self._engines.append(engine)
+        return engine
+
+    def _build_engine(self) -> Engine | None:
+        if not self.settings.DATABASE_URL:
+            return None
+        url = self.settings.DATABASE_URL
+        engine = self._own(create_app_engine(url, echo=self.settings.DB_ECHO))
+        create_all(engine)
+        return engine
+
+    @property
+    def engine(self) -> Engine | None:
+        return self._resource("engine", self._build_engine)
+
+    @property
+    def session_factory(self) -> sessionmaker[Session]:
+        def build() -> sessionmaker[Session]:
+            engine = self.engine
+            if engine is None:
+                raise RuntimeError("DATABASE_URL is not configured")
+            return create_session_factory(engine)
+
+        return self._resource("session_factory", build)
+
+    @contextmanager
+    def session(self) -> Iterator[Session]:
+        with session_scope(self.session_factory) as session:
+            yield session
+
+    def _build_shard_engines(self) -> list[Engine]:
+        engines = []
+        for url in self.settings.USER_SHARD_URLS:
+            engine = self._own(create_app_engine(url, echo=self.settings.DB_ECHO))
+            create_shard_tables(engine)
+            engines.append(engine)
+        return engines
+
+    @property
+    def shard_engines(self) -> list[Engine]:
+        return self._resource("shard_engines", self._build_shard_engines)
+
+    @property
+    def shard_session_factories(self) -> list[sessionmaker[Session]]:
+        return self._resource(
+            "shard_session_factories",
+            lambda: [create_session_factory(engine) for engine in self.shard_engines],
+        )
+
+    def _build_token_store_engine(self) -> Engine:
+        # A dedicated engine (SQLite WAL) or the application database
+        if self.settings.TOKEN_STORE_DATABASE_URL:
+            engine = self._own(create_store_engine(self.settings.TOKEN_STORE_DATABASE_URL))
+        else:
+            engine = self.engine
+            if engine is None:
+                raise RuntimeError("DATABASE_URL is not configured")
+        create_token_tables(engine)
+        return engine
+
+    @property
+    def token_store_engine(self) -> Engine:
+        return self._resource("token_store_engine", self._build_token_store_engine)
+
+    # --- Redis ---------------------------------------------------------------
+    @property
+    def redis(self) -> GuardedRedis:
+        def build() -> GuardedRedis:
+            if not self.settings.REDIS_URL:
+                raise RuntimeError("REDIS_URL is not configured")
+            return create_redis_client(self.settings.REDIS_URL, self.settings)
+
+        return self._resource("redis", build)
+
+    def breaker_stats(self) -> dict[str, dict[str, Any]]:
+        redis = self._resources.get("redis")
+        return {} if redis is None else {redis.breaker.name: redis.breaker.stats()}
+
+    # --- stores --------------------------------------------------------------
+    @property
+    def token_backend(self) -> str:
+        if self.settings.TOKEN_STORE_BACKEND == "auto":
+            return "redis" if self.settings.REDIS_URL else "memory"
+        return self.settings.TOKEN_STORE_BACKEND
+
+    def _shm_path(self, namespace: str) -> str:
+        os.makedirs(self.settings.SHM_STORE_DIR, mode=0o700, exist_ok=True)
+        return os.path.join(self.settings.SHM_STORE_DIR, namespace.replace(":", "-") + ".tbl")
+
+    def _session_store(
+        self, namespace: str, shm: type, sql: type, redis: Callable[..., Any], memory: type
+    ) -> Any:
+        def build() -> Any:
+            backend = self.token_backend
+            if backend == "shm":
+                return shm(self._shm_path(namespace), capacity=self.settings.SHM_STORE_SLOTS)
+            if backend == "sql":
+                return sql(self.token_store_engine, namespace=namespace)
+            if backend == "redis":
+                return redis(self.redis, namespace=namespace)
+            return memory()
+
+        return self._resource(namespace, build)
+
+    def _redis_token_store(self) -> Callable[..., Any]:
+        if self.settings.REDIS_BREAKER_OPEN_POLICY == "local_reads":
+            return partial(RedisTokenStore, local_read_ttl=self.settings.REDIS_LOCAL_READ_TTL_SEC)
+        return RedisTokenStore
+
+    def token_store(self) -> Any:
+        return self._session_store(
+            "auth:access",
+            SharedMemoryTokenStore,
+            SQLTokenStore,
+            self._redis_token_store(),
+            InMemoryTokenStore,
+        )
+
+    def refresh_store(self) -> Any:
+        return self._session_store(
+            "auth:refresh",
+            SharedMemoryTokenStore,
+            SQLTokenStore,
+            self._redis_token_store(),
+            InMemoryTokenStore,
+        )
+
+    def password_reset_store(self) -> Any:
+        return self._session_store(
+            "auth:reset",
+            SharedMemoryPasswordResetStore,
+            SQLPasswordResetStore,
+            RedisPasswordResetStore,
+            InMemoryPasswordResetStore,
+        )
+
+    def user_version_cache(self) -> Any:
+        # In-process only when the repository is in-process too, otherwise
+        # other workers' writes are missed
+        def build() -> Any:
+            if self.settings.REDIS_URL:
+                return RedisUserVersionCache(self.redis, namespace="users:version")
+            if self.settings.DATABASE_URL:
+                return None
+            return InMemoryUserVersionCache()
+
+        return self._resource("users:version", build)
+
+    def login_limiter(self) -> Any:
+        def build() -> Any:
+            if self.settings.REDIS_URL:
+                return RedisRateLimiter(self.redis, namespace="auth:throttle")
+            return InMemoryRateLimiter()
+
+        return self._resource("auth:throttle", build)
+
+    # --- users ---------------------------------------------------------------
+    def memory_repo(self) -> InMemoryUserRepository:
+        return self._resource("users:memory", InMemoryUserRepository)
+
+    def user_change_feed(self) -> Any:
+        # The outbox table next to the users (SQL) or the in-memory repository's log
+        def build() -> Any:
+            engine = self.engine
+            return SQLUserChangeFeed(engine) if engine is not None else self.memory_repo().changes
+
+        return self._resource("users:changes", build)
+
+    @contextmanager
+    def user_repository(self) -> Iterator[UserRepository]:
+        """Sharded (``USER_SHARD_URLS``), SQL (``DATABASE_URL``) or in-memory repository.
+
+        SQL repositories live for one unit of work, committed when the block exits.
+        """
+        if self.settings.USER_SHARD_URLS:
+            factories = self.shard_session_factories
+            with shard_session_scope(self.session_factory, factories) as sessions:
+                yield ShardedUserRepository(sessions)
+        elif self.settings.DATABASE_URL:
+            with self.session() as session:
+                yield SQLUserRepository(session)
+        else:
+            yield self.memory_repo()
+
+    @contextmanager
+    def user_service(
+        self,
+        *,
+        reset_store: Any = _UNSET,
+        token_store: Any = _UNSET,
+        refresh_store: Any = _UNSET,
+        version_cache: Any = _UNSET,
+    ) -> Iterator[UserService]:
+        """UserService on ``user_repository()``.
+
+        Stores default to this container's; request dependencies pass theirs so
+        overrides apply.
+        """
+        if reset_store is _UNSET:
+            reset_store = self.password_reset_store()
+        if token_store is _UNSET:
+            token_store = self.token_store()
+        if refresh_store is _UNSET:
+            refresh_store = self.refresh_store()
+        if version_cache is _UNSET:
+            version_cache = self.user_version_cache()
+        kwargs = {
+            "password_reset_store": reset_store,
+            "session_stores": (token_store, refresh_store),
+            "version_cache": version_cache,
+            "settings": self.settings,
+        }
+        with self.user_repository() as repo:
+            yield UserService(user_repo=repo, **kwargs)
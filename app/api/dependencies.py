@@ -1,104 +1,109 @@
-from typing import Annotated, Generator, Callable
+import hashlib
+from typing import Annotated, Any, Generator, Callable
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
 
-from app.core.config import get_settings
+from app.api.container import AppContainer
+from app.core.config import Settings
 from app.domain.user.services import UserService
 from app.domain.user.schemas import UserReadDTO
-from app.domain.user.models import Role
-from app.infrastructure.repositories.user_inmemory import InMemoryUserRepository
-from app.infrastructure.repositories.user_sqlalchemy import (
-    SQLUserRepository,
-)
-from app.infrastructure.db.session import get_session
-from app.infrastructure.cache.token_store import InMemoryTokenStore, RedisTokenStore
-from app.infrastructure.cache.password_reset_store import (
-    InMemoryPasswordResetStore,
-    RedisPasswordResetStore,
-)
-from app.core.security import decode_token
+from app.domain.user.models import Role, normalize_email
+from app.core.security import decode_token, verify_token
 from app.core.i18n import _
+from app.utils.exceptions import ServiceUnavailableError, to_http
 
 
-_MEM_REPO: InMemoryUserRepository | None = None
-_RESET_STORE: InMemoryPasswordResetStore | None = None
+# Providers resolve through the container of the app serving the request
+# (``app.state.container``, built by ``create_app``); nothing is cached here,
+# so apps created in one process never share stores or connections.
+def get_container(request: Request) -> AppContainer:
+    return request.app.state.container
 
 
-def get_password_reset_store():
-    settings = get_settings()
-    if settings.REDIS_URL:
-        try:
-            import redis  # type: ignore
+def get_app_settings(request: Request) -> Settings:
+    return get_container(request).settings
+
+
+def get_password_reset_store(container: AppContainer = Depends(get_container)):
+    return container.password_reset_store()
+
+
+# Token stores: in-memory by default; Redis if configured; shm/sql per TOKEN_STORE_BACKEND.
+# No silent fallback to memory when Redis fails: a per-process store would let
+# tokens revoked on other nodes through; Redis errors surface as 503 instead.
+def get_token_store(container: AppContainer = Depends(get_container)):
+    return container.token_store()
+
 
-            client = redis.Redis.from_url(settings.REDIS_URL)
-            return RedisPasswordResetStore(client)
-        except Exception:  # pragma: no cover - optional backend
-            pass
-    global _RESET_STORE
-    if _RESET_STORE is None:
-        _RESET_STORE = InMemoryPasswordResetStore()
-    return _RESET_STORE
+def get_refresh_store(container: AppContainer = Depends(get_container)):
+    return container.refresh_store()
+
+
+# User version cache for conditional GETs (None with a shared database and no Redis)
+def get_user_version_cache(container: AppContainer = Depends(get_container)):
+    return container.user_version_cache()
+
+
+def get_user_change_feed(container: AppContainer = Depends(get_container)):
+    return container.user_change_feed()
 
 
 def get_user_service(
+    container: AppContainer = Depends(get_container),
     reset_store=Depends(get_password_reset_store),
+    token_store=Depends(get_token_store),
+    refresh_store=Depends(get_refresh_store),
+    version_cache=Depends(get_user_version_cache),
 ) -> Generator[UserService, None, None]:
-    """Provide a UserService wired to either SQL repo (if DATABASE_URL set) or a shared in-memory repo.
+    """Provide a UserService wired to either SQL repo (if DATABASE_URL set) or the app's in-memory repo.
 
-    For in-memory mode, use a module-level singleton so state persists across requests within a process,
-    which is necessary for tests that register then authenticate.
+    The in-memory repository lives in the app's container so state persists
+    across requests to the same app, which tests that register then
+    authenticate rely on.
     """
-    settings = get_settings()
-    if settings.DATABASE_URL:
-        with get_session() as session:
-            repo = SQLUserRepository(session)
-            yield UserService(user_repo=repo, password_reset_store=reset_store)
-    else:
-        global _MEM_REPO
-        if _MEM_REPO is None:
-            _MEM_REPO = InMemoryUserRepository()
-        yield UserService(user_repo=_MEM_REPO, password_reset_store=reset_store)
+    with container.user_service(
+        reset_store=reset_store,
+        token_store=token_store,
+        refresh_store=refresh_store,
+        version_cache=version_cache,
+    ) as svc:
+        yield svc
 
 
 UserServiceDep = Annotated[UserService, Depends(get_user_service)]
 
 
-# Token store provider (in-memory by default; Redis if configured)
-_TOKEN_STORE: InMemoryTokenStore | None = None
-_REFRESH_STORE: InMemoryTokenStore | None = None
-
-
-def get_token_store():
-    settings = get_settings()
-    if settings.REDIS_URL:
-        try:
-            import redis  # type: ignore
-
-            client = redis.Redis.from_url(settings.REDIS_URL)
-            return RedisTokenStore(client)
-        except Exception:  # pragma: no cover - optional
-            # fallback silently to in-memory if redis not available
-            pass
-    global _TOKEN_STORE
-    if _TOKEN_STORE is None:
-        _TOKEN_STORE = InMemoryTokenStore()
-    return _TOKEN_STORE
-
-
-def get_refresh_store():
-    settings = get_settings()
-    if settings.REDIS_URL:
-        try:
-            import redis  # type: ignore
-
-            client = redis.Redis.from_url(settings.REDIS_URL)
-            return RedisTokenStore(client, namespace="auth:refresh")
-        except Exception:  # pragma: no cover
-            pass
-    global _REFRESH_STORE
-    if _REFRESH_STORE is None:
-        _REFRESH_STORE = InMemoryTokenStore()
-    return _REFRESH_STORE
+# Login throttle provider (in-memory per app; Redis-backed across nodes if configured)
+def get_login_limiter(container: AppContainer = Depends(get_container)):
+    return container.login_limiter()
+
+
+def throttle_login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    limiter=Depends(get_login_limiter),
+) -> None:
+    """Reject over-limit login attempts with 429 before any password hashing happens."""
+    settings = get_app_settings(request)
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return
+    window = settings.LOGIN_THROTTLE_WINDOW_SEC
+    checks = []
+    if request.client and request.client.host:
+        checks.append((f"ip:{request.client.host}", settings.LOGIN_MAX_ATTEMPTS_PER_IP))
+    email_key = hashlib.blake2b(
+        normalize_email(form_data.username).encode("utf-8"), digest_size=16
+    ).hexdigest()
+    checks.append((f"email:{email_key}", settings.LOGIN_MAX_ATTEMPTS_PER_EMAIL))
+    for key, limit in checks:
+        result = limiter.hit(f"login:{key}", limit, window)
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=_("too many login attempts"),
+                headers={"Retry-After": str(result.retry_after)},
+            )
 
 
 def get_current_user(
@@ -111,28 +116,73 @@ def get_current_user(
     raise RuntimeError("This dependency must be used via require_current_user() helper")
 
 
-def require_current_user() -> Callable[[UserService], UserReadDTO]:
+def require_access_claims() -> Callable[..., dict[str, Any]]:
+    """Verified claims of a live access token, without loading the user.
+
+    Tokens of deleted, deactivated or re-roled users are revoked in the token
+    store, so this is enough where the user row itself is not needed.
+    """
     from fastapi.security import OAuth2PasswordBearer
 
     oauth2 = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
     def dep(
-        svc: UserService = Depends(get_user_service),
         token: str = Depends(oauth2),
         token_store=Depends(get_token_store),
+        settings: Settings = Depends(get_app_settings),
+    ) -> dict[str, Any]:
+        try:
+            return verify_token(token, {"access": token_store}, settings=settings)
+        except ServiceUnavailableError as e:
+            # Store unreachable says nothing about the token: 503, not 401
+            raise to_http(e)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail=_("invalid token")
+            )
+
+    return dep
+
+
+def require_token_roles(*roles: Role) -> Callable[..., dict[str, Any]]:
+    """Like ``require_roles``, but checks the role claim of a live token without a user load.
+
+    For endpoints that must not hold a database session, e.g. long-polls. With
+    ``TRUST_TOKEN_ROLE=false`` the role is read from the repository as in
+    ``require_roles``, in a session closed before the endpoint runs.
+    """
+
+    def dep(
+        claims: dict[str, Any] = Depends(require_access_claims()),
+        container: AppContainer = Depends(get_container),
+    ) -> dict[str, Any]:
+        role = claims.get("role")
+        if roles and not container.settings.TRUST_TOKEN_ROLE:
+            try:
+                with container.user_service() as svc:
+                    role = svc.get(str(claims["sub"])).role
+            except ServiceUnavailableError as e:
+                raise to_http(e)
+            except Exception:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED, detail=_("invalid token")
+                )
+        if roles and role not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail=_("insufficient privileges")
+            )
+        return claims
+
+    return dep
+
+
+def require_current_user() -> Callable[[UserService], UserReadDTO]:
+    def dep(
+        svc: UserService = Depends(get_user_service),
+        claims: dict[str, Any] = Depends(require_access_claims()),
     ) -> UserReadDTO:  # type: ignore[return-type]
         try:
-            payload = decode_token(token)
-            if payload.get("type") != "access":
-                raise ValueError("invalid token type")
-            jti = payload.get("jti")
-            if not jti or not token_store.is_access_allowed(jti):
-                raise ValueError("token revoked or unknown")
-            sub = payload.get("sub")
-            if not sub:
-                raise ValueError("invalid token payload")
-            user = svc.get(sub)
-            return user
+            return svc.get(claims["sub"])
         except Exception:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail=_("invalid token")
@@ -149,12 +199,12 @@ def require_roles(*roles: Role) -> Callable[[UserReadDTO], UserReadDTO]:
     def dep(
         current: UserReadDTO = Depends(require_current_user()),
         token: str = Depends(oauth2),
+        settings: Settings = Depends(get_app_settings),
     ) -> UserReadDTO:
-        settings = get_settings()
         effective_role = Role(current.role)  # type: ignore[arg-type]
         if settings.TRUST_TOKEN_ROLE:
             try:
-                payload = decode_token(token)
+                payload = decode_token(token, settings=settings)
                 claim_role = payload.get("role")
                 effective_role = Role(claim_role) if claim_role else effective_role  # type: ignore[arg-type]
             except Exception:
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import atexit
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import secrets
+import threading
+import time
+from typing import Any
+from urllib.parse import parse_qsl
+from uuid import UUID
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.i18n import activate, deactivate, get_language, negotiate_language
+
+
+CAPTURE_FORMAT_VERSION = 1
+
+
+def _unverified_subject(token: str) -> tuple[str | None, str | None]:
+    """Return (sub, role) from a JWT payload without verifying it.
+
+    Only used to derive an anonymized identity for capture, never for auth.
+    """
+    try:
+        payload_b64 = token.split(".")[1]
+        payload_b64 += "=" * (-len(payload_b64) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload_b64))
+        return claims.get("sub"), claims.get("role")
+    except Exception:
+        return None, None
+
+
+class CaptureLog:
+    """Append-only JSON-lines log of anonymized request shapes.
+
+    Identities (token subjects and UUID path params) are keyed with a per-process
+    random HMAC salt and remapped to small sequential integers, so the file never
+    contains emails, tokens or user ids.
+    """
+
+    def __init__(self, path: str, flush_every: int = 256) -> None:
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self._salt = secrets.token_bytes(32)
+        self._ids: dict[bytes, int] = {}
+        self._buffer: list[str] = []
+        self._flush_every = flush_every
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(
+            json.dumps({"v": CAPTURE_FORMAT_VERSION, "started_at": time.time()}) + "\n"
+        )
+        self._fh.flush()
+
+    def identity(self, raw: str) -> int:
+        digest = hmac.new(self._salt, raw.encode("utf-8"), hashlib.sha256).digest()[:16]
+        with self._lock:
+            ident = self._ids.get(digest)
+            if ident is None:
+                ident = self._ids[digest] = len(self._ids) + 1
+            return ident
+
+    def record(self, entry: dict[str, Any]) -> None:
+        entry["t"] = round(time.perf_counter() - self._started, 6)
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self._flush_every:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._buffer and not self._fh.closed:
+            self._fh.write("\n".join(self._buffer) + "\n")
+            self._fh.flush()
+            self._buffer.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._fh.close()
+
+
+class TrafficCaptureMiddleware:
+    """ASGI middleware recording route, method, status, timing and hashed identity."""
+
+    def __init__(self, app: ASGIApp, log: CaptureLog, sample_rate: float = 1.0) -> None:
+        self.app = app
+        self.log = log
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (
+            self.sample_rate < 1.0 and random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self._record(scope, status_code, time.perf_counter() - started)
+
+    def _record(self, scope: Scope, status_code: int, elapsed: float) -> None:
+        route = scope.get("route")
+        entry: dict[str, Any] = {
+            "m": scope["method"],
+            "r": getattr(route, "path", None) or "<unmatched>",
+            "s": status_code,
+            "d": round(elapsed * 1000, 3),
+        }
+
+        token = None
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer":
+                    token = None
+                break
+        if token is None:
+            query = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+            token = query.get("token") or query.get("refresh_token")
+        if token:
+            sub, role = _unverified_subject(token)
+            if sub:
+                entry["u"] = self.log.identity(sub)
+                if role == "admin":
+                    entry["a"] = 1
+
+        params: dict[str, int] = {}
+        for name, value in (scope.get("path_params") or {}).items():
+            try:
+                params[name] = self.log.identity(str(UUID(str(value))))
+            except ValueError:
+                continue
+        if params:
+            entry["p"] = params
+        self.log.record(entry)
+
+
+def install_traffic_capture(app: Any, path: str, sample_rate: float = 1.0) -> CaptureLog:
+    log = CaptureLog(path)
+    atexit.register(log.close)
+    app.add_middleware(TrafficCaptureMiddleware, log=log, sample_rate=sample_rate)
+    return log
+
+
+class LocaleMiddleware:
+    """Negotiates the response language from Accept-Language for the whole request.
+
+    The chosen language is bound to a context variable read by ``_()``, which
+    also covers sync routes (the threadpool copies the context). Responses get
+    ``Content-Language`` and ``Vary: Accept-Language`` so caches keep variants apart.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        lang = get_language()
+        for name, value in scope.get("headers", ()):
+            if name == b"accept-language":
+                lang = negotiate_language(value.decode("latin-1"))
+                break
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((b"content-language", lang.encode("latin-1")))
+                headers.append((b"vary", b"Accept-Language"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = activate(lang)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            deactivate(token)
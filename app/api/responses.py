@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Any
+from uuid import UUID
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from app.api.dependencies import get_app_settings
+from app.core.config import Settings
+from app.domain.user.schemas import UserReadDTO
+from app.domain.user.versions import UserVersionCache
+from app.utils.etag import http_date, is_not_modified, updated_version, user_etag, version_datetime
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by pydantic-core (Rust) instead of stdlib ``json``.
+
+    Accepts plain JSON data as well as pydantic models, UUIDs and datetimes, so a
+    DTO can be rendered directly without a ``model_dump``/``jsonable_encoder``
+    round trip. Output is compact UTF-8, same as Starlette's JSONResponse.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def dto_response(
+    dto: BaseModel | list[BaseModel],
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+    *,
+    settings: Settings,
+) -> Any:
+    """Serialize a read DTO straight to the response body.
+
+    Returning a Response from a route skips FastAPI's response_model pass (dump,
+    re-validate incl. email validation, serialize, encode). The route keeps its
+    ``response_model`` for the OpenAPI schema. With ``FAST_JSON_RESPONSES=false``
+    the DTO is returned as-is and goes through the regular FastAPI path.
+    ``settings`` are the serving app's (``get_app_settings``).
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        if headers:
+            return JSONResponse(jsonable_encoder(dto), status_code=status_code, headers=headers)
+        return dto
+    return FastJSONResponse(dto, status_code=status_code, headers=headers)
+
+
+def _validators(user_id: UUID | str, version: int) -> dict[str, str]:
+    return {
+        "ETag": user_etag(user_id, version),
+        "Last-Modified": http_date(version_datetime(version)),
+        # Clients may store it but must revalidate (cheap 304) before reuse
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def _has_conditions(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def user_response(
+    request: Request, dto: UserReadDTO, status_code: int = 200, *, conditional: bool = True
+) -> Any:
+    """User representation with ETag/Last-Modified; 304 (no body) if the client's copy is current."""
+    version = updated_version(dto.updated_at)
+    headers = _validators(dto.id, version)
+    if (
+        conditional
+        and _has_conditions(request)
+        and is_not_modified(request.headers, headers["ETag"], version_datetime(version))
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return dto_response(dto, status_code, headers=headers, settings=get_app_settings(request))
+
+
+def cached_not_modified(
+    request: Request, user_id: str, version_cache: UserVersionCache | None
+) -> Response | None:
+    """Answer a conditional GET from the version cache, without loading the user."""
+    if version_cache is None or not _has_conditions(request):
+        return None
+    try:
+        key = str(UUID(user_id))
+    except ValueError:
+        return None
+    version = version_cache.get(key)
+    if version is None:
+        return None
+    headers = _validators(key, version)
+    if is_not_modified(request.headers, headers["ETag"], version_datetime(version)):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
@@ -1,21 +1,35 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+import hmac
+import time
+from datetime import datetime, timezone
+
+from typing import Any
+
+from fastapi import APIRouter, Depends, Form, HTTPException, Request, status, Response
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app.api.dependencies import (
     UserServiceDep,
+    get_app_settings,
+    get_container,
+    get_user_version_cache,
+    require_access_claims,
     require_current_user,
     get_token_store,
     get_refresh_store,
+    throttle_login,
 )
+from app.api.responses import cached_not_modified, dto_response, user_response
 from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
     ensure_token_type,
+    verify_token,
 )
-from app.core.config import get_settings
+from app.core.config import Settings
 from app.domain.user.schemas import (
     UserRegisterDTO,
     UserReadDTO,
@@ -23,9 +37,13 @@ from app.domain.user.schemas import (
     PasswordResetRequestDTO,
     PasswordResetConfirmDTO,
     PasswordResetTokenDTO,
+    SessionDTO,
+    TokenIntrospectionBatchDTO,
+    TokenIntrospectionBatchResultDTO,
+    TokenIntrospectionDTO,
 )
 from app.core.i18n import _
-from app.utils.exceptions import NotFoundError
+from app.utils.exceptions import NotFoundError, ServiceUnavailableError, to_http
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -34,29 +52,37 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 @router.post(
     "/register", response_model=UserReadDTO, status_code=status.HTTP_201_CREATED
 )
-def register(dto: UserRegisterDTO, svc: UserServiceDep) -> UserReadDTO:
+def register(
+    dto: UserRegisterDTO, svc: UserServiceDep, settings: Settings = Depends(get_app_settings)
+) -> Response:
     try:
-        return svc.register(dto)
+        user = svc.register(dto)
+    except ServiceUnavailableError as e:
+        raise to_http(e)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return dto_response(user, status.HTTP_201_CREATED, settings=settings)
 
 
 @router.post("/login", response_model=TokenDTO)
 def login(
     svc: UserServiceDep,
     form_data: OAuth2PasswordRequestForm = Depends(),
+    _throttle: None = Depends(throttle_login),
     token_store=Depends(get_token_store),
     refresh_store=Depends(get_refresh_store),
+    settings: Settings = Depends(get_app_settings),
 ) -> TokenDTO:
     try:
         user = svc.authenticate(form_data.username, form_data.password)
+    except ServiceUnavailableError as e:
+        raise to_http(e)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=_("invalid credentials")
         )
-    settings = get_settings()
-    access = create_access_token(str(user.id), extra={"role": user.role})
-    refresh = create_refresh_token(str(user.id), extra={"role": user.role})
+    access = create_access_token(str(user.id), extra={"role": user.role}, settings=settings)
+    refresh = create_refresh_token(str(user.id), extra={"role": user.role}, settings=settings)
     # record access jti in token store with TTL
     token_store.allow_access(
         access["jti"], str(user.id), ttl_seconds=settings.ACCESS_TOKEN_EXPIRES_MIN * 60
@@ -76,40 +102,60 @@ def refresh_token(
     svc: UserServiceDep,
     token_store=Depends(get_token_store),
     refresh_store=Depends(get_refresh_store),
+    settings: Settings = Depends(get_app_settings),
 ) -> TokenDTO:
     try:
-        payload = decode_token(refresh_token)
+        payload = decode_token(refresh_token, settings=settings)
         ensure_token_type(payload, "refresh")
         user_id = payload.get("sub")
         jti = payload.get("jti")
-        if not user_id:
+        if not user_id or not jti:
             raise ValueError("invalid token payload")
-        if not jti or not refresh_store.is_access_allowed(jti):
-            raise ValueError("refresh revoked or unknown")
         user = svc.get(user_id)
+    except ServiceUnavailableError as e:
+        raise to_http(e)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=_("invalid refresh token")
         )
-    settings = get_settings()
-    # rotate tokens: revoke old refresh and issue new pair
-    refresh_store.revoke_access(payload.get("jti"))  # type: ignore[arg-type]
-    access = create_access_token(str(user.id), extra={"role": user.role})
-    new_refresh = create_refresh_token(str(user.id), extra={"role": user.role})
-    token_store.allow_access(
-        access["jti"], str(user.id), ttl_seconds=settings.ACCESS_TOKEN_EXPIRES_MIN * 60
-    )
-    refresh_store.allow_access(
+    # rotate tokens: consume the old refresh and allow the new pair in one atomic step
+    access = create_access_token(str(user.id), extra={"role": user.role}, settings=settings)
+    new_refresh = create_refresh_token(str(user.id), extra={"role": user.role}, settings=settings)
+    rotated = refresh_store.rotate(
+        jti,
         new_refresh["jti"],
         str(user.id),
-        ttl_seconds=settings.REFRESH_TOKEN_EXPIRES_DAYS * 86400,
+        settings.REFRESH_TOKEN_EXPIRES_DAYS * 86400,
+        access_store=token_store,
+        access_jti=access["jti"],
+        access_ttl_seconds=settings.ACCESS_TOKEN_EXPIRES_MIN * 60,
     )
+    if not rotated:
+        # already rotated (possibly concurrently), revoked or unknown
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail=_("invalid refresh token")
+        )
     return TokenDTO(access_token=access["token"], refresh_token=new_refresh["token"])
 
 
 @router.get("/me", response_model=UserReadDTO)
-def me(current: UserReadDTO = Depends(require_current_user())) -> UserReadDTO:
-    return current
+def me(
+    request: Request,
+    svc: UserServiceDep,
+    claims: dict[str, Any] = Depends(require_access_claims()),
+    version_cache=Depends(get_user_version_cache),
+) -> Response:
+    # Polling clients revalidate with If-None-Match; answer from the version cache if we can
+    not_modified = cached_not_modified(request, claims["sub"], version_cache)
+    if not_modified is not None:
+        return not_modified
+    try:
+        current = svc.get(claims["sub"])
+    except ServiceUnavailableError as e:
+        raise to_http(e)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=_("invalid token"))
+    return user_response(request, current)
 
 
 @router.post("/forgot-password", response_model=PasswordResetTokenDTO)
@@ -131,6 +177,8 @@ def forgot_password(dto: PasswordResetRequestDTO, svc: UserServiceDep) -> Passwo
 def reset_password(dto: PasswordResetConfirmDTO, svc: UserServiceDep) -> Response:
     try:
         svc.reset_password(dto.token, dto.password)
+    except ServiceUnavailableError as e:
+        raise to_http(e)
     except NotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -157,30 +205,209 @@ def delete_me(
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
+@router.get("/sessions", response_model=list[SessionDTO])
+def list_sessions(
+    current: UserReadDTO = Depends(require_current_user()),
+    token_store=Depends(get_token_store),
+    refresh_store=Depends(get_refresh_store),
+) -> list[SessionDTO]:
+    sessions: list[SessionDTO] = []
+    for kind, store in (("access", token_store), ("refresh", refresh_store)):
+        for info in store.list_sessions(str(current.id)):
+            sessions.append(
+                SessionDTO(
+                    jti=info.jti,
+                    kind=kind,
+                    expires_at=datetime.fromtimestamp(info.expires_at, tz=timezone.utc),
+                )
+            )
+    return sessions
+
+
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
+def logout_all(
+    svc: UserServiceDep, current: UserReadDTO = Depends(require_current_user())
+) -> Response:
+    # Log out on every device: revoke all access and refresh tokens of the caller
+    svc.revoke_sessions(str(current.id))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
 def logout(
     token: str,
     token_store=Depends(get_token_store),
     refresh_token: str | None = None,
     refresh_store=Depends(get_refresh_store),
+    settings: Settings = Depends(get_app_settings),
 ) -> Response:
     # Best-effort revoke access token by jti
     try:
-        payload = decode_token(token)
+        payload = decode_token(token, settings=settings)
         ensure_token_type(payload, "access")
         jti = payload.get("jti")
         if jti:
             token_store.revoke_access(jti)
+    except ServiceUnavailableError as e:
+        # The client must retry: a 204 would claim a revocation that never happened
+        raise to_http(e)
     except Exception:
         pass
     # Optional refresh revoke
     if refresh_token:
         try:
-            payload = decode_token(refresh_token)
+            payload = decode_token(refresh_token, settings=settings)
             ensure_token_type(payload, "refresh")
             jti = payload.get("jti")
             if jti:
                 refresh_store.revoke_access(jti)
+        except ServiceUnavailableError as e:
+            raise to_http(e)
         except Exception:
             pass
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+# Gateway endpoints: verified claims only (signature, expiry, revocation), no user fetch
+
+_INTROSPECTED_CLAIMS = ("sub", "role", "exp", "iat", "nbf", "iss", "aud", "jti")
+
+
+def _decision_headers(max_age: int) -> dict[str, str]:
+    # Gateways may micro-cache the decision per token; revocation shows up after max_age
+    return {"Cache-Control": f"private, max-age={max_age}", "Vary": "Authorization"}
+
+
+def _max_age(claims: dict[str, Any] | None, settings: Settings) -> int:
+    max_age = settings.AUTH_DECISION_CACHE_SEC
+    if claims is None:
+        return max_age
+    return max(0, min(max_age, int(claims["exp"] - time.time())))
+
+
+def _introspect(
+    token: str, stores: dict[str, Any], settings: Settings
+) -> tuple[TokenIntrospectionDTO, int]:
+    try:
+        claims = verify_token(token, stores, settings=settings)
+    except ServiceUnavailableError:
+        raise
+    except Exception:
+        return TokenIntrospectionDTO(active=False), _max_age(None, settings)
+    fields = {name: claims[name] for name in _INTROSPECTED_CLAIMS if name in claims}
+    dto = TokenIntrospectionDTO(active=True, token_type=f"{claims['type']}_token", **fields)
+    return dto, _max_age(claims, settings)
+
+
+def _require_introspection_client(request: Request, settings: Settings) -> None:
+    secret = settings.INTROSPECTION_TOKEN
+    if not secret:
+        # Open introspection is for local development only; elsewhere it is not served
+        if settings.ENV.lower() in ("dev", "test"):
+            return
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=_("Not Found"))
+    scheme, _sep, value = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(value.encode(), secret.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=_("invalid token"),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.post("/introspect", response_model=TokenIntrospectionDTO, response_model_exclude_none=True)
+def introspect(
+    request: Request,
+    token: str = Form(...),
+    token_type_hint: str | None = Form(None),
+    token_store=Depends(get_token_store),
+    refresh_store=Depends(get_refresh_store),
+    settings: Settings = Depends(get_app_settings),
+) -> Response:
+    # RFC 7662: form-encoded request; the type claim decides, so the hint is not needed
+    _require_introspection_client(request, settings)
+    stores = {"access": token_store, "refresh": refresh_store}
+    try:
+        dto, max_age = _introspect(token, stores, settings)
+    except ServiceUnavailableError as e:
+        raise to_http(e)
+    return JSONResponse(dto.model_dump(exclude_none=True), headers=_decision_headers(max_age))
+
+
+@router.post(
+    "/introspect/batch",
+    response_model=TokenIntrospectionBatchResultDTO,
+    response_model_exclude_none=True,
+)
+def introspect_batch(
+    dto: TokenIntrospectionBatchDTO,
+    request: Request,
+    token_store=Depends(get_token_store),
+    refresh_store=Depends(get_refresh_store),
+    settings: Settings = Depends(get_app_settings),
+) -> Response:
+    _require_introspection_client(request, settings)
+    limit = settings.INTROSPECTION_BATCH_MAX
+    if len(dto.tokens) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=_("at most {limit} tokens per batch").format(limit=limit),
+        )
+    stores = {"access": token_store, "refresh": refresh_store}
+    try:
+        outcomes = [_introspect(token, stores, settings) for token in dto.tokens]
+    except ServiceUnavailableError as e:
+        raise to_http(e)
+    return JSONResponse(
+        {"results": [result.model_dump(exclude_none=True) for result, _age in outcomes]},
+        headers=_decision_headers(min(age for _result, age in outcomes)),
+    )
+
+
+@router.api_route(
+    "/verify",
+    methods=["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+)
+def verify(
+    request: Request,
+    role: str | None = None,
+    token_store=Depends(get_token_store),
+    settings: Settings = Depends(get_app_settings),
+) -> Response:
+    """Forward-auth for nginx ``auth_request`` / Envoy ``ext_authz``.
+
+    204 with ``X-User-Id``/``X-User-Role`` for a live access token, 401 without
+    one, 403 if ``?role=`` is given and does not match. No body either way.
+    With ``TRUST_TOKEN_ROLE=false`` the role is loaded from the user repository.
+    """
+    scheme, _sep, token = request.headers.get("authorization", "").partition(" ")
+    claims = None
+    if scheme.lower() == "bearer" and token:
+        try:
+            claims = verify_token(token, {"access": token_store}, settings=settings)
+        except ServiceUnavailableError as e:
+            raise to_http(e)
+        except Exception:
+            claims = None
+    if claims is None:
+        headers = {**_decision_headers(_max_age(None, settings)), "WWW-Authenticate": "Bearer"}
+        return Response(status_code=status.HTTP_401_UNAUTHORIZED, headers=headers)
+    headers = _decision_headers(_max_age(claims, settings))
+    if settings.TRUST_TOKEN_ROLE:
+        # Role changes revoke the user's tokens, so the role claim of a live token is current
+        user_role = str(claims.get("role") or "")
+    else:
+        try:
+            with get_container(request).user_service() as svc:
+                user_role = str(svc.get(str(claims["sub"])).role)
+        except ServiceUnavailableError as e:
+            raise to_http(e)
+        except Exception:
+            headers["WWW-Authenticate"] = "Bearer"
+            return Response(status_code=status.HTTP_401_UNAUTHORIZED, headers=headers)
+    if role is not None and user_role != role:
+        return Response(status_code=status.HTTP_403_FORBIDDEN, headers=headers)
+    headers.update({"X-User-Id": str(claims["sub"]), "X-User-Role": user_role})
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
@@ -1,9 +1,31 @@
-from fastapi import APIRouter, Response, status, Depends
+import time
+from typing import AsyncIterator
 
-from app.api.dependencies import UserServiceDep, require_roles
+import anyio
+from anyio import to_thread
+from fastapi import APIRouter, Header, Query, Request, Response, status, Depends
+from fastapi.responses import StreamingResponse
+
+from app.api.dependencies import (
+    UserServiceDep,
+    get_app_settings,
+    get_user_change_feed,
+    get_user_version_cache,
+    require_roles,
+    require_token_roles,
+)
+from app.api.responses import cached_not_modified, dto_response, user_response
+from app.core.config import Settings
+from app.domain.user.changes import UserChange, UserChangeFeed
 from app.domain.user.models import Role
 from app.domain.user.schemas import (
+    UserBatchDTO,
+    UserBatchResultDTO,
+    UserChangeDTO,
+    UserChangesDTO,
     UserCreateDTO,
+    UserLookupDTO,
+    UserLookupResultDTO,
     UserReadDTO,
     UserUpdateDTO,
 )
@@ -18,19 +40,168 @@ def create_user(
     dto: UserCreateDTO,
     svc: UserServiceDep,
     _: object = Depends(require_roles(Role.ADMIN)),
-) -> UserReadDTO:
+    settings: Settings = Depends(get_app_settings),
+) -> Response:
     try:
-        return svc.create(dto)
+        return dto_response(svc.create(dto), status.HTTP_201_CREATED, settings=settings)
     except Exception as e:  # map domain/app errors to HTTP
         raise to_http(e)
 
 
+@router.post("/lookup", response_model=UserLookupResultDTO)
+def lookup_users(
+    dto: UserLookupDTO,
+    svc: UserServiceDep,
+    _: object = Depends(require_roles(Role.ADMIN)),
+    settings: Settings = Depends(get_app_settings),
+) -> Response:
+    # Replaces N x GET /users/{id}: one request, one session, one SELECT
+    try:
+        return dto_response(svc.get_many(dto.ids), settings=settings)
+    except Exception as e:
+        raise to_http(e)
+
+
+@router.post("/batch", response_model=UserBatchResultDTO)
+def batch_users(
+    dto: UserBatchDTO,
+    svc: UserServiceDep,
+    _: object = Depends(require_roles(Role.ADMIN)),
+    settings: Settings = Depends(get_app_settings),
+) -> Response:
+    # One request, one transaction; 409 if an atomic batch was rejected as a whole
+    try:
+        result = svc.apply_batch(dto.operations, atomic=dto.mode == "atomic")
+    except Exception as e:
+        raise to_http(e)
+    if dto.mode == "atomic" and result.failed:
+        return dto_response(result, status.HTTP_409_CONFLICT, settings=settings)
+    return dto_response(result, settings=settings)
+
+
+async def _poll_changes(
+    request: Request, feed: UserChangeFeed, since: int, limit: int, wait: float
+) -> list[UserChange]:
+    # Each poll is a short query on a worker thread; nothing is held while sleeping
+    interval = get_app_settings(request).USER_CHANGES_POLL_INTERVAL_SEC
+    deadline = time.monotonic() + wait
+    while True:
+        changes = await to_thread.run_sync(feed.read, since, limit)
+        remaining = deadline - time.monotonic()
+        if changes or remaining <= 0 or await request.is_disconnected():
+            return changes
+        await anyio.sleep(min(interval, remaining))
+
+
+@router.get("/changes", response_model=UserChangesDTO)
+async def user_changes(
+    request: Request,
+    since: int | None = Query(None, ge=0),
+    limit: int = Query(100, ge=1),
+    wait: float = Query(0.0, ge=0),
+    feed=Depends(get_user_change_feed),
+    _: object = Depends(require_token_roles(Role.ADMIN)),
+    settings: Settings = Depends(get_app_settings),
+) -> Response:
+    """Changes after cursor ``since``; with ``wait`` a long-poll until one arrives.
+
+    Without ``since`` only the current cursor is returned, to start from after
+    a full load. 410 if the cursor is older than the retained changes.
+    """
+    headers = {"Cache-Control": "no-store"}
+    try:
+        if since is None:
+            cursor = await to_thread.run_sync(feed.head)
+            result = UserChangesDTO(changes=[], cursor=cursor)
+            return dto_response(result, headers=headers, settings=settings)
+        changes = await _poll_changes(
+            request,
+            feed,
+            since,
+            min(limit, settings.USER_CHANGES_PAGE_SIZE),
+            min(wait, settings.USER_CHANGES_MAX_WAIT_SEC),
+        )
+    except Exception as e:
+        raise to_http(e)
+    result = UserChangesDTO(
+        changes=[UserChangeDTO.from_domain(change) for change in changes],
+        cursor=changes[-1].seq if changes else since,
+    )
+    return dto_response(result, headers=headers, settings=settings)
+
+
+def _sse(event: str, event_id: int, data: str) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+
+@router.get("/changes/stream")
+async def stream_user_changes(
+    request: Request,
+    since: int | None = Query(None, ge=0),
+    last_event_id: str | None = Header(None),
+    feed=Depends(get_user_change_feed),
+    _: object = Depends(require_token_roles(Role.ADMIN)),
+    settings: Settings = Depends(get_app_settings),
+) -> StreamingResponse:
+    """Server-sent events: one ``id: <seq>`` event per change, named after its kind.
+
+    Resumes from ``Last-Event-ID`` (sent by EventSource on reconnect) or ``since``.
+    A ``ready`` event carries the starting cursor, and the server closes the
+    stream after ``USER_CHANGES_STREAM_MAX_SEC`` so clients spread over instances.
+    """
+    cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else since
+    try:
+        if cursor is None:
+            cursor = await to_thread.run_sync(feed.head)
+        # Fail with a proper 410 before the 200 stream starts
+        first = await to_thread.run_sync(feed.read, cursor, settings.USER_CHANGES_PAGE_SIZE)
+    except Exception as e:
+        raise to_http(e)
+
+    async def events(cursor: int, changes: list[UserChange]) -> AsyncIterator[str]:
+        yield _sse("ready", cursor, f'{{"cursor":{cursor}}}')
+        deadline = time.monotonic() + settings.USER_CHANGES_STREAM_MAX_SEC
+        idle_since = time.monotonic()
+        while time.monotonic() < deadline:
+            for change in changes:
+                yield _sse(change.kind, change.seq, UserChangeDTO.from_domain(change).model_dump_json())
+                cursor = change.seq
+            if changes:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= settings.USER_CHANGES_HEARTBEAT_SEC:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                idle_since = time.monotonic()
+            if await request.is_disconnected():
+                return
+            if len(changes) < settings.USER_CHANGES_PAGE_SIZE:
+                await anyio.sleep(settings.USER_CHANGES_POLL_INTERVAL_SEC)
+            try:
+                changes = await to_thread.run_sync(feed.read, cursor, settings.USER_CHANGES_PAGE_SIZE)
+            except Exception:
+                # Retention overtook a stalled stream: reconnecting yields the 410
+                return
+
+    return StreamingResponse(
+        events(cursor, first),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{user_id}", response_model=UserReadDTO)
 def read_user(
-    user_id: str, svc: UserServiceDep, _: object = Depends(require_roles(Role.ADMIN))
-) -> UserReadDTO:
+    user_id: str,
+    request: Request,
+    svc: UserServiceDep,
+    _: object = Depends(require_roles(Role.ADMIN)),
+    version_cache=Depends(get_user_version_cache),
+) -> Response:
+    not_modified = cached_not_modified(request, user_id, version_cache)
+    if not_modified is not None:
+        return not_modified
     try:
-        return svc.get(user_id)
+        return user_response(request, svc.get(user_id))
     except Exception as e:
         raise to_http(e)
 
@@ -39,11 +210,14 @@ def read_user(
 def update_user(
     user_id: str,
     dto: UserUpdateDTO,
+    request: Request,
     svc: UserServiceDep,
     _: object = Depends(require_roles(Role.ADMIN)),
-) -> UserReadDTO:
+) -> Response:
+    # If-Match makes the update conditional on the ETag the client last saw (412 otherwise)
     try:
-        return svc.update(user_id, dto)
+        user = svc.update(user_id, dto, if_match=request.headers.get("if-match"))
+        return user_response(request, user, conditional=False)
     except Exception as e:
         raise to_http(e)
 
@@ -61,9 +235,12 @@ def delete_user(
 
 @router.post("/{user_id}/grant-admin", response_model=UserReadDTO)
 def grant_admin(
-    user_id: str, svc: UserServiceDep, _: object = Depends(require_roles(Role.ADMIN))
-) -> UserReadDTO:
+    user_id: str,
+    request: Request,
+    svc: UserServiceDep,
+    _: object = Depends(require_roles(Role.ADMIN)),
+) -> Response:
     try:
-        return svc.set_role(user_id, Role.ADMIN)
+        return user_response(request, svc.set_role(user_id, Role.ADMIN), conditional=False)
     except Exception as e:
         raise to_http(e)
@@ -0,0 +1,450 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+import httpx
+
+if TYPE_CHECKING:
+    from app.api.container import AppContainer
+
+
+# Relative weights of the actions a virtual user picks from on every iteration.
+DEFAULT_MIX: dict[str, int] = {
+    "register": 1,
+    "login": 2,
+    "me": 20,
+    "refresh": 3,
+    "logout": 1,
+    "admin": 2,
+}
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class StepStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> dict[str, float]:
+        values = sorted(self.latencies)
+        return {
+            "count": len(values),
+            "errors": self.errors,
+            "rps": len(values) / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": (values[-1] if values else 0.0) * 1000,
+        }
+
+
+class LatencyRecorder:
+    """Collects per-step latencies; single event loop, so no locking needed."""
+
+    def __init__(self) -> None:
+        self.steps: dict[str, StepStats] = {}
+        self.started_at = time.perf_counter()
+
+    def record(self, step: str, seconds: float, ok: bool) -> None:
+        stats = self.steps.setdefault(step, StepStats())
+        stats.latencies.append(seconds)
+        if not ok:
+            stats.errors += 1
+
+    def report(self) -> dict[str, Any]:
+        elapsed = time.perf_counter() - self.started_at
+        steps = {name: s.summary(elapsed) for name, s in sorted(self.steps.items())}
+        total = sum(int(s["count"]) for s in steps.values())
+        return {
+            "elapsed_s": elapsed,
+            "total_requests": total,
+            "throughput_rps": total / elapsed if elapsed > 0 else 0.0,
+            "steps": steps,
+        }
+
+
+@dataclass
+class LoadConfig:
+    url: str | None = None
+    duration: float = 10.0
+    max_requests: int | None = None
+    concurrency: int = 10
+    rps: float | None = None
+    users: int | None = None
+    mix: dict[str, int] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    admin_email: str | None = None
+    admin_password: str | None = None
+    seed: int | None = None
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    password: str
+    user_id: str | None = None
+    access: str | None = None
+    refresh: str | None = None
+
+
+class LoadRunner:
+    def __init__(
+        self, client: httpx.AsyncClient, config: LoadConfig, api_prefix: str = "/api"
+    ) -> None:
+        self.client = client
+        self.config = config
+        self.base = f"{api_prefix}/v1"
+        self.recorder = LatencyRecorder()
+        self.admin_headers: dict[str, str] | None = None
+        self._rng = random.Random(config.seed)
+        self._run_id = uuid.uuid4().hex[:8]
+        self._counter = 0
+        self._issued = 0
+        self._actions: dict[str, Callable[[VirtualUser], Awaitable[None]]] = {
+            "register": self._act_register,
+            "login": self._act_login,
+            "me": self._act_me,
+            "refresh": self._act_refresh,
+            "logout": self._act_logout,
+            "admin": self._act_admin,
+        }
+        unknown = set(config.mix) - set(self._actions)
+        if unknown:
+            raise ValueError(f"unknown actions in mix: {', '.join(sorted(unknown))}")
+
+    # --- request helpers -------------------------------------------------
+    def _budget_left(self) -> bool:
+        limit = self.config.max_requests
+        return limit is None or self._issued < limit
+
+    async def _timed(
+        self, step: str, method: str, path: str, expected: tuple[int, ...], **kwargs: Any
+    ) -> httpx.Response | None:
+        self._issued += 1
+        started = time.perf_counter()
+        try:
+            resp = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(step, time.perf_counter() - started, ok=False)
+            return None
+        self.recorder.record(step, time.perf_counter() - started, ok=resp.status_code in expected)
+        return resp
+
+    def _new_user(self) -> VirtualUser:
+        self._counter += 1
+        return VirtualUser(
+            email=f"lt-{self._run_id}-{self._counter}@example.com",
+            password=f"pw-{self._run_id}-{self._counter}",
+        )
+
+    # --- actions -----------------------------------------------------------
+    async def _register(self, vu: VirtualUser) -> None:
+        resp = await self._timed(
+            "register",
+            "POST",
+            f"{self.base}/auth/register",
+            (201,),
+            json={"email": vu.email, "full_name": "Load Tester", "password": vu.password},
+        )
+        if resp is not None and resp.status_code == 201:
+            vu.user_id = resp.json()["id"]
+
+    async def _login(self, vu: VirtualUser) -> None:
+        resp = await self._timed(
+            "login",
+            "POST",
+            f"{self.base}/auth/login",
+            (200,),
+            data={"username": vu.email, "password": vu.password},
+        )
+        if resp is not None and resp.status_code == 200:
+            tokens = resp.json()
+            vu.access, vu.refresh = tokens["access_token"], tokens["refresh_token"]
+
+    async def _ensure_session(self, vu: VirtualUser) -> bool:
+        if vu.user_id is None:
+            await self._register(vu)
+        if vu.user_id is not None and vu.access is None:
+            await self._login(vu)
+        return vu.access is not None
+
+    async def _act_register(self, vu: VirtualUser) -> None:
+        await self._register(self._new_user())
+
+    async def _act_login(self, vu: VirtualUser) -> None:
+        if vu.user_id is None:
+            await self._register(vu)
+        await self._login(vu)
+
+    async def _act_me(self, vu: VirtualUser) -> None:
+        if await self._ensure_session(vu):
+            await self._timed(
+                "me",
+                "GET",
+                f"{self.base}/auth/me",
+                (200,),
+                headers={"Authorization": f"Bearer {vu.access}"},
+            )
+
+    async def _act_refresh(self, vu: VirtualUser) -> None:
+        if not await self._ensure_session(vu):
+            return
+        resp = await self._timed(
+            "refresh",
+            "POST",
+            f"{self.base}/auth/refresh",
+            (200,),
+            params={"refresh_token": vu.refresh},
+        )
+        if resp is not None and resp.status_code == 200:
+            tokens = resp.json()
+            vu.access, vu.refresh = tokens["access_token"], tokens["refresh_token"]
+        else:
+            vu.access = vu.refresh = None
+
+    async def _act_logout(self, vu: VirtualUser) -> None:
+        if not await self._ensure_session(vu):
+            return
+        params = {"token": vu.access}
+        if vu.refresh:
+            params["refresh_token"] = vu.refresh
+        await self._timed("logout", "POST", f"{self.base}/auth/logout", (204,), params=params)
+        vu.access = vu.refresh = None
+
+    async def _act_admin(self, vu: VirtualUser) -> None:
+        if self.admin_headers is None:
+            return
+        h = self.admin_headers
+        self._counter += 1
+        email = f"lt-{self._run_id}-adm{self._counter}@example.com"
+        resp = await self._timed(
+            "admin.create",
+            "POST",
+            f"{self.base}/users",
+            (201,),
+            headers=h,
+            json={"email": email, "full_name": "Provisioned"},
+        )
+        if resp is None or resp.status_code != 201:
+            return
+        user_id = resp.json()["id"]
+        await self._timed("admin.get", "GET", f"{self.base}/users/{user_id}", (200,), headers=h)
+        await self._timed(
+            "admin.update",
+            "PATCH",
+            f"{self.base}/users/{user_id}",
+            (200,),
+            headers=h,
+            json={"full_name": "Provisioned Renamed"},
+        )
+        await self._timed(
+            "admin.delete", "DELETE", f"{self.base}/users/{user_id}", (204,), headers=h
+        )
+
+    # --- drivers -----------------------------------------------------------
+    def _pick_action(self) -> Callable[[VirtualUser], Awaitable[None]]:
+        names = [n for n, w in self.config.mix.items() if w > 0]
+        weights = [self.config.mix[n] for n in names]
+        return self._actions[self._rng.choices(names, weights=weights)[0]]
+
+    async def _closed_loop(self, deadline: float) -> None:
+        async def worker() -> None:
+            vu = self._new_user()
+            while time.perf_counter() < deadline and self._budget_left():
+                await self._pick_action()(vu)
+
+        await asyncio.gather(*(worker() for _ in range(self.config.concurrency)))
+
+    async def _open_loop(self, deadline: float, rps: float) -> None:
+        pool: asyncio.Queue[VirtualUser] = asyncio.Queue()
+        for _ in range(self.config.users or self.config.concurrency):
+            pool.put_nowait(self._new_user())
+        in_flight = asyncio.Semaphore(self.config.concurrency)
+        tasks: set[asyncio.Task[None]] = set()
+
+        async def one() -> None:
+            vu = await pool.get()
+            try:
+                await self._pick_action()(vu)
+            finally:
+                pool.put_nowait(vu)
+                in_flight.release()
+
+        interval = 1.0 / rps
+        next_at = time.perf_counter()
+        while time.perf_counter() < deadline and self._budget_left():
+            await in_flight.acquire()
+            task = asyncio.create_task(one())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def run(self) -> dict[str, Any]:
+        self.recorder = LatencyRecorder()
+        deadline = time.perf_counter() + self.config.duration
+        if self.config.rps:
+            await self._open_loop(deadline, self.config.rps)
+        else:
+            await self._closed_loop(deadline)
+        return self.recorder.report()
+
+    async def login_admin(self, email: str, password: str) -> None:
+        resp = await self.client.post(
+            f"{self.base}/auth/login", data={"username": email, "password": password}
+        )
+        resp.raise_for_status()
+        self.admin_headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def promote_inprocess(container: AppContainer, user_id: str) -> None:
+    """Grant the admin role through the service layer of the in-process app."""
+    from app.domain.user.models import Role
+
+    with container.user_service() as svc:
+        svc.set_role(user_id, Role.ADMIN)
+
+
+def _bootstrap_inprocess_admin(container: AppContainer) -> tuple[str, str]:
+    """Create an admin directly through the service layer of the in-process app."""
+    from app.domain.user.schemas import UserRegisterDTO
+
+    email = f"lt-admin-{uuid.uuid4().hex[:8]}@example.com"
+    password = uuid.uuid4().hex
+    with container.user_service() as svc:
+        created = svc.register(
+            UserRegisterDTO(email=email, full_name="Load Admin", password=password)
+        )
+    promote_inprocess(container, str(created.id))
+    return email, password
+
+
+async def run_load(config: LoadConfig) -> dict[str, Any]:
+    """Run a load scenario in-process (``config.url is None``) or over real HTTP."""
+    if config.url:
+        client = httpx.AsyncClient(base_url=config.url, timeout=30.0)
+        api_prefix = "/api"
+        container = None
+    else:
+        from app.main import create_app
+
+        app = create_app()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://loadtest"
+        )
+        container = app.state.container
+        api_prefix = container.settings.API_PREFIX
+
+    async with client:
+        runner = LoadRunner(client, config, api_prefix=api_prefix)
+        if config.mix.get("admin"):
+            if config.admin_email and config.admin_password:
+                await runner.login_admin(config.admin_email, config.admin_password)
+            elif container is not None:
+                await runner.login_admin(*_bootstrap_inprocess_admin(container))
+            else:
+                print(
+                    "WARNING: --admin-email/--admin-password not given; skipping admin steps",
+                    file=sys.stderr,
+                )
+        return await runner.run()
+
+
+def format_report(report: dict[str, Any]) -> str:
+    lines = [
+        f"elapsed {report['elapsed_s']:.2f}s, {report['total_requests']} requests, "
+        f"{report['throughput_rps']:.1f} req/s",
+        f"{'step':<14}{'count':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}",
+    ]
+    for name, s in report["steps"].items():
+        lines.append(
+            f"{name:<14}{s['count']:>8}{s['errors']:>6}{s['rps']:>9.1f}"
+            f"{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['max_ms']:>9.2f}"
+        )
+    lines.append("(latencies in ms)")
+    return "\n".join(lines)
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix: dict[str, int] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight) if weight else 1
+    return mix
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="loadtest", description="Drive auth/user flows and report latency per step"
+    )
+    parser.add_argument("--url", help="Target base URL (omit to run the app in-process)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--max-requests", type=int, help="Stop after this many requests")
+    parser.add_argument(
+        "--concurrency", type=int, default=10, help="Virtual users (or max in-flight with --rps)"
+    )
+    parser.add_argument("--rps", type=float, help="Open-loop target request rate")
+    parser.add_argument("--users", type=int, help="Virtual user pool size for --rps")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=dict(DEFAULT_MIX),
+        help="Action weights, e.g. 'me=20,refresh=3,login=2,register=1,logout=1,admin=2'",
+    )
+    parser.add_argument("--admin-email", help="Existing admin account for admin steps")
+    parser.add_argument("--admin-password", help="Password of the admin account")
+    parser.add_argument("--database-url", help="In-process only: override DATABASE_URL")
+    parser.add_argument("--redis-url", help="In-process only: override REDIS_URL")
+    parser.add_argument("--seed", type=int, help="Random seed for the action mix")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+    config = LoadConfig(
+        url=args.url,
+        duration=args.duration,
+        max_requests=args.max_requests,
+        concurrency=args.concurrency,
+        rps=args.rps,
+        users=args.users,
+        mix=args.mix,
+        admin_email=args.admin_email,
+        admin_password=args.admin_password,
+        seed=args.seed,
+    )
+    report = asyncio.run(run_load(config))
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import argparse
+import json
+import os
 import sys
+from datetime import date
 from getpass import getpass
+from pathlib import Path
 
 from app.core.config import get_settings
+from app.core.i18n import compile_catalogs
+from app.core.keys import SigningKey, generate_private_key, private_key_pem
 from app.domain.user.models import Role
 from app.domain.user.schemas import UserRegisterDTO
-from app.domain.user.services import UserService
-from app.infrastructure.db.session import get_session, create_all
-from app.infrastructure.repositories.user_sqlalchemy import SQLUserRepository
+from app.infrastructure.repositories.user_sharded import rebalance_user_shards
+from app.api.container import AppContainer
+from app.utils.exceptions import NotFoundError
 
 
 def cmd_create_superuser(args: argparse.Namespace) -> int:
@@ -32,26 +38,78 @@ def cmd_create_superuser(args: argparse.Namespace) -> int:
 
     assert password is not None
 
-    # Ensure tables exist
-    create_all()
-
-    with get_session() as session:
-        repo = SQLUserRepository(session)
-        svc = UserService(user_repo=repo)
-        existing = repo.get_by_email(email)
-        if existing:
-            if args.upgrade_if_exists:
-                dto = svc.set_role(str(existing.id), Role.ADMIN)
-                print(f"User already exists. Promoted to admin: {dto.id} <{dto.email}>")
-                return 0
-            else:
-                print("ERROR: User with this email already exists. Use --upgrade-if-exists to promote.", file=sys.stderr)
-                return 1
-        dto = UserRegisterDTO(email=email, full_name=full_name, password=password)
-        created = svc.register(dto)
-        created_admin = svc.set_role(str(created.id), Role.ADMIN)
-        print(f"Superuser created: {created_admin.id} <{created_admin.email}>")
-        return 0
+    # Same wiring as the app (sharded with USER_SHARD_URLS, session stores, version cache);
+    # tables are created with the engines
+    container = AppContainer(settings)
+    try:
+        with container.user_service() as svc:
+            try:
+                existing = svc.get_by_email(email)
+            except NotFoundError:
+                existing = None
+            if existing:
+                if args.upgrade_if_exists:
+                    dto = svc.set_role(str(existing.id), Role.ADMIN)
+                    print(f"User already exists. Promoted to admin: {dto.id} <{dto.email}>")
+                    return 0
+                else:
+                    print("ERROR: User with this email already exists. Use --upgrade-if-exists to promote.", file=sys.stderr)
+                    return 1
+            dto = UserRegisterDTO(email=email, full_name=full_name, password=password)
+            created = svc.register(dto)
+            created_admin = svc.set_role(str(created.id), Role.ADMIN)
+            print(f"Superuser created: {created_admin.id} <{created_admin.email}>")
+            return 0
+    finally:
+        container.shutdown()
+
+
+def cmd_rebalance_shards(args: argparse.Namespace) -> int:
+    settings = get_settings()
+    if not settings.USER_SHARD_URLS:
+        print("ERROR: USER_SHARD_URLS is not configured.", file=sys.stderr)
+        return 2
+    container = AppContainer(settings)
+    try:
+        report = rebalance_user_shards(
+            container.session_factory,
+            container.shard_session_factories,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+        )
+    finally:
+        container.shutdown()
+    prefix = "DRY RUN: " if args.dry_run else ""
+    print(
+        f"{prefix}Scanned {report.scanned} users on {len(settings.USER_SHARD_URLS)} shards: "
+        f"moved {report.moved}, repaired {report.repaired} directory entries"
+    )
+    return 0
+
+
+def cmd_generate_signing_key(args: argparse.Namespace) -> int:
+    directory = Path(args.dir or get_settings().JWT_KEYS_DIR or "keys")
+    kid: str = args.kid or date.today().isoformat()
+    path = directory / f"{kid}.pem"
+    if path.exists():
+        print(f"ERROR: {path} already exists", file=sys.stderr)
+        return 1
+    directory.mkdir(parents=True, exist_ok=True)
+    private = generate_private_key(args.alg)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(private_key_pem(private))
+    jwk = SigningKey(kid=kid, alg=args.alg, public_key=private.public_key()).to_jwk()
+    print(f"Signing key written: {path}")
+    print(json.dumps(jwk))
+    return 0
+
+
+def cmd_compile_messages(args: argparse.Namespace) -> int:
+    written = compile_catalogs(Path(args.locales_dir) if args.locales_dir else None)
+    for mo in written:
+        print(f"Compiled {mo}")
+    return 0
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -69,6 +127,23 @@ def build_parser() -> argparse.ArgumentParser:
     )
     p_cs.set_defaults(func=cmd_create_superuser)
 
+    p_gk = sub.add_parser("generate-signing-key", help="Generate an EdDSA/ES256 JWT signing key")
+    p_gk.add_argument("--alg", choices=["EdDSA", "ES256"], default="EdDSA", help="Key algorithm")
+    p_gk.add_argument("--kid", help="Key id (default: today's date)")
+    p_gk.add_argument("--dir", help="Keys directory (default: JWT_KEYS_DIR or ./keys)")
+    p_gk.set_defaults(func=cmd_generate_signing_key)
+
+    p_rs = sub.add_parser(
+        "rebalance-shards", help="Move users to their hashed shard after adding shards"
+    )
+    p_rs.add_argument("--batch-size", type=int, default=500, help="Users per batch and shard")
+    p_rs.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    p_rs.set_defaults(func=cmd_rebalance_shards)
+
+    p_cm = sub.add_parser("compile-messages", help="Compile gettext .po catalogs to .mo")
+    p_cm.add_argument("--locales-dir", help="Locales directory (default: app/locales)")
+    p_cm.set_defaults(func=cmd_compile_messages)
+
     return parser
 
 
@@ -0,0 +1,392 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from app.cli.loadtest import LatencyRecorder, format_report, promote_inprocess
+
+if TYPE_CHECKING:
+    from app.api.container import AppContainer
+
+
+@dataclass
+class CapturedRequest:
+    t: float
+    method: str
+    route: str
+    status: int
+    duration_ms: float
+    identity: int | None = None
+    admin: bool = False
+    params: dict[str, int] = field(default_factory=dict)
+
+
+def load_capture(path: str) -> list[CapturedRequest]:
+    """Read a capture log written by ``TrafficCaptureMiddleware``, ordered by time.
+
+    A file may hold several appended sessions, each starting with a header line.
+    Identities are only unique within their session, so they are renumbered per
+    session, and each session's ``t`` is shifted by its header's ``started_at``
+    relative to the first session so that sessions keep their real spacing.
+    """
+    records: list[CapturedRequest] = []
+    ids: dict[tuple[int, int], int] = {}
+    session = 0
+    origin: float | None = None
+    offset = 0.0
+
+    def ident(u: int) -> int:
+        key = (session, u)
+        if key not in ids:
+            ids[key] = len(ids) + 1
+        return ids[key]
+
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            raw = json.loads(line)
+            if "v" in raw:  # header line of a (possibly appended) capture session
+                session += 1
+                started_at = raw.get("started_at")
+                if started_at is not None:
+                    if origin is None:
+                        origin = started_at
+                    offset = started_at - origin
+                continue
+            u = raw.get("u")
+            records.append(
+                CapturedRequest(
+                    t=raw["t"] + offset,
+                    method=raw["m"],
+                    route=raw["r"],
+                    status=raw["s"],
+                    duration_ms=raw["d"],
+                    identity=ident(u) if u is not None else None,
+                    admin=bool(raw.get("a")),
+                    params={name: ident(v) for name, v in raw.get("p", {}).items()},
+                )
+            )
+    records.sort(key=lambda r: r.t)
+    return records
+
+
+@dataclass
+class SeededUser:
+    email: str
+    password: str
+    admin: bool = False
+    user_id: str | None = None
+    access: str | None = None
+    refresh: str | None = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class Replayer:
+    """Re-issues captured request shapes against an app with matching seeded users.
+
+    Every captured identity becomes one freshly registered user; requests of the
+    same identity are serialized so token rotation happens in capture order.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        records: list[CapturedRequest],
+        *,
+        speed: float = 1.0,
+        concurrency: int = 64,
+        api_prefix: str = "/api",
+        container: AppContainer | None = None,
+        admin_credentials: tuple[str, str] | None = None,
+    ) -> None:
+        self.client = client
+        self.records = records
+        self.speed = speed
+        self.concurrency = concurrency
+        self.base = f"{api_prefix}/v1"
+        self.container = container
+        self.admin_credentials = admin_credentials
+        self.recorder = LatencyRecorder()
+        self.status_mismatches = 0
+        self.skipped = 0
+        self.users: dict[int, SeededUser] = {}
+        self._run_id = uuid.uuid4().hex[:8]
+        self._counter = 0
+        self._anon_rr = 0
+
+    def _fresh_email(self) -> str:
+        self._counter += 1
+        return f"replay-{self._run_id}-{self._counter}@example.com"
+
+    # --- seeding -------------------------------------------------------------
+    async def _register(self, user: SeededUser) -> None:
+        user.email = self._fresh_email()
+        resp = await self.client.post(
+            f"{self.base}/auth/register",
+            json={"email": user.email, "full_name": "Replay User", "password": user.password},
+        )
+        resp.raise_for_status()
+        user.user_id = resp.json()["id"]
+        if user.admin:
+            if self.container is not None:
+                promote_inprocess(self.container, user.user_id)
+            elif self.admin_credentials:
+                user.email, user.password = self.admin_credentials
+
+    async def _login(self, user: SeededUser) -> None:
+        resp = await self.client.post(
+            f"{self.base}/auth/login",
+            data={"username": user.email, "password": user.password},
+        )
+        resp.raise_for_status()
+        tokens = resp.json()
+        user.access, user.refresh = tokens["access_token"], tokens["refresh_token"]
+
+    async def _ensure(self, user: SeededUser) -> None:
+        if user.user_id is None:
+            await self._register(user)
+        if user.access is None:
+            await self._login(user)
+
+    async def seed(self) -> None:
+        admins = {r.identity for r in self.records if r.admin and r.identity is not None}
+        identities: set[int] = set()
+        for r in self.records:
+            if r.identity is not None:
+                identities.add(r.identity)
+            identities.update(r.params.values())
+        for ident in sorted(identities):
+            self.users[ident] = SeededUser(
+                email="", password=uuid.uuid4().hex, admin=ident in admins
+            )
+        await asyncio.gather(*(self._ensure(u) for u in self.users.values()))
+
+    # --- request synthesis ---------------------------------------------------
+    def _anonymous_user(self) -> SeededUser | None:
+        plain = [u for u in self.users.values() if not u.admin]
+        if not plain:
+            return None
+        self._anon_rr += 1
+        return plain[self._anon_rr % len(plain)]
+
+    async def _issue(self, rec: CapturedRequest) -> None:
+        user = self.users.get(rec.identity) if rec.identity is not None else None
+        route = rec.route
+        path = route
+        for name, ident in rec.params.items():
+            target = self.users.get(ident)
+            if target is None or target.user_id is None:
+                self.skipped += 1
+                return
+            path = path.replace("{" + name + "}", target.user_id)
+        if "{" in path or route == "<unmatched>":
+            self.skipped += 1
+            return
+
+        kwargs: dict[str, Any] = {}
+        if user is not None:
+            await self._ensure(user)
+            kwargs["headers"] = {"Authorization": f"Bearer {user.access}"}
+        suffix = route[len(self.base):] if route.startswith(self.base) else route
+        op = (rec.method, suffix)
+        if op == ("POST", "/auth/register"):
+            kwargs = {"json": {"email": self._fresh_email(), "full_name": "Replay User",
+                               "password": uuid.uuid4().hex}}
+        elif op == ("POST", "/auth/login"):
+            user = user or self._anonymous_user()
+            if user is None:
+                self.skipped += 1
+                return
+            if user.user_id is None:
+                await self._register(user)
+            kwargs = {"data": {"username": user.email, "password": user.password}}
+        elif op in (("POST", "/auth/refresh"), ("POST", "/auth/logout")):
+            if user is None:
+                self.skipped += 1
+                return
+            kwargs = {"params": {"refresh_token": user.refresh}}
+            if op[1] == "/auth/logout":
+                kwargs["params"]["token"] = user.access
+        elif op == ("POST", "/auth/forgot-password"):
+            target = user or self._anonymous_user()
+            kwargs = {"json": {"email": target.email if target else self._fresh_email()}}
+        elif op == ("POST", "/auth/reset-password"):
+            target = user or self._anonymous_user()
+            if target is None:
+                self.skipped += 1
+                return
+            resp = await self.client.post(
+                f"{self.base}/auth/forgot-password", json={"email": target.email}
+            )
+            kwargs = {"json": {"token": resp.json().get("token") or "x" * 16,
+                               "password": target.password}}
+        elif op == ("POST", "/users"):
+            kwargs["json"] = {"email": self._fresh_email(), "full_name": "Replay Provisioned"}
+        elif rec.method == "PATCH" and suffix.startswith("/users/"):
+            kwargs["json"] = {"full_name": "Replay Renamed"}
+
+        started = time.perf_counter()
+        try:
+            resp = await self.client.request(rec.method, path, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(f"{rec.method} {route}", time.perf_counter() - started, ok=False)
+            return
+        elapsed = time.perf_counter() - started
+        self.recorder.record(f"{rec.method} {route}", elapsed, ok=resp.status_code < 500)
+        if resp.status_code != rec.status:
+            self.status_mismatches += 1
+
+        # Keep seeded identities coherent with what the request did server-side
+        if user is not None and resp.status_code < 400:
+            if op in (("POST", "/auth/login"), ("POST", "/auth/refresh")):
+                tokens = resp.json()
+                user.access, user.refresh = tokens["access_token"], tokens["refresh_token"]
+            elif op in (("POST", "/auth/logout"), ("POST", "/auth/reset-password")):
+                user.access = user.refresh = None
+            elif op == ("DELETE", "/auth/me"):
+                user.user_id = user.access = user.refresh = None
+        if rec.method == "DELETE" and suffix.startswith("/users/"):
+            for ident in rec.params.values():
+                deleted = self.users[ident]
+                deleted.user_id = deleted.access = deleted.refresh = None
+
+    async def _issue_serialized(self, rec: CapturedRequest, slots: asyncio.Semaphore) -> None:
+        try:
+            user = self.users.get(rec.identity) if rec.identity is not None else None
+            if user is None:
+                await self._issue(rec)
+            else:
+                async with user.lock:
+                    await self._issue(rec)
+        finally:
+            slots.release()
+
+    async def run(self) -> dict[str, Any]:
+        self.recorder = LatencyRecorder()
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: list[asyncio.Task[None]] = []
+        origin = time.perf_counter()
+        first_t = self.records[0].t if self.records else 0.0
+        for rec in self.records:
+            if self.speed > 0:
+                delay = (rec.t - first_t) / self.speed - (time.perf_counter() - origin)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await slots.acquire()
+            tasks.append(asyncio.create_task(self._issue_serialized(rec, slots)))
+        await asyncio.gather(*tasks)
+        report = self.recorder.report()
+        report["replayed"] = len(self.records) - self.skipped
+        report["skipped"] = self.skipped
+        report["status_mismatches"] = self.status_mismatches
+        report["speed"] = self.speed
+        return report
+
+
+async def replay(
+    path: str,
+    *,
+    url: str | None = None,
+    speed: float = 1.0,
+    concurrency: int = 64,
+    admin_credentials: tuple[str, str] | None = None,
+) -> dict[str, Any]:
+    records = load_capture(path)
+    if url:
+        client = httpx.AsyncClient(base_url=url, timeout=30.0)
+        api_prefix = "/api"
+        container = None
+    else:
+        from app.main import create_app
+
+        app = create_app()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://replay"
+        )
+        container = app.state.container
+        api_prefix = container.settings.API_PREFIX
+    async with client:
+        replayer = Replayer(
+            client,
+            records,
+            speed=speed,
+            concurrency=concurrency,
+            api_prefix=api_prefix,
+            container=container,
+            admin_credentials=admin_credentials,
+        )
+        await replayer.seed()
+        return await replayer.run()
+
+
+def compare_reports(baseline: dict[str, Any], current: dict[str, Any]) -> str:
+    lines = [f"{'step':<40}{'p50 Δ%':>10}{'p95 Δ%':>10}{'p99 Δ%':>10}"]
+    for name, cur in current["steps"].items():
+        base = baseline.get("steps", {}).get(name)
+        if not base:
+            continue
+
+        def delta(key: str) -> str:
+            return f"{(cur[key] - base[key]) / base[key] * 100:+.1f}" if base[key] else "n/a"
+
+        lines.append(f"{name:<40}{delta('p50_ms'):>10}{delta('p95_ms'):>10}{delta('p99_ms'):>10}")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="replay", description="Replay a captured traffic log and report latency"
+    )
+    parser.add_argument("capture", help="Capture log written with TRAFFIC_CAPTURE_PATH")
+    parser.add_argument("--url", help="Target base URL (omit to replay in-process)")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Time scale (2 = twice as fast, 0 = no waits)"
+    )
+    parser.add_argument("--concurrency", type=int, default=64, help="Max in-flight requests")
+    parser.add_argument("--admin-email", help="HTTP mode: admin account for admin identities")
+    parser.add_argument("--admin-password", help="HTTP mode: admin account password")
+    parser.add_argument("--json", dest="json_path", help="Write the report as JSON")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    # Never capture the replay itself
+    os.environ.pop("TRAFFIC_CAPTURE_PATH", None)
+    admin = (args.admin_email, args.admin_password) if args.admin_email else None
+    report = asyncio.run(
+        replay(
+            args.capture,
+            url=args.url,
+            speed=args.speed,
+            concurrency=args.concurrency,
+            admin_credentials=admin,  # type: ignore[arg-type]
+        )
+    )
+    print(format_report(report))
+    print(
+        f"replayed {report['replayed']}, skipped {report['skipped']}, "
+        f"status mismatches {report['status_mismatches']}"
+    )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            print(compare_reports(json.load(fh), report))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
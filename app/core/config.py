@@ -1,4 +1,7 @@
 from functools import lru_cache
+from typing import Literal
+
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,17 +13,22 @@ class Settings(BaseSettings):
     # App — базовые настройки приложения
     APP_NAME: str = "FastAPI Clean Architecture"  # имя приложения
     VERSION: str = "0.1.0"  # версия приложения
-    ENV: str = "dev"  # окружение: dev|staging|prod
+    ENV: str = "dev"  # окружение: dev|test|staging|prod (test — быстрый профиль для тестов)
     ENABLE_DOCS: bool = True  # включить Swagger UI (документацию)
     # Internationalization (i18n)
     LANG: str = "en"  # язык локализации по умолчанию (например, 'en' или 'ru')
+    LANGUAGES: list[str] = ["en", "ru"]  # языки для согласования по Accept-Language
 
     # API — базовый префикс для всех маршрутов
     API_PREFIX: str = "/api"
 
     # Security — параметры безопасности
     SECRET_KEY: str = "change-me"  # секрет для подписи JWT (заменить в prod; >=32 символов)
-    JWT_ALGORITHM: str = "HS256"  # алгоритм подписи JWT
+    JWT_ALGORITHM: str = "HS256"  # алгоритм подписи JWT: HS256 | EdDSA | ES256
+    JWT_KEYS_DIR: str | None = None  # каталог ключей для EdDSA/ES256: <kid>.pem, <kid>.pub.pem
+    JWT_ACTIVE_KID: str | None = None  # kid ключа подписи (по умолчанию — последний по имени)
+    JWT_CODEC: str = "jose"  # реализация JWT: jose | fast (EdDSA всегда через fast)
+    JWKS_CACHE_MAX_AGE_SEC: int = 300  # Cache-Control max-age для /.well-known/jwks.json
     ACCESS_TOKEN_EXPIRES_MIN: int = 15  # срок жизни access-токена (мин)
     REFRESH_TOKEN_EXPIRES_DAYS: int = 30  # срок жизни refresh-токена (дни)
     TOKEN_ISSUER: str | None = "fastapi_app"  # значение iss в токене (источник)
@@ -28,6 +36,20 @@ class Settings(BaseSettings):
     REQUIRE_HTTPS: bool = False  # требовать HTTPS и отклонять HTTP-запросы
     TRUST_TOKEN_ROLE: bool = True  # доверять claim роли в токене (иначе — роль только из БД)
     PASSWORD_RESET_TOKEN_EXPIRES_MIN: int = 30  # срок жизни токена сброса пароля (мин)
+    # Gateways — /auth/introspect (RFC 7662) и /auth/verify (forward-auth)
+    INTROSPECTION_TOKEN: str | None = None  # Bearer-секрет клиента /auth/introspect (не задан — открыто в dev/test, иначе 404)
+    INTROSPECTION_BATCH_MAX: int = 100  # макс. токенов в /auth/introspect/batch
+    AUTH_DECISION_CACHE_SEC: int = 5  # max-age решений для микрокэша шлюза (отзыв виден с этой задержкой)
+    # Login throttling — ограничение попыток входа (скользящее окно) до проверки bcrypt
+    LOGIN_THROTTLE_ENABLED: bool = True  # включить ограничение попыток входа
+    LOGIN_MAX_ATTEMPTS_PER_EMAIL: int = 10  # попыток на один email за окно
+    LOGIN_MAX_ATTEMPTS_PER_IP: int = 100  # попыток с одного IP за окно
+    LOGIN_THROTTLE_WINDOW_SEC: int = 60  # длина окна (сек)
+    # Admission control — ограничение параллельного хеширования паролей (bcrypt)
+    PASSWORD_HASH_MAX_CONCURRENCY: int | None = None  # одновременных операций (по умолчанию — число CPU)
+    PASSWORD_HASH_MAX_QUEUE: int = 16  # размер очереди ожидания (меньше пула потоков)
+    PASSWORD_HASH_QUEUE_TIMEOUT_MS: int = 1000  # макс. ожидание в очереди, затем 503
+    PASSWORD_HASH_ROUNDS: int | None = None  # cost bcrypt (log2 раундов); пусто — 12, в ENV=test — 4 (ниже 10 только dev/test)
 
     # Database (PostgreSQL) — либо указать полный URL, либо части ниже
     DATABASE_URL: str | None = None  # полный URL подключения к БД
@@ -38,6 +60,10 @@ class Settings(BaseSettings):
     DB_NAME: str | None = None  # имя базы данных
     DB_DRIVER: str = "postgresql+psycopg"  # драйвер SQLAlchemy
     DB_ECHO: bool = False  # логировать SQL-запросы (для разработки)
+    # Шардирование пользователей: таблица users на нескольких БД, маршрутизация по хешу User.id.
+    # Справочник email → шард и журнал изменений остаются в DATABASE_URL.
+    # Новые шарды добавлять только в конец списка, затем `manage rebalance-shards`
+    USER_SHARD_URLS: list[str] = []  # URL баз-шардов, напр. ["postgresql+psycopg://.../users0", ...]
 
     # Cache / Redis (optional) — либо указать полный URL, либо части ниже
     REDIS_URL: str | None = None  # полный URL Redis
@@ -45,12 +71,76 @@ class Settings(BaseSettings):
     REDIS_PORT: int | None = None  # порт Redis
     REDIS_DB: int | None = None  # номер базы Redis
     REDIS_PASSWORD: str | None = None  # пароль Redis
+    REDIS_SOCKET_TIMEOUT_SEC: float = 0.5  # таймаут каждой команды Redis (без повторов)
+    REDIS_CONNECT_TIMEOUT_SEC: float = 0.5  # таймаут установки соединения
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 5  # ошибок подряд до размыкания (open) circuit breaker
+    REDIS_BREAKER_RESET_SEC: float = 10.0  # через сколько пропустить пробный запрос (half-open)
+    # при разомкнутом breaker: fail_closed — 503; local_reads — проверки токенов из локального кеша
+    REDIS_BREAKER_OPEN_POLICY: Literal["fail_closed", "local_reads"] = "fail_closed"
+    REDIS_LOCAL_READ_TTL_SEC: float = 60.0  # сколько помнить результат проверки токена для local_reads
+
+    # Token stores — хранилище jti и токенов сброса пароля
+    # auto: redis при REDIS_URL, иначе memory; shm — общая память для всех воркеров хоста без Redis;
+    # sql — таблицы в БД (переживают рестарт)
+    TOKEN_STORE_BACKEND: Literal["auto", "memory", "shm", "redis", "sql"] = "auto"
+    SHM_STORE_DIR: str = "/dev/shm/fastapi-auth"  # каталог файлов таблиц shm (свой на каждый деплой)
+    SHM_STORE_SLOTS: int = 65536  # слотов в каждой таблице (80 байт на слот, заполнение до 75%)
+    TOKEN_STORE_DATABASE_URL: str | None = None  # БД для sql (напр. sqlite:///./var/tokens.db, WAL); иначе DATABASE_URL
+    TOKEN_PURGE_INTERVAL_SEC: int = 60  # период фоновой очистки просроченных токенов (sql)
+    TOKEN_PURGE_BATCH_SIZE: int = 1000  # строк за один DELETE при очистке (короткие транзакции)
+
+    # Logging — неблокирующий конвейер: очередь + поток-писатель с пакетной записью
+    LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO"  # минимальный уровень логов (регистр не важен)
+    LOG_QUEUE_SIZE: int = 10000  # ёмкость очереди записей
+    LOG_BATCH_SIZE: int = 256  # макс. записей за одну запись в поток вывода
+    LOG_OVERFLOW: Literal["drop", "block"] = "drop"  # при переполнении: отбросить или ждать
+    LOG_SAMPLE_RATES: dict[str, float] = {}  # доля сохраняемых событий, напр. {"user.updated": 0.1}
+
+    @field_validator("LOG_LEVEL", mode="before")
+    @classmethod
+    def _upper_log_level(cls, value: object) -> object:
+        return value.upper() if isinstance(value, str) else value
+
+    # Admin API
+    USER_BATCH_MAX_OPERATIONS: int = 1000  # макс. операций в POST /users/batch
+    USER_LOOKUP_MAX_IDS: int = 1000  # макс. id в POST /users/lookup
+
+    # Change feed — журнал изменений пользователей (outbox) для инвалидации кешей
+    USER_CHANGES_PAGE_SIZE: int = 500  # макс. событий в одном ответе GET /users/changes
+    USER_CHANGES_MAX_WAIT_SEC: float = 30.0  # макс. ожидание long-poll (?wait=)
+    USER_CHANGES_POLL_INTERVAL_SEC: float = 0.5  # период опроса журнала при ожидании
+    USER_CHANGES_STREAM_MAX_SEC: float = 300.0  # SSE-поток закрывается, клиент переподключается с Last-Event-ID
+    USER_CHANGES_HEARTBEAT_SEC: float = 15.0  # комментарий-heartbeat в простаивающем SSE-потоке
+    USER_CHANGES_RETENTION_SEC: int = 7 * 86400  # старше — удаляются (курсор до этого → 410)
+    USER_CHANGES_COMPACT_AFTER_SEC: int = 3600  # старше — остаётся только последнее событие пользователя
+    USER_CHANGES_COMPACT_INTERVAL_SEC: int = 300  # период фонового сжатия журнала
+
+    # Readiness — /ready отдаёт закешированные результаты фоновых проверок БД и Redis
+    READINESS_PROBE_INTERVAL_SEC: float = 5.0  # период проверок (SELECT 1, PING)
+    READINESS_STALE_AFTER_SEC: float = 15.0  # результат старше — считается неуспешным
+    WARMUP_DB_CONNECTIONS: int = 5  # соединений БД, открываемых при старте (не больше pool_size)
+    WARMUP_REDIS_CONNECTIONS: int = 5  # соединений Redis, открываемых при старте
+    WARMUP_PASSWORD_HASH: bool = True  # загрузить bcrypt-бэкенд при старте (первый хеш ~сотни мс)
+
+    # Serialization — ответы через pydantic-core без jsonable_encoder/stdlib json
+    FAST_JSON_RESPONSES: bool = True  # быстрый путь сериализации ответов и DTO
+
+    # Performance testing — запись обезличенного трафика для последующего replay
+    TRAFFIC_CAPTURE_PATH: str | None = None  # файл журнала ({pid} — подстановка PID воркера)
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = 1.0  # доля записываемых запросов (0..1)
 
 
 @lru_cache
 def get_settings() -> Settings:
-    s = Settings()  # type: ignore[call-arg]
+    return validate_settings(Settings())  # type: ignore[call-arg]
+
 
+def validate_settings(s: Settings) -> Settings:
+    """Compose derived URLs, apply the ENV profile and enforce hardening, in place.
+
+    ``get_settings`` runs it on the environment; ``create_app`` runs it on
+    settings passed in directly. Raises ValueError on an unsafe configuration.
+    """
     # Compose DATABASE_URL if not explicitly set and parts are provided
     if not s.DATABASE_URL and any(
         [s.DB_HOST, s.DB_PORT, s.DB_USER, s.DB_PASSWORD, s.DB_NAME]
@@ -79,12 +169,31 @@ def get_settings() -> Settings:
         db = s.REDIS_DB if s.REDIS_DB is not None else 0
         s.REDIS_URL = f"redis://{auth}{host}:{port}/{db}"
 
-    # Security hardening: forbid weak/default SECRET_KEY outside dev
+    if s.TOKEN_STORE_BACKEND == "redis" and not s.REDIS_URL:
+        raise ValueError("TOKEN_STORE_BACKEND=redis requires REDIS_URL.")
+    if s.TOKEN_STORE_BACKEND == "sql" and not (s.TOKEN_STORE_DATABASE_URL or s.DATABASE_URL):
+        raise ValueError("TOKEN_STORE_BACKEND=sql requires TOKEN_STORE_DATABASE_URL or DATABASE_URL.")
+
+    if s.USER_SHARD_URLS and not s.DATABASE_URL:
+        raise ValueError("USER_SHARD_URLS requires DATABASE_URL for the shard directory.")
+
+    if s.JWT_ALGORITHM in ("EdDSA", "ES256") and not s.JWT_KEYS_DIR:
+        raise ValueError(f"JWT_ALGORITHM={s.JWT_ALGORITHM} requires JWT_KEYS_DIR.")
+
     try:
         env = (s.ENV or "").lower()
     except Exception:
         env = "dev"
-    if env != "dev":
+
+    # Test profile: minimal bcrypt cost, hashes stay verifiable by any context
+    if env == "test" and s.PASSWORD_HASH_ROUNDS is None:
+        s.PASSWORD_HASH_ROUNDS = 4
+    if s.PASSWORD_HASH_ROUNDS is not None and s.PASSWORD_HASH_ROUNDS < 10 and env not in ("dev", "test"):
+        raise ValueError("PASSWORD_HASH_ROUNDS below 10 is only allowed in dev and test environments.")
+
+    # Security hardening: forbid weak/default SECRET_KEY outside dev/test
+    # Asymmetric algorithms sign with the key ring, SECRET_KEY is not used for JWTs
+    if env not in ("dev", "test") and s.JWT_ALGORITHM.startswith("HS"):
         if not s.SECRET_KEY or s.SECRET_KEY == "change-me" or len(s.SECRET_KEY) < 32:
             raise ValueError(
                 "Insecure SECRET_KEY. Set a strong SECRET_KEY (>=32 chars) for non-dev environments."
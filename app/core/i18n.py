@@ -1,16 +1,23 @@
 from __future__ import annotations
 
+import ast
 import gettext
+import struct
+from array import array
+from contextvars import ContextVar, Token
+from functools import lru_cache
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterable
 
 
 # Domain and locales directory structure compatible with GNU gettext
 _DOMAIN = "messages"
 _LOCALES_DIR = Path(__file__).resolve().parent.parent / "locales"
 
-_current_lang = "en"
-_translator: gettext.NullTranslations = gettext.NullTranslations()
+_default_lang = "en"
+# Built once at startup by load_translations(); _() only does dict lookups
+_translators: dict[str, gettext.NullTranslations] = {}
+_request_lang: ContextVar[str | None] = ContextVar("request_lang", default=None)
 
 # Minimal built-in RU translations as a safety net if .mo catalogs are not present yet.
 _MANUAL_RU: dict[str, str] = {
@@ -21,32 +28,169 @@ _MANUAL_RU: dict[str, str] = {
     "HTTPS required": "Требуется HTTPS",
     "invalid reset token": "Недействительный токен сброса",
     "user not found": "Пользователь не найден",
+    "too many login attempts": "Слишком много попыток входа",
+    "server is overloaded": "Сервер перегружен",
+    "Not Found": "Не найдено",
+    "at most {limit} tokens per batch": "Не более {limit} токенов в пакете",
 }
 
 
+class _DictTranslations(gettext.NullTranslations):
+    def __init__(self, catalog: dict[str, str]) -> None:
+        super().__init__()
+        self._catalog = catalog
+
+    def gettext(self, message: str) -> str:
+        return self._catalog.get(message, message)
+
+
+def _load_translator(lang: str, locales_dir: Path) -> gettext.NullTranslations:
+    """Compiled .mo catalog for ``lang`` (never parses .po at runtime)."""
+    try:
+        translator = gettext.translation(
+            _DOMAIN, localedir=str(locales_dir), languages=[lang], fallback=True
+        )
+    except Exception:
+        translator = gettext.NullTranslations()
+    if lang.startswith("ru"):
+        translator.add_fallback(_DictTranslations(_MANUAL_RU))
+    return translator
+
+
+def load_translations(languages: Iterable[str], default: str, locales_dir: Path | None = None) -> None:
+    """Preload one translator per supported language and set the default language."""
+    global _translators, _default_lang
+    langs = {lang.lower() for lang in languages} | {default.lower()}
+    directory = locales_dir or _LOCALES_DIR
+    _translators = {lang: _load_translator(lang, directory) for lang in langs}
+    _default_lang = default.lower()
+    negotiate_language.cache_clear()
+
+
 def set_language(lang: str) -> None:
-    """Set global language for server-side messages.
+    """Set the default language for server-side messages (used when no request locale is active).
 
     Tries gettext catalogs in app/locales/<lang>/LC_MESSAGES/messages.mo;
     falls back to English or to minimal dictionary if catalogs are missing.
     """
-    global _current_lang, _translator
-    _current_lang = lang
-    try:
-        _translator = gettext.translation(
-            _DOMAIN, localedir=str(_LOCALES_DIR), languages=[lang], fallback=True
-        )
-    except Exception:
-        _translator = gettext.NullTranslations()
+    load_translations(_translators.keys() or [lang], default=lang)
+
+
+def supported_languages() -> tuple[str, ...]:
+    return tuple(sorted(_translators))
+
+
+def get_language() -> str:
+    return _request_lang.get() or _default_lang
+
+
+def activate(lang: str | None) -> Token[str | None]:
+    """Scope ``_()`` to ``lang`` for the current context; undo with ``deactivate``."""
+    return _request_lang.set(lang)
+
+
+def deactivate(token: Token[str | None]) -> None:
+    _request_lang.reset(token)
+
+
+@lru_cache(maxsize=512)
+def negotiate_language(accept_language: str) -> str:
+    """Best supported language for an Accept-Language header (RFC 9110 q-values).
+
+    Header values repeat across clients, so results are cached per exact value.
+    """
+    candidates: list[tuple[float, int, str]] = []
+    for index, part in enumerate(accept_language.split(",")):
+        tag, _sep, params = part.strip().partition(";")
+        tag = tag.strip().lower()
+        if not tag:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _eq, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            candidates.append((-q, index, tag))
+    for _q, _index, tag in sorted(candidates):
+        if tag == "*":
+            return _default_lang
+        if tag in _translators:
+            return tag
+        primary = tag.split("-", 1)[0]
+        if primary in _translators:
+            return primary
+    return _default_lang
 
 
 def gettext_(message: str) -> str:
-    """Translate message using current translator, with optional RU fallback map."""
-    translated = _translator.gettext(message)
-    if translated == message and _current_lang.startswith("ru"):
-        return _MANUAL_RU.get(message, message)
-    return translated
+    """Translate message for the active (request) language."""
+    translator = _translators.get(_request_lang.get() or _default_lang)
+    if translator is None:
+        return message
+    return translator.gettext(message)
 
 
 # Conventional alias
 _: Callable[[str], str] = gettext_
+
+
+def _parse_po(text: str) -> dict[str, str]:
+    """msgid -> msgstr of a .po file (fuzzy and untranslated entries skipped)."""
+    messages: dict[str, str] = {}
+    for block in text.replace("\r\n", "\n").split("\n\n"):
+        fields: dict[str, list[str]] = {}
+        current: list[str] | None = None
+        fuzzy = False
+        for line in (raw.strip() for raw in block.splitlines()):
+            if line.startswith("#"):
+                fuzzy = fuzzy or (line.startswith("#,") and "fuzzy" in line)
+                continue
+            keyword, _sep, rest = line.partition(" ")
+            if keyword in ("msgid", "msgstr"):
+                current = fields.setdefault(keyword, [])
+                line = rest
+            if current is not None and line.startswith('"'):
+                current.append(ast.literal_eval(line))
+        if "msgid" not in fields or "msgstr" not in fields or fuzzy:
+            continue
+        key, value = "".join(fields["msgid"]), "".join(fields["msgstr"])
+        if value or not key:
+            messages[key] = value
+    return messages
+
+
+def _write_mo(messages: dict[str, str], path: Path) -> None:
+    # Layout per GNU gettext's .mo format (same as CPython's Tools/i18n/msgfmt.py)
+    keys = sorted(messages)
+    ids = strs = b""
+    offsets = []
+    for key in keys:
+        k, v = key.encode("utf-8"), messages[key].encode("utf-8")
+        offsets.append((len(ids), len(k), len(strs), len(v)))
+        ids += k + b"\0"
+        strs += v + b"\0"
+    keystart = 7 * 4 + 16 * len(keys)
+    valuestart = keystart + len(ids)
+    koffsets: list[int] = []
+    voffsets: list[int] = []
+    for o1, l1, o2, l2 in offsets:
+        koffsets += [l1, o1 + keystart]
+        voffsets += [l2, o2 + valuestart]
+    header = struct.pack("Iiiiiii", 0x950412DE, 0, len(keys), 7 * 4, 7 * 4 + len(keys) * 8, 0, 0)
+    path.write_bytes(
+        header + array("i", koffsets).tobytes() + array("i", voffsets).tobytes() + ids + strs
+    )
+
+
+def compile_catalogs(locales_dir: Path | None = None) -> list[Path]:
+    """Compile every ``<lang>/LC_MESSAGES/messages.po`` into ``messages.mo`` (build step)."""
+    written = []
+    for po in sorted((locales_dir or _LOCALES_DIR).glob(f"*/LC_MESSAGES/{_DOMAIN}.po")):
+        mo = po.with_suffix(".mo")
+        _write_mo(_parse_po(po.read_text(encoding="utf-8")), mo)
+        written.append(mo)
+    return written
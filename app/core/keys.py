@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import (
+    decode_dss_signature,
+    encode_dss_signature,
+)
+
+
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "ES256")
+
+
+def b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def b64url_decode(data: str | bytes) -> bytes:
+    if isinstance(data, str):
+        data = data.encode("ascii")
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """A parsed asymmetric key; PEMs are parsed once, never on the hot path."""
+
+    kid: str
+    alg: str
+    public_key: Any
+    private_key: Any | None = None
+
+    def sign(self, data: bytes) -> bytes:
+        if self.private_key is None:
+            raise ValueError(f"key {self.kid!r} is verification-only")
+        if self.alg == "EdDSA":
+            return self.private_key.sign(data)
+        # JWS wants raw r||s, cryptography produces DER
+        r, s = decode_dss_signature(self.private_key.sign(data, ec.ECDSA(hashes.SHA256())))
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+    def verify(self, data: bytes, signature: bytes) -> bool:
+        try:
+            if self.alg == "EdDSA":
+                self.public_key.verify(signature, data)
+            else:
+                if len(signature) != 64:
+                    return False
+                der = encode_dss_signature(
+                    int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:], "big")
+                )
+                self.public_key.verify(der, data, ec.ECDSA(hashes.SHA256()))
+        except InvalidSignature:
+            return False
+        return True
+
+    def to_jwk(self) -> dict[str, str]:
+        jwk = {"kid": self.kid, "alg": self.alg, "use": "sig"}
+        if self.alg == "EdDSA":
+            raw = self.public_key.public_bytes(
+                serialization.Encoding.Raw, serialization.PublicFormat.Raw
+            )
+            jwk.update(kty="OKP", crv="Ed25519", x=b64url_encode(raw))
+        else:
+            numbers = self.public_key.public_numbers()
+            jwk.update(
+                kty="EC",
+                crv="P-256",
+                x=b64url_encode(numbers.x.to_bytes(32, "big")),
+                y=b64url_encode(numbers.y.to_bytes(32, "big")),
+            )
+        return jwk
+
+
+def _alg_for(public_key: Any) -> str:
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return "EdDSA"
+    if isinstance(public_key, ec.EllipticCurvePublicKey) and isinstance(
+        public_key.curve, ec.SECP256R1
+    ):
+        return "ES256"
+    raise ValueError("unsupported key type (expected Ed25519 or EC P-256)")
+
+
+class KeyRing:
+    """Signing key plus verification-only keys kept during rotation overlap."""
+
+    def __init__(self, keys: list[SigningKey], active_kid: str) -> None:
+        self.keys = {k.kid: k for k in keys}
+        if active_kid not in self.keys or self.keys[active_kid].private_key is None:
+            raise ValueError(f"active key {active_kid!r} has no private key in the key ring")
+        self.active = self.keys[active_kid]
+        self._jwks = {"keys": [k.to_jwk() for k in self.keys.values()]}
+
+    def get(self, kid: str) -> SigningKey | None:
+        return self.keys.get(kid)
+
+    def jwks(self) -> dict[str, list[dict[str, str]]]:
+        return self._jwks
+
+
+def load_key_ring(directory: str, active_kid: str | None = None) -> KeyRing:
+    """Load ``<kid>.pem`` (private) and ``<kid>.pub.pem`` (verification-only) files.
+
+    Without ``active_kid`` the lexicographically greatest private kid signs, so
+    date-prefixed kids (``2026-10``) rotate naturally.
+    """
+    keys: list[SigningKey] = []
+    for path in sorted(Path(directory).glob("*.pem")):
+        data = path.read_bytes()
+        if path.name.endswith(".pub.pem"):
+            kid = path.name[: -len(".pub.pem")]
+            public = serialization.load_pem_public_key(data)
+            keys.append(SigningKey(kid=kid, alg=_alg_for(public), public_key=public))
+        else:
+            kid = path.stem
+            private = serialization.load_pem_private_key(data, password=None)
+            public = private.public_key()
+            keys.append(
+                SigningKey(kid=kid, alg=_alg_for(public), public_key=public, private_key=private)
+            )
+    signers = sorted(k.kid for k in keys if k.private_key is not None)
+    if not signers:
+        raise ValueError(f"no private signing keys found in {directory}")
+    return KeyRing(keys, active_kid or signers[-1])
+
+
+@lru_cache
+def get_key_ring(directory: str, active_kid: str | None = None) -> KeyRing:
+    return load_key_ring(directory, active_kid)
+
+
+def generate_private_key(alg: str) -> Any:
+    if alg == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    if alg == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    raise ValueError(f"unsupported algorithm {alg!r}")
+
+
+def private_key_pem(private_key: Any) -> bytes:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
@@ -1,34 +1,235 @@
+import atexit
 import logging
+import queue
+import random
 import sys
-from typing import Literal
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Literal, Mapping, TextIO
 
 import structlog
+from pydantic_core import to_json
 
 
-def setup_logging(env: Literal["dev", "staging", "prod"] = "dev") -> None:
-    shared_processors = [
-        structlog.processors.add_log_level,
-        structlog.processors.TimeStamper(fmt="iso"),
-    ]
+_STOP = object()
 
-    if env == "dev":
-        renderer = structlog.dev.ConsoleRenderer()
+
+def _json_renderer(event_dict: dict[str, Any]) -> str:
+    return to_json(event_dict, fallback=str).decode("utf-8")
+
+
+def _console_renderer() -> Callable[[dict[str, Any]], str]:
+    console = structlog.dev.ConsoleRenderer()
+    return lambda event_dict: console(None, "", event_dict)  # type: ignore[arg-type]
+
+
+class LogPipeline:
+    """Bounded queue + writer thread: rendering and I/O happen off the request path.
+
+    Request threads only enqueue the event dict. The writer drains up to
+    ``batch_size`` records at a time, renders them and does one write + flush
+    per batch. When the queue is full, ``overflow="drop"`` discards the record
+    (counted in ``dropped``) and ``overflow="block"`` waits for space (counted
+    in ``blocked``). ``sample_rates`` keeps only that fraction of the named
+    high-volume events.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[dict[str, Any]], str],
+        *,
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        overflow: Literal["drop", "block"] = "drop",
+        sample_rates: Mapping[str, float] | None = None,
+        stream: TextIO | None = None,
+    ) -> None:
+        if overflow not in ("drop", "block"):
+            raise ValueError(f"unknown overflow policy {overflow!r}")
+        self._render = render
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max(1, queue_size))
+        self.batch_size = max(1, batch_size)
+        self.overflow = overflow
+        self.sample_rates = dict(sample_rates or {})
+        self._stream = stream
+        self._counter_lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.sampled_out = 0
+        self.errors = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def sample(self, event: Any) -> bool:
+        rate = self.sample_rates.get(event) if isinstance(event, str) else None
+        if rate is None or random.random() < rate:
+            return True
+        with self._counter_lock:
+            self.sampled_out += 1
+        return False
+
+    def submit(self, event_dict: dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(event_dict)
+            return
+        except queue.Full:
+            pass
+        with self._counter_lock:
+            if self.overflow == "drop":
+                self.dropped += 1
+                return
+            self.blocked += 1
+        self._queue.put(event_dict)
+
+    def _write(self, batch: list[dict[str, Any]]) -> None:
+        lines = []
+        for event_dict in batch:
+            try:
+                lines.append(self._render(event_dict))
+            except Exception:
+                self.errors += 1
+        if not lines:
+            return
+        stream = self._stream or sys.stdout
+        try:
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+        except Exception:
+            self.errors += 1
+            return
+        self.written += len(lines)
+        self.batches += 1
+
+    def _run(self) -> None:
+        q = self._queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is _STOP for item in batch)
+            self._write([item for item in batch if item is not _STOP])
+            for _ in batch:
+                q.task_done()
+            if stop:
+                return
+
+    def flush(self) -> None:
+        """Wait until everything enqueued so far has been written."""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self, timeout: float = 2.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "sampled_out": self.sampled_out,
+            "errors": self.errors,
+        }
+
+
+_pipeline: LogPipeline | None = None
+
+
+# Processors look the pipeline up at call time: loggers cached on first use keep
+# working when setup_logging() replaces the pipeline (e.g. one app per test).
+def _sample(logger: Any, method: str, event_dict: dict[str, Any]) -> dict[str, Any]:
+    pipeline = _pipeline
+    if pipeline is not None and not pipeline.sample(event_dict.get("event")):
+        raise structlog.DropEvent
+    return event_dict
+
+
+def _stamp(logger: Any, method: str, event_dict: dict[str, Any]) -> dict[str, Any]:
+    # Capture the time now; formatting it is left to the writer thread
+    event_dict["timestamp"] = datetime.now(timezone.utc)
+    return event_dict
+
+
+def _enqueue(logger: Any, method: str, event_dict: dict[str, Any]) -> Any:
+    pipeline = _pipeline
+    if pipeline is not None:
+        pipeline.submit(event_dict)
+    raise structlog.DropEvent
+
+
+def _format_timestamp(render: Callable[[dict[str, Any]], str]) -> Callable[[dict[str, Any]], str]:
+    def rendered(event_dict: dict[str, Any]) -> str:
+        ts = event_dict.get("timestamp")
+        if isinstance(ts, datetime):
+            event_dict["timestamp"] = ts.isoformat().replace("+00:00", "Z")
+        return render(event_dict)
+
+    return rendered
+
+
+def get_log_pipeline() -> LogPipeline | None:
+    return _pipeline
+
+
+def setup_logging(
+    env: Literal["dev", "staging", "prod"] = "dev",
+    *,
+    level: str = "INFO",
+    queue_size: int = 10000,
+    batch_size: int = 256,
+    overflow: Literal["drop", "block"] = "drop",
+    sample_rates: Mapping[str, float] | None = None,
+) -> LogPipeline:
+    global _pipeline
+
+    renderer = _console_renderer() if env == "dev" else _json_renderer
+    pipeline = LogPipeline(
+        _format_timestamp(renderer),
+        queue_size=queue_size,
+        batch_size=batch_size,
+        overflow=overflow,
+        sample_rates=sample_rates,
+    )
+    previous, _pipeline = _pipeline, pipeline
+    if previous is None:
+        atexit.register(lambda: _pipeline and _pipeline.close())
     else:
-        renderer = structlog.processors.JSONRenderer()
+        previous.close()
 
+    log_level = logging.getLevelName(level.upper())
     structlog.configure(
         processors=[
-            *shared_processors,
+            _sample,
+            structlog.processors.add_log_level,
+            _stamp,
+            # No-ops unless stack_info/exc_info is passed; must run while the exception is live
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
-            renderer,
+            _enqueue,
         ],
-        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.make_filtering_bound_logger(log_level),
+        logger_factory=structlog.ReturnLoggerFactory(),
         cache_logger_on_first_use=True,
     )
 
     logging.basicConfig(
-        level=logging.INFO,
+        level=log_level,
         format="%(message)s",
         stream=sys.stdout,
     )
+    return pipeline
@@ -1,30 +1,166 @@
 from __future__ import annotations
 
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Any, Literal
+from typing import Any, Iterator, Literal, Mapping
 from uuid import uuid4
 
-from jose import JWTError, jwt
 from passlib.context import CryptContext
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
+from app.core.keys import ASYMMETRIC_ALGORITHMS, KeyRing, get_key_ring
+from app.core.token_codec import get_token_codec
+from app.utils.exceptions import OverloadedError
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_ROUNDS_CONTEXTS: dict[int, CryptContext] = {}
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def password_context(settings: Settings | None = None) -> CryptContext:
+    """``pwd_context``, or a copy with ``PASSWORD_HASH_ROUNDS`` bcrypt cost if set.
 
+    The cost only affects new hashes: existing hashes carry their own cost and
+    verify under any context. Here and below ``settings`` defaults to
+    ``get_settings()``; an app passes its own (``AppContainer.settings``).
+    """
+    rounds = (settings or get_settings()).PASSWORD_HASH_ROUNDS
+    if rounds is None:
+        return pwd_context
+    ctx = _ROUNDS_CONTEXTS.get(rounds)
+    if ctx is None:
+        ctx = _ROUNDS_CONTEXTS.setdefault(rounds, pwd_context.copy(bcrypt__rounds=rounds))
+    return ctx
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+
+class AdmissionController:
+    """Bounded concurrency with a bounded, deadline-limited wait queue.
+
+    Password hashing runs in the request threadpool; without a bound, a burst of
+    logins occupies every worker thread with bcrypt and cheap endpoints starve.
+    Work beyond ``max_concurrency + max_queue`` (or waiting past the deadline) is
+    shed immediately with ``OverloadedError``.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._service_time = 0.0  # EWMA of seconds per admitted operation
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    def _retry_after(self) -> int:
+        backlog = (self._waiting + self._active) / self.max_concurrency
+        return max(1, math.ceil(backlog * self._service_time))
+
+    def _acquire(self) -> None:
+        with self._cond:
+            if self._active < self.max_concurrency and self._waiting == 0:
+                self._active += 1
+                self.admitted += 1
+                return
+            if self._waiting >= self.max_queue:
+                self.shed_queue_full += 1
+                raise OverloadedError("server is overloaded", self._retry_after())
+            self._waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self._active >= self.max_concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed_timeout += 1
+                        raise OverloadedError("server is overloaded", self._retry_after())
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._active += 1
+            self.admitted += 1
+
+    def _release(self, elapsed: float) -> None:
+        with self._cond:
+            self._active -= 1
+            self._service_time = elapsed if not self._service_time else (
+                0.9 * self._service_time + 0.1 * elapsed
+            )
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - started)
+
+    def stats(self) -> dict[str, float]:
+        with self._cond:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queue_depth": self._waiting,
+                "admitted": self.admitted,
+                "shed_queue_full": self.shed_queue_full,
+                "shed_timeout": self.shed_timeout,
+                "avg_service_ms": round(self._service_time * 1000, 3),
+            }
+
+
+_admission: AdmissionController | None = None
+_admission_lock = threading.Lock()
+
+
+def get_password_admission() -> AdmissionController:
+    """Process-wide admission controller for password hashing, built from settings.
+
+    It bounds CPU use of the whole process, so it follows the environment
+    (``get_settings()``) rather than any one app's settings.
+    """
+    global _admission
+    settings = get_settings()
+    limits = (
+        settings.PASSWORD_HASH_MAX_CONCURRENCY or os.cpu_count() or 1,
+        settings.PASSWORD_HASH_MAX_QUEUE,
+        settings.PASSWORD_HASH_QUEUE_TIMEOUT_MS / 1000,
+    )
+    current = _admission
+    if current is not None and (
+        current.max_concurrency,
+        current.max_queue,
+        current.queue_timeout,
+    ) == limits:
+        return current
+    with _admission_lock:
+        if _admission is None or _admission is current:
+            _admission = AdmissionController(*limits)
+        return _admission
+
+
+def verify_password(
+    plain_password: str, hashed_password: str, *, settings: Settings | None = None
+) -> bool:
+    with get_password_admission().slot():
+        return password_context(settings).verify(plain_password, hashed_password)
+
+
+def get_password_hash(password: str, *, settings: Settings | None = None) -> str:
+    with get_password_admission().slot():
+        return password_context(settings).hash(password)
 
 
 def _base_claims(
-    subject: str, token_type: Literal["access", "refresh"]
+    subject: str, token_type: Literal["access", "refresh"], settings: Settings
 ) -> dict[str, Any]:
-    settings = get_settings()
     claims: dict[str, Any] = {
         "sub": subject,
         "type": token_type,
@@ -40,53 +176,55 @@ def _base_claims(
     return claims
 
 
+def get_key_ring_for(settings: Settings) -> KeyRing:
+    """Parsed signing/verification keys for EdDSA/ES256 (loaded once per config)."""
+    return get_key_ring(settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID)
+
+
+def public_jwks(settings: Settings | None = None) -> dict[str, list[dict[str, str]]]:
+    """Public verification keys; empty for HMAC algorithms (the secret is never published)."""
+    settings = settings or get_settings()
+    if settings.JWT_ALGORITHM not in ASYMMETRIC_ALGORITHMS:
+        return {"keys": []}
+    return get_key_ring_for(settings).jwks()
+
+
 def create_access_token(
-    subject: str, *, minutes: int | None = None, extra: dict[str, Any] | None = None
+    subject: str,
+    *,
+    minutes: int | None = None,
+    extra: dict[str, Any] | None = None,
+    settings: Settings | None = None,
 ) -> dict[str, str]:
-    settings = get_settings()
+    settings = settings or get_settings()
     exp_minutes = minutes if minutes is not None else settings.ACCESS_TOKEN_EXPIRES_MIN
     expire = datetime.now(timezone.utc) + timedelta(minutes=exp_minutes)
-    claims = _base_claims(subject, "access")
+    claims = _base_claims(subject, "access", settings)
     claims["exp"] = expire
     if extra:
         claims.update(extra)
-    token = jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
-    return {"token": token, "jti": claims["jti"]}
+    return {"token": get_token_codec(settings).encode(claims), "jti": claims["jti"]}
 
 
 def create_refresh_token(
-    subject: str, *, days: int | None = None, extra: dict[str, Any] | None = None
+    subject: str,
+    *,
+    days: int | None = None,
+    extra: dict[str, Any] | None = None,
+    settings: Settings | None = None,
 ) -> dict[str, str]:
-    settings = get_settings()
+    settings = settings or get_settings()
     exp_days = days if days is not None else settings.REFRESH_TOKEN_EXPIRES_DAYS
     expire = datetime.now(timezone.utc) + timedelta(days=exp_days)
-    claims = _base_claims(subject, "refresh")
+    claims = _base_claims(subject, "refresh", settings)
     claims["exp"] = expire
     if extra:
         claims.update(extra)
-    token = jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
-    return {"token": token, "jti": claims["jti"]}
+    return {"token": get_token_codec(settings).encode(claims), "jti": claims["jti"]}
 
 
-def decode_token(token: str) -> dict[str, Any]:
-    settings = get_settings()
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM],
-            options={
-                "require_exp": True,
-                "require_iat": True,
-                "require_nbf": True,
-                "verify_aud": bool(settings.TOKEN_AUDIENCE),
-            },
-            audience=settings.TOKEN_AUDIENCE,
-            issuer=settings.TOKEN_ISSUER,
-        )
-        return payload
-    except JWTError as e:
-        raise ValueError("invalid token") from e
+def decode_token(token: str, *, settings: Settings | None = None) -> dict[str, Any]:
+    return get_token_codec(settings or get_settings()).decode(token)
 
 
 def ensure_token_type(
@@ -95,3 +233,24 @@ def ensure_token_type(
     t = payload.get("type")
     if t != expected:
         raise ValueError("invalid token type")
+
+
+def verify_token(
+    token: str, stores: Mapping[str, Any], *, settings: Settings | None = None
+) -> dict[str, Any]:
+    """Claims of a valid, unrevoked token; raises ValueError otherwise.
+
+    ``stores`` maps each accepted token type ("access", "refresh") to the token
+    store holding its live jtis. Signature, expiry, iss/aud and revocation are
+    checked without touching the user repository.
+    """
+    payload = decode_token(token, settings=settings)
+    store = stores.get(payload.get("type"))
+    if store is None:
+        raise ValueError("invalid token type")
+    jti = payload.get("jti")
+    if not jti or not store.is_access_allowed(jti):
+        raise ValueError("token revoked or unknown")
+    if not payload.get("sub"):
+        raise ValueError("invalid token payload")
+    return payload
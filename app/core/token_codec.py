@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Protocol
+
+from jose import JWTError, jwt
+
+from app.core.config import Settings
+from app.core.keys import (
+    ASYMMETRIC_ALGORITHMS,
+    KeyRing,
+    SigningKey,
+    b64url_decode,
+    b64url_encode,
+    get_key_ring,
+)
+
+
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+_NUMERIC_DATES = ("exp", "iat", "nbf")
+
+
+class TokenCodec(Protocol):
+    """Signs claims into a compact JWT and verifies one back into claims.
+
+    ``decode`` raises ``ValueError("invalid token")`` for any bad signature,
+    malformed token or failed claim check (exp/nbf/iat required, iss/aud when
+    configured), so implementations are interchangeable.
+    """
+
+    def encode(self, claims: dict[str, Any]) -> str: ...
+
+    def decode(self, token: str) -> dict[str, Any]: ...
+
+
+def _key_ring(settings: Settings) -> KeyRing:
+    return get_key_ring(settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID)
+
+
+class JoseTokenCodec:
+    """python-jose implementation (HMAC and ES256; jose has no EdDSA)."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.algorithm = settings.JWT_ALGORITHM
+        if self.algorithm == "EdDSA":
+            raise ValueError("python-jose does not support EdDSA; use JWT_CODEC=fast")
+        self._ring = _key_ring(settings) if self.algorithm in ASYMMETRIC_ALGORITHMS else None
+        self._secret = settings.SECRET_KEY
+        self._issuer = settings.TOKEN_ISSUER
+        self._audience = settings.TOKEN_AUDIENCE
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        if self._ring is None:
+            return jwt.encode(claims, self._secret, algorithm=self.algorithm)
+        key = self._ring.active
+        return jwt.encode(
+            claims, key.private_key, algorithm=self.algorithm, headers={"kid": key.kid}
+        )
+
+    def decode(self, token: str) -> dict[str, Any]:
+        try:
+            key: Any = self._secret
+            if self._ring is not None:
+                signer = self._ring.get(str(jwt.get_unverified_header(token).get("kid")))
+                if signer is None or signer.alg != self.algorithm:
+                    raise JWTError("unknown signing key")
+                key = signer.public_key
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[self.algorithm],
+                options={
+                    "require_exp": True,
+                    "require_iat": True,
+                    "require_nbf": True,
+                    "verify_aud": bool(self._audience),
+                    "require_aud": bool(self._audience),
+                },
+                audience=self._audience,
+                issuer=self._issuer,
+            )
+        except JWTError as e:
+            raise ValueError("invalid token") from e
+
+
+class FastTokenCodec:
+    """Hot-path codec for HS256/384/512, EdDSA and ES256.
+
+    Header segments are serialized once per key, the HMAC key schedule is
+    computed once and ``copy()``-ed per token, and claims go through a single
+    tight validator instead of jose's generic option handling. Output is
+    byte-identical to jose for HMAC algorithms.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.algorithm = settings.JWT_ALGORITHM
+        self._issuer = settings.TOKEN_ISSUER
+        self._audience = settings.TOKEN_AUDIENCE
+        self._hmac: Any = None
+        self._signer: SigningKey | None = None
+        # header segment (with trailing dot) -> verification key, for known headers
+        self._headers: dict[str, SigningKey | None] = {}
+        if self.algorithm in _HMAC_DIGESTS:
+            self._hmac = hmac.new(
+                settings.SECRET_KEY.encode("utf-8"), digestmod=_HMAC_DIGESTS[self.algorithm]
+            )
+            self._header = self._header_segment({"alg": self.algorithm, "typ": "JWT"})
+            self._headers[self._header] = None
+        elif self.algorithm in ASYMMETRIC_ALGORITHMS:
+            ring = _key_ring(settings)
+            self._ring = ring
+            self._signer = ring.active
+            if ring.active.alg != self.algorithm:
+                raise ValueError(
+                    f"active signing key {ring.active.kid!r} is {ring.active.alg}, "
+                    f"not {self.algorithm}"
+                )
+            # Keys of another algorithm stay in the ring (JWKS) but never verify here
+            for key in ring.keys.values():
+                if key.alg == self.algorithm:
+                    segment = self._header_segment(
+                        {"alg": key.alg, "kid": key.kid, "typ": "JWT"}
+                    )
+                    self._headers[segment] = key
+            self._header = next(s for s, k in self._headers.items() if k is ring.active)
+        else:
+            raise ValueError(f"unsupported JWT algorithm {self.algorithm!r}")
+
+    @staticmethod
+    def _header_segment(header: dict[str, str]) -> str:
+        # Same serialization as jose: compact, sorted keys
+        raw = json.dumps(header, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        return b64url_encode(raw) + "."
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        if self._signer is not None:
+            return self._signer.sign(signing_input)
+        mac = self._hmac.copy()
+        mac.update(signing_input)
+        return mac.digest()
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        for name in _NUMERIC_DATES:
+            value = claims.get(name)
+            if isinstance(value, datetime):
+                claims = {**claims, name: int(value.timestamp())}
+        payload = b64url_encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        signing_input = self._header + payload
+        signature = self._sign(signing_input.encode("ascii"))
+        return f"{signing_input}.{b64url_encode(signature)}"
+
+    def _key_for(self, header_segment: str) -> SigningKey | None:
+        # Foreign-but-valid serializations of the header take the slow path
+        header = json.loads(b64url_decode(header_segment))
+        if self._signer is None:
+            if header.get("alg") != self.algorithm:
+                raise ValueError("unexpected algorithm")
+            return None
+        key = self._ring.get(str(header.get("kid")))
+        if key is None or key.alg != self.algorithm or header.get("alg") != key.alg:
+            raise ValueError("unknown signing key")
+        return key
+
+    def decode(self, token: str) -> dict[str, Any]:
+        try:
+            signing_input, _, signature_b64 = token.rpartition(".")
+            header_end = signing_input.find(".") + 1
+            if not header_end or signing_input.find(".", header_end) != -1:
+                raise ValueError("malformed token")
+            header_segment = signing_input[:header_end]
+            if header_segment in self._headers:
+                key = self._headers[header_segment]
+            else:
+                key = self._key_for(header_segment[:-1])
+            signature = b64url_decode(signature_b64)
+            data = signing_input.encode("ascii")
+            if key is not None:
+                valid = key.verify(data, signature)
+            else:
+                mac = self._hmac.copy()
+                mac.update(data)
+                valid = hmac.compare_digest(mac.digest(), signature)
+            if not valid:
+                raise ValueError("bad signature")
+            claims = json.loads(b64url_decode(signing_input[header_end:]))
+        except (ValueError, TypeError, AttributeError) as e:
+            raise ValueError("invalid token") from e
+        return self._validate(claims)
+
+    def _validate(self, claims: Any) -> dict[str, Any]:
+        if not isinstance(claims, dict):
+            raise ValueError("invalid token")
+        now = int(time.time())
+        try:
+            if int(claims["exp"]) < now or int(claims["nbf"]) > now:
+                raise ValueError("invalid token")
+            int(claims["iat"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError("invalid token") from e
+        if self._issuer is not None and claims.get("iss") != self._issuer:
+            raise ValueError("invalid token")
+        if self._audience:
+            aud = claims.get("aud")
+            audiences = [aud] if isinstance(aud, str) else aud
+            if not isinstance(audiences, list) or self._audience not in audiences:
+                raise ValueError("invalid token")
+        for name in ("sub", "jti"):
+            if name in claims and not isinstance(claims[name], str):
+                raise ValueError("invalid token")
+        return claims
+
+
+_CODECS = {"jose": JoseTokenCodec, "fast": FastTokenCodec}
+# id(settings) -> (settings, codec); the settings are kept so the id is not reused.
+# Several apps in one process each have their own settings object.
+_codecs: OrderedDict[int, tuple[Settings, TokenCodec]] = OrderedDict()
+_CODECS_MAX = 8
+_codec_lock = threading.Lock()
+
+
+def build_token_codec(settings: Settings) -> TokenCodec:
+    name = settings.JWT_CODEC
+    if name == "jose" and settings.JWT_ALGORITHM == "EdDSA":
+        name = "fast"  # the only codec that can do EdDSA
+    try:
+        return _CODECS[name](settings)
+    except KeyError:
+        raise ValueError(f"unknown JWT_CODEC {settings.JWT_CODEC!r}") from None
+
+
+def get_token_codec(settings: Settings) -> TokenCodec:
+    """Codec for ``settings``, built once per settings object (the latest few are kept)."""
+    current = _codecs.get(id(settings))
+    if current is not None and current[0] is settings:
+        return current[1]
+    with _codec_lock:
+        current = _codecs.get(id(settings))
+        if current is None or current[0] is not settings:
+            current = _codecs[id(settings)] = (settings, build_token_codec(settings))
+            while len(_codecs) > _CODECS_MAX:
+                _codecs.popitem(last=False)
+        return current[1]
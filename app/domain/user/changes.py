@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Literal, Protocol
+from uuid import UUID
+
+
+ChangeKind = Literal["created", "updated", "deactivated", "role_changed", "deleted"]
+
+
+@dataclass(frozen=True, slots=True)
+class UserChange:
+    """One entry of the user change feed (transactional outbox)."""
+
+    user_id: UUID
+    kind: ChangeKind
+    # updated_version() of the write (matches the user's ETag); None for deletions
+    version: int | None = None
+    # Assigned by the outbox on append; strictly increasing, may have gaps
+    seq: int = 0
+    occurred_at: float = field(default_factory=time.time)
+
+
+class UserChangeFeed(Protocol):
+    """Read side of the change outbox, written by the user repository.
+
+    ``read`` returns changes with ``seq > since`` in order and raises
+    ``CursorExpiredError`` when changes after ``since`` were already dropped by
+    retention. ``since=0`` means the start of the retained feed and never expires.
+    ``compact`` keeps only the latest change per user among those older than
+    ``compact_after`` seconds and drops everything older than ``retention``.
+    """
+
+    def read(self, since: int, limit: int) -> list[UserChange]: ...
+
+    def head(self) -> int: ...
+
+    def compact(self, *, retention: float, compact_after: float, now: float | None = None) -> int: ...
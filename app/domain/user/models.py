@@ -11,6 +11,11 @@ class Role(StrEnum):
     USER = "user"
 
 
+def normalize_email(email: str) -> str:
+    """Form used for email lookups and uniqueness; the stored email keeps its case."""
+    return email.strip().lower()
+
+
 @dataclass(slots=True)
 class User:
     id: UUID = field(default_factory=uuid4)
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Protocol
+from typing import Iterable, Protocol, Sequence
 from uuid import UUID
 
-from app.domain.user.models import User
+from app.domain.user.changes import UserChange
+from app.domain.user.models import User, normalize_email
 
 
 class UserRepository(ABC):
@@ -14,8 +15,13 @@ class UserRepository(ABC):
     @abstractmethod
     def get(self, user_id: UUID) -> User | None: ...
 
+    def get_for_update(self, user_id: UUID) -> User | None:
+        """Like ``get``, but the row stays locked until the transaction ends (if supported)."""
+        return self.get(user_id)
+
     @abstractmethod
-    def get_by_email(self, email: str) -> User | None: ...
+    def get_by_email(self, email: str) -> User | None:
+        """Case-insensitive: emails are compared in their ``normalize_email`` form."""
 
     @abstractmethod
     def update(self, user: User) -> User: ...
@@ -23,6 +29,28 @@ class UserRepository(ABC):
     @abstractmethod
     def delete(self, user_id: UUID) -> None: ...
 
+    @abstractmethod
+    def record_changes(self, changes: Sequence[UserChange]) -> None:
+        """Append to the change feed in the same transaction as the writes they describe."""
+
+    # Bulk operations; the defaults loop, SQL overrides them with set-based statements
+
+    def get_many(self, user_ids: Iterable[UUID]) -> list[User]:
+        """Existing users among ``user_ids`` (missing ids are left out, order unspecified)."""
+        return [user for user in map(self.get, user_ids) if user is not None]
+
+    def emails_in_use(self, emails: Iterable[str]) -> set[str]:
+        """Normalized forms of ``emails`` that already belong to a user."""
+        return {
+            normalize_email(email) for email in emails if self.get_by_email(email) is not None
+        }
+
+    def add_many(self, users: Sequence[User]) -> list[User]:
+        return [self.add(user) for user in users]
+
+    def update_many(self, users: Sequence[User]) -> list[User]:
+        return [self.update(user) for user in users]
+
 
 class UnitOfWork(Protocol):
     def commit(self) -> None: ...
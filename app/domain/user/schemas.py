@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Annotated, Literal, Union
 from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, Field
-from app.domain.user.models import Role
+from app.domain.user.changes import ChangeKind, UserChange
+from app.domain.user.models import Role, User
 
 
 class UserCreateDTO(BaseModel):
@@ -30,6 +32,25 @@ class UserReadDTO(BaseModel):
         "from_attributes": True,
     }
 
+    @classmethod
+    def from_domain(cls, user: User) -> UserReadDTO:
+        """Build from a trusted domain ``User`` without re-validation.
+
+        Every field of ``User`` is already typed and its email went through
+        ``EmailStr`` on the way in (register/create DTOs), so re-running the
+        validators (email-validator included) only costs time. Use
+        ``model_validate`` for anything not loaded from our own repositories.
+        """
+        return cls.model_construct(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            role=Role(user.role),
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
 
 class UserRegisterDTO(BaseModel):
     email: EmailStr
@@ -59,3 +80,113 @@ class PasswordResetConfirmDTO(BaseModel):
 
 class PasswordResetTokenDTO(BaseModel):
     token: str
+
+
+class TokenIntrospectionDTO(BaseModel):
+    """RFC 7662 introspection response; inactive tokens carry ``active`` only."""
+
+    active: bool
+    sub: str | None = None
+    role: str | None = None
+    token_type: Literal["access_token", "refresh_token"] | None = None
+    exp: int | None = None
+    iat: int | None = None
+    nbf: int | None = None
+    iss: str | None = None
+    aud: str | list[str] | None = None
+    jti: str | None = None
+
+
+class TokenIntrospectionBatchDTO(BaseModel):
+    tokens: list[str] = Field(min_length=1)
+
+
+class TokenIntrospectionBatchResultDTO(BaseModel):
+    results: list[TokenIntrospectionDTO]
+
+
+class SessionDTO(BaseModel):
+    jti: str
+    kind: Literal["access", "refresh"]
+    expires_at: datetime
+
+
+class UserLookupDTO(BaseModel):
+    ids: list[UUID] = Field(min_length=1)
+
+
+class UserLookupResultDTO(BaseModel):
+    users: list[UserReadDTO]  # in request order, duplicates collapsed
+    missing: list[UUID]
+
+
+# Batch admin mutations (POST /users/batch)
+class BatchCreateOp(UserCreateDTO):
+    op: Literal["create"]
+
+
+class BatchUpdateOp(UserUpdateDTO):
+    op: Literal["update"]
+    user_id: UUID
+
+
+class BatchDeactivateOp(BaseModel):
+    op: Literal["deactivate"]
+    user_id: UUID
+
+
+class BatchSetRoleOp(BaseModel):
+    op: Literal["set_role"]
+    user_id: UUID
+    role: Role
+
+
+BatchOperation = Annotated[
+    Union[BatchCreateOp, BatchUpdateOp, BatchDeactivateOp, BatchSetRoleOp],
+    Field(discriminator="op"),
+]
+
+
+class UserBatchDTO(BaseModel):
+    operations: list[BatchOperation] = Field(min_length=1)
+    # atomic: all operations or none; best_effort: apply every operation that is valid
+    mode: Literal["atomic", "best_effort"] = "atomic"
+
+
+class BatchItemResultDTO(BaseModel):
+    index: int
+    # skipped: valid, but not applied because another operation of an atomic batch failed
+    status: Literal["ok", "error", "skipped"]
+    user: UserReadDTO | None = None
+    error: str | None = None
+
+
+class UserBatchResultDTO(BaseModel):
+    mode: Literal["atomic", "best_effort"]
+    applied: int
+    failed: int
+    results: list[BatchItemResultDTO]
+
+
+class UserChangeDTO(BaseModel):
+    seq: int
+    user_id: UUID
+    kind: ChangeKind
+    version: int | None = None
+    occurred_at: datetime
+
+    @classmethod
+    def from_domain(cls, change: UserChange) -> UserChangeDTO:
+        return cls.model_construct(
+            seq=change.seq,
+            user_id=change.user_id,
+            kind=change.kind,
+            version=change.version,
+            occurred_at=datetime.fromtimestamp(change.occurred_at, tz=timezone.utc),
+        )
+
+
+class UserChangesDTO(BaseModel):
+    changes: list[UserChangeDTO]
+    # Pass back as ?since= to continue after the last returned change
+    cursor: int
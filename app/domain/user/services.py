@@ -1,22 +1,35 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Sequence
 from uuid import UUID
 
 import structlog
 
-from app.domain.user.models import User, Role
+from app.domain.user.changes import ChangeKind, UserChange
+from app.domain.user.models import User, Role, normalize_email
 from app.domain.user.repositories import UserRepository
 from app.domain.user.schemas import (
+    BatchCreateOp,
+    BatchDeactivateOp,
+    BatchItemResultDTO,
+    BatchOperation,
+    BatchSetRoleOp,
+    BatchUpdateOp,
+    UserBatchResultDTO,
     UserCreateDTO,
+    UserLookupResultDTO,
     UserReadDTO,
     UserUpdateDTO,
     UserRegisterDTO,
 )
-from app.utils.exceptions import NotFoundError
+from app.utils.etag import etag_matches, updated_version, user_etag
+from app.utils.exceptions import NotFoundError, PreconditionFailedError
 from app.core.security import get_password_hash, verify_password
 from app.domain.user.reset_tokens import PasswordResetStore
-from app.core.config import get_settings
+from app.domain.user.sessions import SessionRevoker
+from app.domain.user.versions import UserVersionCache
+from app.core.config import Settings, get_settings
 
 
 logger = structlog.get_logger()
@@ -27,39 +40,220 @@ class UserService:
         self,
         user_repo: UserRepository,
         password_reset_store: PasswordResetStore | None = None,
+        session_stores: Sequence[SessionRevoker] = (),
+        version_cache: UserVersionCache | None = None,
+        settings: Settings | None = None,
     ) -> None:
         self._users = user_repo
         self._password_resets = password_reset_store
+        self._sessions = tuple(session_stores)
+        self._versions = version_cache
+        self._settings = settings or get_settings()
+
+    def _read(self, user: User) -> UserReadDTO:
+        return UserReadDTO.from_domain(user)
+
+    def _written(self, user: User) -> UserReadDTO:
+        # Versions are recorded on writes only, so reads cost no cache round trip
+        if self._versions is not None:
+            self._versions.remember(str(user.id), updated_version(user.updated_at))
+        return self._read(user)
+
+    def _record(self, *changes: tuple[User, ChangeKind]) -> None:
+        self._users.record_changes(
+            [
+                UserChange(user.id, kind, updated_version(user.updated_at))
+                for user, kind in changes
+            ]
+        )
+
+    def revoke_sessions(self, user_id: str) -> int:
+        """Invalidate all access/refresh tokens of the user ("log out everywhere")."""
+        revoked = sum(store.revoke_all_for_user(user_id) for store in self._sessions)
+        if revoked:
+            logger.info("auth.sessions_revoked", user_id=user_id, count=revoked)
+        return revoked
 
     def create(self, dto: UserCreateDTO) -> UserReadDTO:
         if self._users.get_by_email(dto.email):
             raise ValueError("email already in use")
         user = User(email=str(dto.email), full_name=dto.full_name)
         user = self._users.add(user)
+        self._record((user, "created"))
         logger.info("user.created", user_id=str(user.id), email=user.email)
-        return UserReadDTO.model_validate(user)
+        return self._written(user)
 
     def get(self, user_id: str) -> UserReadDTO:
         user = self._users.get(UUID(user_id))
         if not user:
             raise NotFoundError("user not found")
-        return UserReadDTO.model_validate(user)
+        return self._read(user)
 
-    def update(self, user_id: str, dto: UserUpdateDTO) -> UserReadDTO:
-        user = self._users.get(UUID(user_id))
+    def get_by_email(self, email: str) -> UserReadDTO:
+        user = self._users.get_by_email(email)
+        if not user:
+            raise NotFoundError("user not found")
+        return self._read(user)
+
+    def get_many(self, user_ids: Sequence[UUID]) -> UserLookupResultDTO:
+        """Users in request order with a single repository query; unknown ids are reported."""
+        max_ids = self._settings.USER_LOOKUP_MAX_IDS
+        if len(user_ids) > max_ids:
+            raise ValueError(f"at most {max_ids} ids per lookup")
+        wanted = list(dict.fromkeys(user_ids))
+        found = {user.id: user for user in self._users.get_many(wanted)}
+        return UserLookupResultDTO(
+            users=[self._read(found[user_id]) for user_id in wanted if user_id in found],
+            missing=[user_id for user_id in wanted if user_id not in found],
+        )
+
+    def update(
+        self, user_id: str, dto: UserUpdateDTO, *, if_match: str | None = None
+    ) -> UserReadDTO:
+        """Apply ``dto``; with ``if_match`` (an If-Match value) only if the ETag still matches."""
+        if if_match is None:
+            user = self._users.get(UUID(user_id))
+        else:
+            # Lock the row so the check and the write see the same version
+            user = self._users.get_for_update(UUID(user_id))
         if not user:
             raise NotFoundError("user not found")
+        if if_match is not None and not etag_matches(
+            if_match, user_etag(user.id, updated_version(user.updated_at)), weak=False
+        ):
+            raise PreconditionFailedError("user was modified")
+        was_active = user.is_active
         if dto.full_name:
             user.rename(dto.full_name)
         if dto.is_active is not None:
             user.is_active = dto.is_active
+        deactivated = was_active and not user.is_active
         user = self._users.update(user)
+        self._record((user, "deactivated" if deactivated else "updated"))
         logger.info("user.updated", user_id=str(user.id))
-        return UserReadDTO.model_validate(user)
+        if deactivated:
+            self.revoke_sessions(str(user.id))
+        return self._written(user)
 
     def delete(self, user_id: str) -> None:
         self._users.delete(UUID(user_id))
+        self._users.record_changes([UserChange(UUID(user_id), "deleted")])
+        if self._versions is not None:
+            self._versions.forget(user_id)
         logger.info("user.deleted", user_id=user_id)
+        self.revoke_sessions(user_id)
+
+    def apply_batch(
+        self, operations: Sequence[BatchOperation], *, atomic: bool = True
+    ) -> UserBatchResultDTO:
+        """Apply create/update/deactivate/set_role operations with set-based repository calls.
+
+        Operations are validated and applied in order against users loaded in
+        one query, then written with one bulk insert and one bulk update in the
+        caller's transaction. ``atomic`` writes nothing if any operation fails;
+        otherwise the valid ones are written and the rest reported per item.
+        """
+        max_ops = self._settings.USER_BATCH_MAX_OPERATIONS
+        if len(operations) > max_ops:
+            raise ValueError(f"at most {max_ops} operations per batch")
+
+        user_ids = [op.user_id for op in operations if not isinstance(op, BatchCreateOp)]
+        users = {user.id: user for user in self._users.get_many(user_ids)}
+        taken = self._users.emails_in_use(
+            str(op.email) for op in operations if isinstance(op, BatchCreateOp)
+        )
+        created: dict[UUID, User] = {}
+        changed: set[UUID] = set()
+        revoke: set[UUID] = set()
+        role_changed: set[UUID] = set()
+        outcome: list[tuple[UUID | None, str | None]] = []
+
+        for op in operations:
+            if isinstance(op, BatchCreateOp):
+                email = str(op.email)
+                if normalize_email(email) in taken:
+                    outcome.append((None, "email already in use"))
+                    continue
+                user = User(email=email, full_name=op.full_name)
+                taken.add(normalize_email(email))
+                created[user.id] = user
+                users[user.id] = user
+                outcome.append((user.id, None))
+                continue
+            user = users.get(op.user_id)
+            if user is None:
+                outcome.append((None, "user not found"))
+                continue
+            if isinstance(op, BatchUpdateOp):
+                user.rename(op.full_name)
+                if op.is_active is not None:
+                    if user.is_active and not op.is_active:
+                        revoke.add(user.id)
+                    user.is_active = op.is_active
+            elif isinstance(op, BatchDeactivateOp):
+                if user.is_active:
+                    revoke.add(user.id)
+                user.is_active = False
+            elif isinstance(op, BatchSetRoleOp):
+                if user.role != op.role:
+                    # issued tokens carry the old role claim
+                    revoke.add(user.id)
+                    role_changed.add(user.id)
+                user.role = op.role
+            if user.id not in created:
+                changed.add(user.id)
+            outcome.append((user.id, None))
+
+        failed = sum(1 for _user_id, error in outcome if error is not None)
+        if atomic and failed:
+            results = [
+                BatchItemResultDTO(index=i, status="error" if error else "skipped", error=error)
+                for i, (_user_id, error) in enumerate(outcome)
+            ]
+            return UserBatchResultDTO(mode="atomic", applied=0, failed=failed, results=results)
+
+        # In best-effort mode a failed operation never mutated anything, so every
+        # user touched by a successful one is written in its final state
+        written = {user.id: user for user in self._users.add_many(list(created.values()))}
+        written.update(
+            (user.id, user) for user in self._users.update_many([users[i] for i in changed])
+        )
+        changes: list[tuple[User, ChangeKind]] = []
+        for user_id, user in written.items():
+            if user_id in created:
+                changes.append((user, "created"))
+            elif user_id in role_changed:
+                changes.append((user, "role_changed"))
+            elif not user.is_active and user_id in revoke:
+                changes.append((user, "deactivated"))
+            else:
+                changes.append((user, "updated"))
+        self._record(*changes)
+        if self._versions is not None:
+            self._versions.remember_many(
+                {str(user_id): updated_version(user.updated_at) for user_id, user in written.items()}
+            )
+        read = {user_id: self._read(user) for user_id, user in written.items()}
+        for user_id in revoke:
+            self.revoke_sessions(str(user_id))
+        logger.info(
+            "user.batch_applied",
+            created=len(created),
+            updated=len(changed),
+            failed=failed,
+        )
+        results = [
+            BatchItemResultDTO(index=i, status="error", error=error)
+            if error
+            else BatchItemResultDTO(index=i, status="ok", user=read[user_id])
+            for i, (user_id, error) in enumerate(outcome)
+        ]
+        return UserBatchResultDTO(
+            mode="atomic" if atomic else "best_effort",
+            applied=len(outcome) - failed,
+            failed=failed,
+            results=results,
+        )
 
     # Auth flows
     def register(self, dto: UserRegisterDTO) -> UserReadDTO:
@@ -68,28 +262,36 @@ class UserService:
         user = User(
             email=str(dto.email),
             full_name=dto.full_name,
-            password_hash=get_password_hash(dto.password),
+            password_hash=get_password_hash(dto.password, settings=self._settings),
         )
         user = self._users.add(user)
+        self._record((user, "created"))
         logger.info("auth.registered", user_id=str(user.id))
-        return UserReadDTO.model_validate(user)
+        return self._written(user)
 
     def authenticate(self, email: str, password: str) -> UserReadDTO:
         user = self._users.get_by_email(email)
-        if not user or not verify_password(password, user.password_hash):
+        if not user or not verify_password(
+            password, user.password_hash, settings=self._settings
+        ):
             raise ValueError("invalid credentials")
         if not user.is_active:
             raise ValueError("inactive user")
-        return UserReadDTO.model_validate(user)
+        return self._read(user)
 
     def set_role(self, user_id: str, role: Role) -> UserReadDTO:
         user = self._users.get(UUID(user_id))
         if not user:
             raise NotFoundError("user not found")
+        changed = user.role != role
         user.role = role
         user = self._users.update(user)
+        self._record((user, "role_changed" if changed else "updated"))
         logger.info("user.role_updated", user_id=str(user.id), role=user.role)
-        return UserReadDTO.model_validate(user)
+        if changed:
+            # issued tokens carry the old role claim
+            self.revoke_sessions(str(user.id))
+        return self._written(user)
 
     # Password reset flows
     def request_password_reset(self, email: str) -> str:
@@ -98,9 +300,8 @@ class UserService:
             raise NotFoundError("user not found")
         if self._password_resets is None:
             raise RuntimeError("password reset store is not configured")
-        settings = get_settings()
         token = self._password_resets.issue(
-            str(user.id), ttl_seconds=settings.PASSWORD_RESET_TOKEN_EXPIRES_MIN * 60
+            str(user.id), ttl_seconds=self._settings.PASSWORD_RESET_TOKEN_EXPIRES_MIN * 60
         )
         logger.info("user.password_reset_requested", user_id=str(user.id))
         return token
@@ -114,7 +315,11 @@ class UserService:
         user = self._users.get(UUID(user_id))
         if not user:
             raise NotFoundError("user not found")
-        user.password_hash = get_password_hash(new_password)
+        user.password_hash = get_password_hash(new_password, settings=self._settings)
         user.updated_at = datetime.utcnow()
         user = self._users.update(user)
+        self._record((user, "updated"))
+        if self._versions is not None:
+            self._versions.remember(str(user.id), updated_version(user.updated_at))
         logger.info("user.password_reset_completed", user_id=str(user.id))
+        self.revoke_sessions(str(user.id))
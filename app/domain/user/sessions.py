@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from typing import Protocol
+
+
+class SessionRevoker(Protocol):
+    """Interface for dropping every issued token of a user (access/refresh stores)."""
+
+    def revoke_all_for_user(self, user_id: str) -> int: ...
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Protocol
+
+
+class UserVersionCache(Protocol):
+    """Latest known representation version (``updated_at`` in µs) per user id.
+
+    Lets conditional GETs be answered with 304 without loading the user.
+    ``remember`` keeps the newest version only, so a slow reader can never
+    overwrite a concurrent writer's entry with an older one; ``forget`` leaves
+    a tombstone for the same reason.
+    """
+
+    def get(self, user_id: str) -> int | None: ...
+
+    def remember(self, user_id: str, version: int) -> None: ...
+
+    def remember_many(self, versions: dict[str, int]) -> None:
+        """``remember`` for several users; backends do it in one round trip."""
+        ...
+
+    def forget(self, user_id: str) -> None: ...
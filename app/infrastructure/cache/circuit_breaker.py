@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+import structlog
+
+from app.utils.exceptions import ServiceUnavailableError
+
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(ServiceUnavailableError):
+    """Call rejected without trying: the dependency failed recently."""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker around calls to one dependency.
+
+    ``failure_threshold`` consecutive failures (exceptions of ``failure_types``,
+    e.g. connection errors and timeouts) open the circuit: calls are rejected
+    with ``CircuitOpenError`` at once instead of each waiting for a timeout.
+    After ``reset_timeout`` seconds a single trial call is let through
+    (half-open); its success closes the circuit, its failure opens it again.
+    Any other exception means the dependency answered and counts as success.
+    Failures surface as ``ServiceUnavailableError`` (HTTP 503), never as the
+    raw client error.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        failure_types: tuple[type[BaseException], ...] = (ConnectionError, TimeoutError),
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failure_types = failure_types
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.transitions = {OPEN: 0, HALF_OPEN: 0, CLOSED: 0}
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._opened_at + self.reset_timeout - self._clock()))
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        self.transitions[state] += 1
+        logger.warning("circuit.state_changed", breaker=self.name, state=state)
+
+    def _before(self) -> None:
+        with self._lock:
+            self.calls += 1
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} unavailable", self._retry_after())
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._trial:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} unavailable", 1)
+                self._trial = True
+
+    def _after(self, failed: bool) -> None:
+        with self._lock:
+            self._trial = False
+            if not failed:
+                self._consecutive = 0
+                if self._state == HALF_OPEN:
+                    self._transition(CLOSED)
+                return
+            self.failures += 1
+            self._consecutive += 1
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._consecutive >= self.failure_threshold
+            ):
+                self._opened_at = self._clock()
+                self._transition(OPEN)
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        self._before()
+        try:
+            result = fn(*args, **kwargs)
+        except self.failure_types as e:
+            self._after(failed=True)
+            raise ServiceUnavailableError(f"{self.name} unavailable", 1) from e
+        except BaseException:
+            self._after(failed=False)
+            raise
+        self._after(failed=False)
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._state,
+                "calls": self.calls,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "consecutive_failures": self._consecutive,
+                "opened": self.transitions[OPEN],
+                "half_opened": self.transitions[HALF_OPEN],
+                "closed": self.transitions[CLOSED],
+            }
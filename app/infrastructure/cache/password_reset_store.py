@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import secrets
+import threading
 import time
 from dataclasses import dataclass
 from typing import Any
 
 from app.domain.user.reset_tokens import PasswordResetStore
+from app.infrastructure.cache.shm_table import SharedMemoryTable
+from app.infrastructure.cache.token_store import GETDEL_LUA
 
 
 @dataclass
@@ -19,6 +23,7 @@ class InMemoryPasswordResetStore(PasswordResetStore):
 
     def __init__(self) -> None:
         self._tokens: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
 
     def _gc(self) -> None:
         now = time.time()
@@ -28,14 +33,16 @@ class InMemoryPasswordResetStore(PasswordResetStore):
                 self._tokens.pop(token, None)
 
     def issue(self, user_id: str, ttl_seconds: int) -> str:
-        self._gc()
         token = secrets.token_urlsafe(32)
-        self._tokens[token] = _Entry(user_id=user_id, expires_at=time.time() + ttl_seconds)
+        with self._lock:
+            self._gc()
+            self._tokens[token] = _Entry(user_id=user_id, expires_at=time.time() + ttl_seconds)
         return token
 
     def consume(self, token: str) -> str | None:
-        self._gc()
-        entry = self._tokens.pop(token, None)
+        with self._lock:
+            self._gc()
+            entry = self._tokens.pop(token, None)
         if not entry:
             return None
         if entry.expires_at <= time.time():
@@ -43,12 +50,47 @@ class InMemoryPasswordResetStore(PasswordResetStore):
         return entry.user_id
 
     def peek(self, token: str) -> str | None:
-        self._gc()
-        entry = self._tokens.get(token)
-        if not entry:
+        with self._lock:
+            self._gc()
+            entry = self._tokens.get(token)
+            if not entry:
+                return None
+            if entry.expires_at <= time.time():
+                self._tokens.pop(token, None)
+                return None
+            return entry.user_id
+
+
+class SharedMemoryPasswordResetStore(PasswordResetStore):
+    """Reset tokens in a shared-memory table, shared by all workers on a host.
+
+    Only a digest of each token is stored, so the table file never holds a
+    redeemable secret.
+    """
+
+    _KIND = 1
+
+    def __init__(self, path: str, capacity: int = 65536) -> None:
+        self._table = SharedMemoryTable(path, capacity)
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+    def issue(self, user_id: str, ttl_seconds: int) -> str:
+        token = secrets.token_urlsafe(32)
+        self._table.put(self._key(token), self._KIND, user_id, time.time() + ttl_seconds)
+        return token
+
+    def consume(self, token: str) -> str | None:
+        entry = self._table.pop(self._key(token), self._KIND)
+        if entry is None or entry.expires_at <= time.time():
             return None
-        if entry.expires_at <= time.time():
-            self._tokens.pop(token, None)
+        return entry.user_id
+
+    def peek(self, token: str) -> str | None:
+        entry = self._table.get(self._key(token), self._KIND)
+        if entry is None or entry.expires_at <= time.time():
             return None
         return entry.user_id
 
@@ -59,6 +101,7 @@ class RedisPasswordResetStore(PasswordResetStore):
     def __init__(self, redis_client: Any, namespace: str = "auth:reset") -> None:
         self._redis = redis_client
         self._namespace = namespace
+        self._consume = redis_client.register_script(GETDEL_LUA)
 
     def _key(self, token: str) -> str:
         return f"{self._namespace}:{token}"
@@ -69,11 +112,8 @@ class RedisPasswordResetStore(PasswordResetStore):
         return token
 
     def consume(self, token: str) -> str | None:
-        key = self._key(token)
-        pipe = self._redis.pipeline()
-        pipe.get(key)
-        pipe.delete(key)
-        value, _ = pipe.execute()
+        # GET+DEL in one atomic script: a token can be redeemed exactly once
+        value = self._consume(keys=[self._key(token)])
         if value is None:
             return None
         if isinstance(value, bytes):
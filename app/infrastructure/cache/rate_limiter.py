@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    retry_after: int = 0  # seconds until the next attempt would be allowed
+
+
+class RateLimiter(Protocol):
+    def hit(self, key: str, limit: int, window_seconds: int) -> RateLimitResult: ...
+
+
+def sliding_window_retry_after(
+    prev: float, cur: float, limit: int, window: float, elapsed: float
+) -> int:
+    """Seconds until ``prev * (1 - t/window) + cur + 1 <= limit`` holds again.
+
+    ``prev``/``cur`` are the previous and current fixed-window counts and
+    ``elapsed`` is how far into the current window we are.
+    """
+    budget = limit - 1
+    if cur <= budget and prev > 0:
+        # Still inside the current window: wait for the previous window's weight to decay
+        wait = window * (1 - (budget - cur) / prev) - elapsed
+        if wait < window - elapsed:
+            return max(1, math.ceil(wait - 1e-9))
+    # Next window: the current count becomes the decaying previous one
+    wait = window - elapsed
+    if cur > 0 and cur > budget:
+        wait += window * (1 - budget / cur)
+    return max(1, math.ceil(wait - 1e-9))
+
+
+@dataclass
+class _Window:
+    start: int
+    prev: int
+    cur: int
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """Sliding-window counter limiter for a single process."""
+
+    def __init__(self) -> None:
+        self._windows: dict[str, _Window] = {}
+        self._lock = threading.Lock()
+        self._last_gc = time.time()
+
+    def _gc(self, now: float, window_seconds: int) -> None:
+        if now - self._last_gc < window_seconds:
+            return
+        self._last_gc = now
+        horizon = now - 2 * window_seconds
+        for key in [k for k, w in self._windows.items() if w.start < horizon]:
+            del self._windows[key]
+
+    def hit(self, key: str, limit: int, window_seconds: int) -> RateLimitResult:
+        now = time.time()
+        start = int(now // window_seconds) * window_seconds
+        with self._lock:
+            self._gc(now, window_seconds)
+            w = self._windows.get(key)
+            if w is None:
+                w = self._windows[key] = _Window(start=start, prev=0, cur=0)
+            elif w.start != start:
+                # Roll forward; a gap of more than one window resets the history
+                w.prev = w.cur if start - w.start == window_seconds else 0
+                w.cur = 0
+                w.start = start
+            elapsed = now - start
+            estimated = w.prev * (window_seconds - elapsed) / window_seconds + w.cur
+            if estimated + 1 > limit:
+                return RateLimitResult(
+                    False,
+                    sliding_window_retry_after(w.prev, w.cur, limit, window_seconds, elapsed),
+                )
+            w.cur += 1
+            return RateLimitResult(True)
+
+
+# KEYS[1] = current window counter, KEYS[2] = previous window counter
+# ARGV = limit, window (ms), elapsed into the current window (ms)
+_SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local prev = tonumber(redis.call('GET', KEYS[2]) or '0')
+local cur = tonumber(redis.call('GET', KEYS[1]) or '0')
+if prev * (window - elapsed) / window + cur + 1 > limit then
+  return {0, prev, cur}
+end
+cur = redis.call('INCR', KEYS[1])
+if cur == 1 then
+  redis.call('PEXPIRE', KEYS[1], window * 2)
+end
+return {1, prev, cur}
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Sliding-window counter limiter shared by all nodes.
+
+    Read, decision and increment happen in one atomic Lua script (EVALSHA after
+    the first call), i.e. a single round trip per attempt.
+    """
+
+    def __init__(self, redis_client: Any, namespace: str = "auth:throttle") -> None:
+        self.r = redis_client
+        self.ns = namespace
+        self._script = redis_client.register_script(_SLIDING_WINDOW_LUA)
+
+    def hit(self, key: str, limit: int, window_seconds: int) -> RateLimitResult:
+        now = time.time()
+        index = int(now // window_seconds)
+        elapsed = now - index * window_seconds
+        allowed, prev, cur = self._script(
+            keys=[f"{self.ns}:{key}:{index}", f"{self.ns}:{key}:{index - 1}"],
+            args=[limit, window_seconds * 1000, int(elapsed * 1000)],
+        )
+        if allowed:
+            return RateLimitResult(True)
+        return RateLimitResult(
+            False,
+            sliding_window_retry_after(int(prev), int(cur), limit, window_seconds, elapsed),
+        )
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from functools import lru_cache, partial
+from typing import Any
+from urllib.parse import urlsplit
+
+from app.core.config import Settings, get_settings
+from app.infrastructure.cache.circuit_breaker import CircuitBreaker
+
+
+# Non-network helpers that must not count as calls (or successes) of the breaker
+_LOCAL_METHODS = frozenset({"get_encoder", "get_connection_kwargs", "close"})
+
+
+class _GuardedPipeline:
+    """Commands are buffered locally; only ``execute`` goes through the breaker."""
+
+    def __init__(self, pipeline: Any, breaker: CircuitBreaker) -> None:
+        self._pipeline = pipeline
+        self._breaker = breaker
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pipeline, name)
+
+    def execute(self, raise_on_error: bool = True) -> list[Any]:
+        return self._breaker.call(self._pipeline.execute, raise_on_error)
+
+
+class GuardedRedis:
+    """Redis client proxy that runs every command through a ``CircuitBreaker``.
+
+    Stores keep calling the usual client API (commands, ``register_script``,
+    ``pipeline``); connection errors and timeouts become
+    ``ServiceUnavailableError`` and, once the circuit opens, calls fail fast
+    without touching the network.
+    """
+
+    def __init__(self, client: Any, breaker: CircuitBreaker) -> None:
+        self._client = client
+        self.breaker = breaker
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr) or name in _LOCAL_METHODS:
+            return attr
+        return partial(self.breaker.call, attr)
+
+    def register_script(self, script: str) -> Any:
+        from redis.commands.core import Script
+
+        # Bound to the proxy, so EVALSHA/SCRIPT LOAD are guarded too
+        return Script(self, script)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Any = None) -> _GuardedPipeline:
+        return _GuardedPipeline(self._client.pipeline(transaction, shard_hint), self.breaker)
+
+
+def _breaker_name(url: str) -> str:
+    # Never expose credentials in logs and /metrics
+    parts = urlsplit(url)
+    return f"redis://{parts.hostname}:{parts.port or 6379}{parts.path}"
+
+
+def create_redis_client(url: str, settings: Settings) -> GuardedRedis:
+    """Build a Redis client with its own connection pool and circuit breaker.
+
+    One client per application (see ``AppContainer``): a new client per request
+    would open a new pool every time, while sharing one keeps connections warm
+    and lets Lua scripts be registered once. Every command has a bounded socket
+    timeout and runs through the breaker (see ``GuardedRedis``).
+    """
+    import redis  # type: ignore
+    from redis.backoff import NoBackoff
+    from redis.retry import Retry
+
+    client = redis.Redis.from_url(
+        url,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SEC,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SEC,
+        # No client-side retries: they multiply the timeout, the breaker handles outages
+        retry=Retry(NoBackoff(), 0),
+    )
+    breaker = CircuitBreaker(
+        _breaker_name(url),
+        failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.REDIS_BREAKER_RESET_SEC,
+        failure_types=(redis.exceptions.ConnectionError, redis.exceptions.TimeoutError),
+    )
+    return GuardedRedis(client, breaker)
+
+
+@lru_cache
+def get_redis_client(url: str) -> GuardedRedis:
+    """Process-wide client for scripts and benchmarks that run without an app."""
+    return create_redis_client(url, get_settings())
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple
+
+import structlog
+
+try:  # POSIX only; the table is an optional backend
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+from app.utils.exceptions import ServiceUnavailableError
+
+
+logger = structlog.get_logger()
+
+_MAGIC = b"AUTHSHM1"
+# magic, capacity, slot size, generation (table seqlock), used (live + tombstone slots)
+_HEADER = struct.Struct("<8sIIII")
+_HEADER_SIZE = 64
+_GEN_OFFSET = 16
+_USED_OFFSET = 20
+# Writer bookkeeping after the header fields (zero in a fresh file, so it starts
+# out permissive): tombstone slots, and a lower bound of the live expiries
+_TOMBSTONES_OFFSET = 24
+_MIN_EXPIRY = struct.Struct("<d")
+_MIN_EXPIRY_OFFSET = 32
+
+# seq (slot seqlock), state, key kind, expires_at, key, user id (NUL-padded)
+_SEQ = struct.Struct("<I")
+_BODY = struct.Struct("<BBxxd16s48s")
+_SLOT_SIZE = _SEQ.size + _BODY.size
+_USER_OFFSET = _SLOT_SIZE - 48
+USER_ID_MAX = 48
+
+_EMPTY, _LIVE, _TOMBSTONE = 0, 1, 2
+_BLANK = b"\0" * 48
+# Compact (drop tombstones and expired entries) above this share of used slots
+_MAX_LOAD = 0.75
+
+
+class Entry(NamedTuple):
+    key: bytes
+    kind: int
+    user_id: str
+    expires_at: float
+
+
+class SharedMemoryTable:
+    """Fixed-size open-addressing hash table in an mmap'd file, shared by processes.
+
+    Every slot holds a 16-byte key, an owner (user id) and an expiry. Writers
+    serialize on ``flock`` of the backing file (plus a thread lock, as flock is
+    per open file); readers take no lock at all. Each slot carries a sequence
+    number that writers make odd while the slot is being changed, and the header
+    carries one for compaction, which moves entries: a reader retries until it
+    sees the same even sequence before and after copying (a seqlock). Readers
+    rely on stores becoming visible in order, which holds on x86-64 (TSO).
+
+    Probing is linear; deletes leave tombstones that inserts reuse, and a
+    compaction pass rebuilds the table once tombstones and expired entries
+    push the load past 75%. The header counts tombstones and keeps a lower
+    bound of the live expiries, so a table filled past 75% by live entries is
+    not rebuilt on every insert: it logs a capacity warning instead and keeps
+    filling until it is full.
+    """
+
+    def __init__(self, path: str, capacity: int = 65536) -> None:
+        if fcntl is None:  # pragma: no cover - Windows
+            raise RuntimeError("shared-memory stores require a POSIX platform (fcntl)")
+        if capacity < 8:
+            raise ValueError("capacity must be at least 8 slots")
+        self.path = path
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._warned_full = False
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = _HEADER_SIZE + capacity * _SLOT_SIZE
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            current = os.fstat(self._fd).st_size
+            if current == 0:
+                # A fresh zero-filled file is a valid table with every slot empty
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, capacity, _SLOT_SIZE, 0, 0), 0)
+            else:
+                magic, cap, slot_size, _gen, _used = _HEADER.unpack(
+                    os.pread(self._fd, _HEADER.size, 0)
+                )
+                if (magic, cap, slot_size) != (_MAGIC, capacity, _SLOT_SIZE) or current != size:
+                    raise ValueError(
+                        f"{path} holds a table with a different layout or capacity; "
+                        "stop all workers and remove the file to recreate it"
+                    )
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mm = mmap.mmap(self._fd, size)
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    # -- low level -------------------------------------------------------
+
+    def _offset(self, index: int) -> int:
+        return _HEADER_SIZE + index * _SLOT_SIZE
+
+    def _home(self, key: bytes) -> int:
+        # Keys are UUID bytes or blake2b digests: already uniformly distributed
+        return int.from_bytes(key[:8], "little") % self.capacity
+
+    def _read(self, offset: int) -> tuple[int, int, float, bytes, bytes]:
+        mm = self._mm
+        while True:
+            seq = _SEQ.unpack_from(mm, offset)[0]
+            if seq & 1:
+                time.sleep(0)
+                continue
+            body = _BODY.unpack_from(mm, offset + _SEQ.size)
+            if _SEQ.unpack_from(mm, offset)[0] == seq:
+                return body
+
+    def _write(
+        self, offset: int, state: int, kind: int, expires_at: float, key: bytes, user: bytes
+    ) -> None:
+        mm = self._mm
+        seq = _SEQ.unpack_from(mm, offset)[0]
+        _SEQ.pack_into(mm, offset, (seq + 1) & 0xFFFFFFFF)
+        _BODY.pack_into(mm, offset + _SEQ.size, state, kind, expires_at, key, user)
+        _SEQ.pack_into(mm, offset, (seq + 2) & 0xFFFFFFFF)
+
+    def _generation(self) -> int:
+        return _SEQ.unpack_from(self._mm, _GEN_OFFSET)[0]
+
+    def _used(self) -> int:
+        return _SEQ.unpack_from(self._mm, _USED_OFFSET)[0]
+
+    def _set_used(self, used: int) -> None:
+        _SEQ.pack_into(self._mm, _USED_OFFSET, used)
+
+    def _tombstones(self) -> int:
+        return _SEQ.unpack_from(self._mm, _TOMBSTONES_OFFSET)[0]
+
+    def _set_tombstones(self, count: int) -> None:
+        _SEQ.pack_into(self._mm, _TOMBSTONES_OFFSET, count)
+
+    def _min_expiry(self) -> float:
+        return _MIN_EXPIRY.unpack_from(self._mm, _MIN_EXPIRY_OFFSET)[0]
+
+    def _set_min_expiry(self, expires_at: float) -> None:
+        _MIN_EXPIRY.pack_into(self._mm, _MIN_EXPIRY_OFFSET, expires_at)
+
+    def _bury(self, offset: int) -> None:
+        self._write(offset, _TOMBSTONE, 0, 0.0, b"", _BLANK)
+        self._set_tombstones(self._tombstones() + 1)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _find(self, key: bytes, kind: int) -> tuple[int, Entry] | None:
+        index = self._home(key)
+        for _ in range(self.capacity):
+            offset = self._offset(index)
+            state, slot_kind, expires_at, slot_key, user = self._read(offset)
+            if state == _EMPTY:
+                return None
+            if state == _LIVE and slot_key == key and slot_kind == kind:
+                return offset, Entry(key, kind, user.rstrip(b"\0").decode("utf-8"), expires_at)
+            index = (index + 1) % self.capacity
+        return None
+
+    def _compact(self, now: float) -> None:
+        # Entries move, so readers must not trust a probe that overlaps this
+        gen = self._generation()
+        _SEQ.pack_into(self._mm, _GEN_OFFSET, (gen + 1) & 0xFFFFFFFF)
+        live: list[tuple[int, float, bytes, bytes]] = []
+        min_expiry = float("inf")
+        for index in range(self.capacity):
+            offset = self._offset(index)
+            state, kind, expires_at, key, user = _BODY.unpack_from(self._mm, offset + _SEQ.size)
+            if state == _LIVE and expires_at > now:
+                live.append((kind, expires_at, key, user))
+                min_expiry = min(min_expiry, expires_at)
+            if state != _EMPTY:
+                self._write(offset, _EMPTY, 0, 0.0, b"", _BLANK)
+        for kind, expires_at, key, user in live:
+            index = self._home(key)
+            while _BODY.unpack_from(self._mm, self._offset(index) + _SEQ.size)[0] != _EMPTY:
+                index = (index + 1) % self.capacity
+            self._write(self._offset(index), _LIVE, kind, expires_at, key, user)
+        self._set_used(len(live))
+        self._set_tombstones(0)
+        self._set_min_expiry(min_expiry)
+        _SEQ.pack_into(self._mm, _GEN_OFFSET, (gen + 2) & 0xFFFFFFFF)
+
+    def _make_room(self, now: float) -> None:
+        # Rebuilding only helps if it frees slots; a table full of live entries
+        # would otherwise be rescanned on every insert under the writer lock
+        if self._tombstones() or self._min_expiry() <= now:
+            self._compact(now)
+        if self._used() + 1 > self.capacity * _MAX_LOAD:
+            if not self._warned_full:
+                self._warned_full = True
+                logger.warning(
+                    "shm_table.near_capacity",
+                    path=self.path,
+                    used=self._used(),
+                    capacity=self.capacity,
+                )
+        else:
+            self._warned_full = False
+
+    # -- operations ------------------------------------------------------
+
+    def get(self, key: bytes, kind: int) -> Entry | None:
+        """Lock-free lookup; expired entries are returned, callers check ``expires_at``."""
+        while True:
+            gen = self._generation()
+            if gen & 1:
+                time.sleep(0)
+                continue
+            found = self._find(key, kind)
+            if self._generation() == gen:
+                return None if found is None else found[1]
+
+    def put(self, key: bytes, kind: int, user_id: str, expires_at: float) -> None:
+        user = user_id.encode("utf-8")
+        if len(user) > USER_ID_MAX:
+            raise ValueError(f"user id longer than {USER_ID_MAX} bytes")
+        now = time.time()
+        with self._exclusive():
+            if self._used() + 1 > self.capacity * _MAX_LOAD:
+                self._make_room(now)
+            index = self._home(key)
+            target: int | None = None
+            fresh = False
+            reused = False
+            for _ in range(self.capacity):
+                offset = self._offset(index)
+                state, slot_kind, expires_at_old, slot_key, _user = self._read(offset)
+                if state == _LIVE and slot_key == key and slot_kind == kind:
+                    target, fresh, reused = offset, False, False
+                    break
+                if state == _EMPTY:
+                    if target is None:
+                        target, fresh = offset, True
+                    break
+                if target is None and (state == _TOMBSTONE or expires_at_old <= now):
+                    target, reused = offset, state == _TOMBSTONE
+                index = (index + 1) % self.capacity
+            if target is None:
+                raise ServiceUnavailableError("token store is full", retry_after=5)
+            self._write(target, _LIVE, kind, expires_at, key, user.ljust(48, b"\0"))
+            if fresh:
+                self._set_used(self._used() + 1)
+            if reused:
+                self._set_tombstones(self._tombstones() - 1)
+            if expires_at < self._min_expiry():
+                self._set_min_expiry(expires_at)
+
+    def pop(self, key: bytes, kind: int, user_id: str | None = None) -> Entry | None:
+        """Remove and return the entry (even if expired) under the writer lock.
+
+        With ``user_id`` an entry owned by another user is left in place.
+        """
+        with self._exclusive():
+            found = self._find(key, kind)
+            if found is None:
+                return None
+            offset, entry = found
+            if user_id is not None and entry.user_id != user_id:
+                return None
+            self._bury(offset)
+            return entry
+
+    def _scan_user(self, user_id: str) -> Iterator[tuple[int, Entry]]:
+        # The user field is NUL-padded, so an aligned exact match is that user's slot;
+        # mmap.find does the scanning in C
+        pattern = user_id.encode("utf-8").ljust(48, b"\0")
+        mm = self._mm
+        pos = mm.find(pattern, _HEADER_SIZE)
+        while pos != -1:
+            relative = pos - _HEADER_SIZE - _USER_OFFSET
+            if relative % _SLOT_SIZE == 0:
+                offset = _HEADER_SIZE + relative
+                state, kind, expires_at, key, user = self._read(offset)
+                if state == _LIVE and user == pattern:
+                    yield offset, Entry(key, kind, user_id, expires_at)
+            pos = mm.find(pattern, pos + 1)
+
+    def entries_for(self, user_id: str) -> list[Entry]:
+        """Lock-free scan for the user's entries (expired ones included)."""
+        while True:
+            gen = self._generation()
+            if gen & 1:
+                time.sleep(0)
+                continue
+            found = [entry for _offset, entry in self._scan_user(user_id)]
+            if self._generation() == gen:
+                return found
+
+    def pop_user(self, user_id: str) -> list[Entry]:
+        with self._exclusive():
+            found = list(self._scan_user(user_id))
+            for offset, _entry in found:
+                self._bury(offset)
+        return [entry for _offset, entry in found]
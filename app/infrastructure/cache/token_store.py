@@ -1,8 +1,21 @@
 from __future__ import annotations
 
+import hashlib
+import threading
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Protocol, Any
+from uuid import UUID
+
+from app.infrastructure.cache.shm_table import SharedMemoryTable
+from app.utils.exceptions import ServiceUnavailableError
+
+
+@dataclass(frozen=True)
+class SessionInfo:
+    jti: str
+    expires_at: float  # unix timestamp
 
 
 class TokenStore(Protocol):
@@ -10,6 +23,45 @@ class TokenStore(Protocol):
     def is_access_allowed(self, jti: str) -> bool: ...
     def revoke_access(self, jti: str) -> None: ...
 
+    def revoke_all_for_user(self, user_id: str) -> int:
+        """Revoke every live jti of ``user_id``; cost is O(that user's sessions)."""
+        ...
+
+    def list_sessions(self, user_id: str) -> list[SessionInfo]:
+        """Live jtis of ``user_id`` ordered by expiry; expired entries are pruned lazily."""
+        ...
+
+    def consume(self, jti: str, owner: str | None = None) -> str | None:
+        """Atomically remove ``jti`` and return its user id (None if unknown/expired).
+
+        With ``owner`` a jti of another user is left in place and None is returned.
+        """
+        ...
+
+    def rotate(
+        self,
+        old_jti: str,
+        new_jti: str,
+        user_id: str,
+        ttl_seconds: int,
+        *,
+        access_store: TokenStore,
+        access_jti: str,
+        access_ttl_seconds: int,
+    ) -> bool:
+        """Consume ``old_jti`` and allow the new refresh/access jtis.
+
+        Returns False (and allows nothing) if ``old_jti`` was already used, revoked
+        or belongs to another user, so two concurrent refreshes cannot both win;
+        another user's token stays valid. Backends that can do all of it in one
+        round trip override this.
+        """
+        if self.consume(old_jti, owner=user_id) is None:
+            return False
+        access_store.allow_access(access_jti, user_id, access_ttl_seconds)
+        self.allow_access(new_jti, user_id, ttl_seconds)
+        return True
+
 
 @dataclass
 class _Entry:
@@ -18,27 +70,209 @@ class _Entry:
 
 
 class InMemoryTokenStore(TokenStore):
-    """Simple in-memory token store with TTL suitable for tests/dev."""
+    """Simple in-memory token store with TTL suitable for tests/dev.
+
+    Keeps a per-user secondary index (user id -> {jti: expires_at}) so
+    logout-everywhere and session listing never scan other users' tokens.
+    """
+
+    _GC_INTERVAL = 60.0
 
     def __init__(self) -> None:
         self._data: dict[str, _Entry] = {}
+        self._by_user: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._next_gc = time.time() + self._GC_INTERVAL
+
+    def _drop(self, jti: str) -> _Entry | None:
+        entry = self._data.pop(jti, None)
+        if entry is not None:
+            sessions = self._by_user.get(entry.user_id)
+            if sessions is not None:
+                sessions.pop(jti, None)
+                if not sessions:
+                    del self._by_user[entry.user_id]
+        return entry
 
     def _gc(self) -> None:
+        # Expiry is checked on every read; the full sweep only bounds memory
         now = time.time()
-        for k in list(self._data.keys()):
-            if self._data[k].expires_at <= now:
-                self._data.pop(k, None)
+        if now < self._next_gc:
+            return
+        self._next_gc = now + self._GC_INTERVAL
+        for k in [k for k, e in self._data.items() if e.expires_at <= now]:
+            self._drop(k)
+
+    def allow_access(self, jti: str, user_id: str, ttl_seconds: int) -> None:
+        expires_at = time.time() + ttl_seconds
+        with self._lock:
+            self._gc()
+            self._data[jti] = _Entry(user_id=user_id, expires_at=expires_at)
+            self._by_user.setdefault(user_id, {})[jti] = expires_at
+
+    def is_access_allowed(self, jti: str) -> bool:
+        with self._lock:
+            self._gc()
+            entry = self._data.get(jti)
+            if entry is None:
+                return False
+            if entry.expires_at <= time.time():
+                self._drop(jti)
+                return False
+            return True
+
+    def revoke_access(self, jti: str) -> None:
+        with self._lock:
+            self._drop(jti)
+
+    def consume(self, jti: str, owner: str | None = None) -> str | None:
+        with self._lock:
+            entry = self._data.get(jti)
+            if entry is None or (owner is not None and entry.user_id != owner):
+                return None
+            self._drop(jti)
+        if entry is None or entry.expires_at <= time.time():
+            return None
+        return entry.user_id
+
+    def revoke_all_for_user(self, user_id: str) -> int:
+        with self._lock:
+            sessions = self._by_user.pop(user_id, {})
+            for jti in sessions:
+                self._data.pop(jti, None)
+        now = time.time()
+        return sum(1 for exp in sessions.values() if exp > now)
+
+    def list_sessions(self, user_id: str) -> list[SessionInfo]:
+        now = time.time()
+        with self._lock:
+            sessions = self._by_user.get(user_id, {})
+            for jti in [j for j, exp in sessions.items() if exp <= now]:
+                self._drop(jti)
+            live = [SessionInfo(jti, exp) for jti, exp in sessions.items()]
+        return sorted(live, key=lambda s: s.expires_at)
+
+
+_KEY_UUID, _KEY_DIGEST = 1, 2
+
+
+def _jti_key(jti: str) -> tuple[bytes, int]:
+    # Our jtis are UUIDs and fit a slot losslessly; anything else is hashed
+    try:
+        parsed = UUID(jti)
+    except ValueError:
+        parsed = None
+    if parsed is not None and str(parsed) == jti:
+        return parsed.bytes, _KEY_UUID
+    return hashlib.blake2b(jti.encode("utf-8"), digest_size=16).digest(), _KEY_DIGEST
+
+
+class SharedMemoryTokenStore(TokenStore):
+    """Token store in a shared-memory table: all workers on a host see the same tokens.
+
+    For multi-worker deployments without Redis. Lookups never lock; writes
+    serialize on the table file. See ``SharedMemoryTable``.
+    """
+
+    def __init__(self, path: str, capacity: int = 65536) -> None:
+        self._table = SharedMemoryTable(path, capacity)
 
     def allow_access(self, jti: str, user_id: str, ttl_seconds: int) -> None:
-        self._gc()
-        self._data[jti] = _Entry(user_id=user_id, expires_at=time.time() + ttl_seconds)
+        key, kind = _jti_key(jti)
+        self._table.put(key, kind, user_id, time.time() + ttl_seconds)
 
     def is_access_allowed(self, jti: str) -> bool:
-        self._gc()
-        return jti in self._data
+        entry = self._table.get(*_jti_key(jti))
+        return entry is not None and entry.expires_at > time.time()
 
     def revoke_access(self, jti: str) -> None:
-        self._data.pop(jti, None)
+        self._table.pop(*_jti_key(jti))
+
+    def consume(self, jti: str, owner: str | None = None) -> str | None:
+        entry = self._table.pop(*_jti_key(jti), user_id=owner)
+        if entry is None or entry.expires_at <= time.time():
+            return None
+        return entry.user_id
+
+    def revoke_all_for_user(self, user_id: str) -> int:
+        now = time.time()
+        return sum(1 for entry in self._table.pop_user(user_id) if entry.expires_at > now)
+
+    def list_sessions(self, user_id: str) -> list[SessionInfo]:
+        now = time.time()
+        live = [
+            SessionInfo(
+                str(UUID(bytes=entry.key)) if entry.kind == _KEY_UUID else entry.key.hex(),
+                entry.expires_at,
+            )
+            for entry in self._table.entries_for(user_id)
+            if entry.expires_at > now
+        ]
+        return sorted(live, key=lambda s: s.expires_at)
+
+
+# KEYS: token key, user index; ARGV: user id, ttl, expires_at, jti, now
+_ALLOW_LUA = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[4])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[5])
+if redis.call('TTL', KEYS[2]) < tonumber(ARGV[2]) then
+  redis.call('EXPIRE', KEYS[2], ARGV[2])
+end
+"""
+
+# KEYS: old refresh, new access, new refresh, access user index, refresh user index
+# ARGV: user id, access ttl, refresh ttl, access jti, refresh jti, now
+_ROTATE_LUA = """
+local owner = redis.call('GET', KEYS[1])
+if not owner or owner ~= ARGV[1] then
+  return 0
+end
+local now = tonumber(ARGV[6])
+redis.call('DEL', KEYS[1])
+redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[2])
+redis.call('SET', KEYS[3], ARGV[1], 'EX', ARGV[3])
+redis.call('ZADD', KEYS[4], now + tonumber(ARGV[2]), ARGV[4])
+redis.call('ZADD', KEYS[5], now + tonumber(ARGV[3]), ARGV[5])
+for i = 4, 5 do
+  redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now)
+  local ttl = tonumber(ARGV[i - 2])
+  if redis.call('TTL', KEYS[i]) < ttl then
+    redis.call('EXPIRE', KEYS[i], ttl)
+  end
+end
+return 1
+"""
+
+# KEYS: user index; ARGV: token key prefix
+# Returns {revoked count, indexed jtis} so callers can drop local state for them
+_REVOKE_ALL_LUA = """
+local members = redis.call('ZRANGE', KEYS[1], 0, -1)
+local revoked = 0
+for _, jti in ipairs(members) do
+  revoked = revoked + redis.call('DEL', ARGV[1] .. jti)
+end
+redis.call('DEL', KEYS[1])
+return {revoked, members}
+"""
+
+# KEYS: key to read and delete
+GETDEL_LUA = """
+local value = redis.call('GET', KEYS[1])
+if value then
+  redis.call('DEL', KEYS[1])
+end
+return value
+"""
+
+# KEYS: token key; ARGV: owner (deleted only if it holds this user id)
+_TAKE_OWNED_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  redis.call('DEL', KEYS[1])
+  return ARGV[1]
+end
+return false
+"""
 
 
 class RedisTokenStore(TokenStore):
@@ -46,20 +280,147 @@ class RedisTokenStore(TokenStore):
 
     Requires `redis` package and a running Redis server. This class is optional
     and not used in tests unless REDIS_URL is configured.
+
+    With ``local_read_ttl`` every ``is_access_allowed`` answer is remembered in
+    the process for that many seconds and served while Redis is unavailable
+    (``REDIS_BREAKER_OPEN_POLICY=local_reads``). Tokens not seen recently still
+    fail with ``ServiceUnavailableError``, and revocations made during the
+    outage take effect once Redis is back.
     """
 
-    def __init__(self, redis_client: Any, namespace: str = "auth:access") -> None:
+    def __init__(
+        self,
+        redis_client: Any,
+        namespace: str = "auth:access",
+        *,
+        local_read_ttl: float = 0.0,
+        local_read_entries: int = 100_000,
+    ) -> None:
         self.r = redis_client
         self.ns = namespace
+        self._local_ttl = local_read_ttl
+        self._local_max = local_read_entries
+        self._local: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self._local_lock = threading.Lock()
+        self.local_reads = 0
+        # Script objects run EVALSHA and load the script once on NOSCRIPT
+        self._allow = redis_client.register_script(_ALLOW_LUA)
+        self._rotate = redis_client.register_script(_ROTATE_LUA)
+        self._consume = redis_client.register_script(GETDEL_LUA)
+        self._take_owned = redis_client.register_script(_TAKE_OWNED_LUA)
+        self._revoke_all = redis_client.register_script(_REVOKE_ALL_LUA)
 
     def _key(self, jti: str) -> str:
         return f"{self.ns}:{jti}"
 
+    def _user_key(self, user_id: str) -> str:
+        # jtis are UUIDs, so this never collides with a token key
+        return f"{self.ns}:user:{user_id}"
+
     def allow_access(self, jti: str, user_id: str, ttl_seconds: int) -> None:
-        self.r.set(self._key(jti), user_id, ex=ttl_seconds)
+        now = time.time()
+        self._allow(
+            keys=[self._key(jti), self._user_key(user_id)],
+            args=[user_id, ttl_seconds, now + ttl_seconds, jti, now],
+        )
 
     def is_access_allowed(self, jti: str) -> bool:
-        return self.r.exists(self._key(jti)) == 1
+        if not self._local_ttl:
+            return self.r.exists(self._key(jti)) == 1
+        try:
+            allowed = self.r.exists(self._key(jti)) == 1
+        except ServiceUnavailableError:
+            with self._local_lock:
+                entry = self._local.get(jti)
+                if entry is None or entry[1] <= time.monotonic():
+                    raise
+                self.local_reads += 1
+                return entry[0]
+        with self._local_lock:
+            self._local[jti] = (allowed, time.monotonic() + self._local_ttl)
+            self._local.move_to_end(jti)
+            while len(self._local) > self._local_max:
+                self._local.popitem(last=False)
+        return allowed
+
+    def _forget(self, jtis: Any) -> None:
+        # Revoked tokens must not be served from the local cache during an outage
+        if self._local_ttl:
+            with self._local_lock:
+                for jti in jtis:
+                    self._local.pop(jti, None)
 
     def revoke_access(self, jti: str) -> None:
         self.r.delete(self._key(jti))
+        self._forget((jti,))
+
+    def consume(self, jti: str, owner: str | None = None) -> str | None:
+        if owner is None:
+            value = self._consume(keys=[self._key(jti)])
+        else:
+            value = self._take_owned(keys=[self._key(jti)], args=[owner])
+        self._forget((jti,))
+        if value is None:
+            return None
+        return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+    def revoke_all_for_user(self, user_id: str) -> int:
+        revoked, jtis = self._revoke_all(keys=[self._user_key(user_id)], args=[f"{self.ns}:"])
+        self._forget(j.decode("utf-8") if isinstance(j, bytes) else str(j) for j in jtis)
+        return int(revoked)
+
+    def list_sessions(self, user_id: str) -> list[SessionInfo]:
+        index = self._user_key(user_id)
+        pipe = self.r.pipeline()
+        pipe.zremrangebyscore(index, "-inf", time.time())
+        pipe.zrange(index, 0, -1, withscores=True)
+        _, members = pipe.execute()
+        if not members:
+            return []
+        jtis = [m.decode("utf-8") if isinstance(m, bytes) else str(m) for m, _ in members]
+        pipe = self.r.pipeline()
+        for jti in jtis:
+            pipe.exists(self._key(jti))
+        alive = pipe.execute()
+        # Revoked/consumed tokens leave their index member behind; prune them now
+        dead = [jti for jti, ok in zip(jtis, alive) if not ok]
+        if dead:
+            self.r.zrem(index, *dead)
+        return [
+            SessionInfo(jti, float(score))
+            for jti, (_, score), ok in zip(jtis, members, alive)
+            if ok
+        ]
+
+    def rotate(
+        self,
+        old_jti: str,
+        new_jti: str,
+        user_id: str,
+        ttl_seconds: int,
+        *,
+        access_store: TokenStore,
+        access_jti: str,
+        access_ttl_seconds: int,
+    ) -> bool:
+        if not isinstance(access_store, RedisTokenStore) or access_store.r is not self.r:
+            return super().rotate(
+                old_jti,
+                new_jti,
+                user_id,
+                ttl_seconds,
+                access_store=access_store,
+                access_jti=access_jti,
+                access_ttl_seconds=access_ttl_seconds,
+            )
+        rotated = self._rotate(
+            keys=[
+                self._key(old_jti),
+                access_store._key(access_jti),
+                self._key(new_jti),
+                access_store._user_key(user_id),
+                self._user_key(user_id),
+            ],
+            args=[user_id, access_ttl_seconds, ttl_seconds, access_jti, new_jti, time.time()],
+        )
+        return rotated == 1
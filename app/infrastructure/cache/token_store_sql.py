@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import hashlib
+import secrets
+import threading
+import time
+
+import structlog
+from sqlalchemy import bindparam, delete, insert, literal, select, tuple_
+from sqlalchemy.engine import Engine
+
+from app.domain.user.reset_tokens import PasswordResetStore
+from app.infrastructure.cache.token_store import SessionInfo, TokenStore
+from app.infrastructure.models.token import IssuedTokenORM, PasswordResetTokenORM
+
+
+logger = structlog.get_logger()
+
+_tokens = IssuedTokenORM.__table__
+_resets = PasswordResetTokenORM.__table__
+
+
+class SQLTokenStore(TokenStore):
+    """Durable token store in the ``issued_tokens`` table (SQLite in WAL mode or Postgres).
+
+    Statements are built once with bound parameters, so SQLAlchemy's compiled
+    cache and the driver's statement cache (sqlite3, psycopg auto-prepare) are
+    hit on every call. Reads filter on ``expires_at``; expired rows are removed
+    by ``purge_expired`` rather than on the request path.
+    """
+
+    def __init__(self, engine: Engine, namespace: str = "auth:access") -> None:
+        self.engine = engine
+        self.ns = namespace
+        t = _tokens.c
+        own = (t.namespace == bindparam("ns"), t.jti == bindparam("jti"))
+        self._insert = insert(_tokens)
+        self._exists = select(literal(1)).where(*own, t.expires_at > bindparam("now"))
+        self._delete = delete(_tokens).where(*own)
+        self._take = delete(_tokens).where(*own).returning(t.user_id, t.expires_at)
+        self._take_owned = (
+            delete(_tokens)
+            .where(*own, t.user_id == bindparam("user_id"))
+            .returning(t.user_id, t.expires_at)
+        )
+        self._take_user = (
+            delete(_tokens)
+            .where(t.namespace == bindparam("ns"), t.user_id == bindparam("user_id"))
+            .returning(t.expires_at)
+        )
+        self._sessions = (
+            select(t.jti, t.expires_at)
+            .where(
+                t.namespace == bindparam("ns"),
+                t.user_id == bindparam("user_id"),
+                t.expires_at > bindparam("now"),
+            )
+            .order_by(t.expires_at)
+        )
+
+    def _row(self, jti: str, user_id: str, ttl_seconds: int) -> dict[str, object]:
+        return {
+            "namespace": self.ns,
+            "jti": jti,
+            "user_id": user_id,
+            "expires_at": time.time() + ttl_seconds,
+        }
+
+    def allow_access(self, jti: str, user_id: str, ttl_seconds: int) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(self._insert, self._row(jti, user_id, ttl_seconds))
+
+    def is_access_allowed(self, jti: str) -> bool:
+        with self.engine.connect() as conn:
+            found = conn.execute(self._exists, {"ns": self.ns, "jti": jti, "now": time.time()})
+            return found.first() is not None
+
+    def revoke_access(self, jti: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(self._delete, {"ns": self.ns, "jti": jti})
+
+    def consume(self, jti: str, owner: str | None = None) -> str | None:
+        params = {"ns": self.ns, "jti": jti}
+        with self.engine.begin() as conn:
+            if owner is None:
+                row = conn.execute(self._take, params).first()
+            else:
+                row = conn.execute(self._take_owned, {**params, "user_id": owner}).first()
+        if row is None or row.expires_at <= time.time():
+            return None
+        return row.user_id
+
+    def revoke_all_for_user(self, user_id: str) -> int:
+        with self.engine.begin() as conn:
+            expiries = conn.execute(self._take_user, {"ns": self.ns, "user_id": user_id}).scalars()
+            now = time.time()
+            return sum(1 for expires_at in expiries if expires_at > now)
+
+    def list_sessions(self, user_id: str) -> list[SessionInfo]:
+        params = {"ns": self.ns, "user_id": user_id, "now": time.time()}
+        with self.engine.connect() as conn:
+            rows = conn.execute(self._sessions, params).all()
+        return [SessionInfo(row.jti, row.expires_at) for row in rows]
+
+    def rotate(
+        self,
+        old_jti: str,
+        new_jti: str,
+        user_id: str,
+        ttl_seconds: int,
+        *,
+        access_store: TokenStore,
+        access_jti: str,
+        access_ttl_seconds: int,
+    ) -> bool:
+        if not isinstance(access_store, SQLTokenStore) or access_store.engine is not self.engine:
+            return super().rotate(
+                old_jti,
+                new_jti,
+                user_id,
+                ttl_seconds,
+                access_store=access_store,
+                access_jti=access_jti,
+                access_ttl_seconds=access_ttl_seconds,
+            )
+        # One transaction: the DELETE row lock makes a concurrent rotation of the
+        # same refresh token see it gone, and a foreign owner rolls back untouched
+        with self.engine.connect() as conn, conn.begin() as tx:
+            row = conn.execute(self._take, {"ns": self.ns, "jti": old_jti}).first()
+            if row is None or row.user_id != user_id or row.expires_at <= time.time():
+                tx.rollback()
+                return False
+            conn.execute(
+                self._insert,
+                [
+                    access_store._row(access_jti, user_id, access_ttl_seconds),
+                    self._row(new_jti, user_id, ttl_seconds),
+                ],
+            )
+        return True
+
+
+class SQLPasswordResetStore(PasswordResetStore):
+    """Durable password reset tokens in the ``password_reset_tokens`` table."""
+
+    def __init__(self, engine: Engine, namespace: str = "auth:reset") -> None:
+        # All reset tokens share one table; namespace is accepted for factory symmetry
+        self.engine = engine
+        t = _resets.c
+        self._insert = insert(_resets)
+        self._peek = select(t.user_id).where(
+            t.token_hash == bindparam("token_hash"), t.expires_at > bindparam("now")
+        )
+        self._take = (
+            delete(_resets)
+            .where(t.token_hash == bindparam("token_hash"))
+            .returning(t.user_id, t.expires_at)
+        )
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def issue(self, user_id: str, ttl_seconds: int) -> str:
+        token = secrets.token_urlsafe(32)
+        row = {
+            "token_hash": self._hash(token),
+            "user_id": user_id,
+            "expires_at": time.time() + ttl_seconds,
+        }
+        with self.engine.begin() as conn:
+            conn.execute(self._insert, row)
+        return token
+
+    def consume(self, token: str) -> str | None:
+        with self.engine.begin() as conn:
+            row = conn.execute(self._take, {"token_hash": self._hash(token)}).first()
+        if row is None or row.expires_at <= time.time():
+            return None
+        return row.user_id
+
+    def peek(self, token: str) -> str | None:
+        params = {"token_hash": self._hash(token), "now": time.time()}
+        with self.engine.connect() as conn:
+            return conn.execute(self._peek, params).scalar()
+
+
+def purge_expired(engine: Engine, *, batch_size: int = 1000, now: float | None = None) -> int:
+    """Delete expired tokens in batches of at most ``batch_size`` rows.
+
+    Each batch is its own short transaction, so a large backlog never holds
+    the write lock (SQLite) or a long-running delete (Postgres) for long.
+    """
+    cutoff = time.time() if now is None else now
+    t, r = _tokens.c, _resets.c
+    batches = (
+        delete(_tokens).where(
+            tuple_(t.namespace, t.jti).in_(
+                select(t.namespace, t.jti).where(t.expires_at <= cutoff).limit(batch_size)
+            )
+        ),
+        delete(_resets).where(
+            r.token_hash.in_(select(r.token_hash).where(r.expires_at <= cutoff).limit(batch_size))
+        ),
+    )
+    deleted = 0
+    for stmt in batches:
+        while True:
+            with engine.begin() as conn:
+                count = conn.execute(stmt).rowcount
+            deleted += count
+            if count < batch_size:
+                break
+    return deleted
+
+
+class ExpiryPurger:
+    """Background thread running ``purge_expired`` every ``interval_seconds``."""
+
+    def __init__(self, engine: Engine, *, interval_seconds: float = 60.0, batch_size: int = 1000) -> None:
+        self.engine = engine
+        self.interval = interval_seconds
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="token-purge", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                deleted = purge_expired(self.engine, batch_size=self.batch_size)
+            except Exception as e:  # keep purging after transient DB errors
+                logger.warning("tokens.purge_failed", error=str(e))
+                continue
+            if deleted:
+                logger.info("tokens.purged", deleted=deleted)
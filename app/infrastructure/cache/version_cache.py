@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.domain.user.versions import UserVersionCache
+from app.utils.exceptions import ServiceUnavailableError
+
+
+# Tombstone for deleted users: newer than any real version, never served
+_GONE = 2**62
+
+
+class InMemoryUserVersionCache(UserVersionCache):
+    """Process-local LRU; only correct when the user repository is process-local too."""
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: int = 3600) -> None:
+        self._data: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._max = max_entries
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> int | None:
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return None
+            version, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[user_id]
+                return None
+            self._data.move_to_end(user_id)
+        return None if version == _GONE else version
+
+    def remember(self, user_id: str, version: int) -> None:
+        self.remember_many({user_id: version})
+
+    def remember_many(self, versions: dict[str, int]) -> None:
+        with self._lock:
+            now = time.monotonic()
+            for user_id, version in versions.items():
+                entry = self._data.get(user_id)
+                if entry is not None and entry[1] > now and entry[0] >= version:
+                    continue
+                self._data[user_id] = (version, now + self._ttl)
+                self._data.move_to_end(user_id)
+            while len(self._data) > self._max:
+                self._data.popitem(last=False)
+
+    def forget(self, user_id: str) -> None:
+        with self._lock:
+            self._data[user_id] = (_GONE, time.monotonic() + self._ttl)
+            self._data.move_to_end(user_id)
+
+
+# KEYS: entries; ARGV: ttl, then one version per entry
+_REMEMBER_LUA = """
+local stored = 0
+for i, key in ipairs(KEYS) do
+  local current = redis.call('GET', key)
+  if not current or tonumber(current) < tonumber(ARGV[i + 1]) then
+    redis.call('SET', key, ARGV[i + 1], 'EX', ARGV[1])
+    stored = stored + 1
+  end
+end
+return stored
+"""
+
+
+class RedisUserVersionCache(UserVersionCache):
+    """Shared across instances; set-if-newer runs as one Lua script per call."""
+
+    def __init__(
+        self, redis_client: Any, namespace: str = "users:version", ttl_seconds: int = 3600
+    ) -> None:
+        self.r = redis_client
+        self.ns = namespace
+        self._ttl = ttl_seconds
+        self._remember = redis_client.register_script(_REMEMBER_LUA)
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.ns}:{user_id}"
+
+    def get(self, user_id: str) -> int | None:
+        try:
+            value = self.r.get(self._key(user_id))
+        except ServiceUnavailableError:
+            # A miss only costs a full GET; writes (remember/forget) still fail the request
+            return None
+        if value is None:
+            return None
+        version = int(value)
+        return None if version == _GONE else version
+
+    def remember(self, user_id: str, version: int) -> None:
+        self.remember_many({user_id: version})
+
+    def remember_many(self, versions: dict[str, int]) -> None:
+        if versions:
+            keys = [self._key(user_id) for user_id in versions]
+            self._remember(keys=keys, args=[self._ttl, *versions.values()])
+
+    def forget(self, user_id: str) -> None:
+        self.r.set(self._key(user_id), _GONE, ex=self._ttl)
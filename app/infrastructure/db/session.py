@@ -1,47 +1,30 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Iterator, Sequence
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
 
-from app.core.config import get_settings
-
 
 class Base(DeclarativeBase):
     pass
 
 
-_engine = None
-_SessionLocal: sessionmaker[Session] | None = None
+def create_app_engine(url: str, echo: bool = False) -> Engine:
+    """Engine for the application database (users, change feed, tokens by default)."""
+    return create_engine(url, pool_pre_ping=True, future=True, echo=echo)
 
 
-def _ensure_engine() -> tuple[sessionmaker[Session] | None, object | None]:
-    global _engine, _SessionLocal
-    if _SessionLocal is not None:
-        return _SessionLocal, _engine
-    settings = get_settings()
-    if not settings.DATABASE_URL:
-        return None, None
-    _engine = create_engine(
-        settings.DATABASE_URL,
-        pool_pre_ping=True,
-        future=True,
-        echo=getattr(settings, "DB_ECHO", False),
-    )
-    _SessionLocal = sessionmaker(
-        bind=_engine, autoflush=False, autocommit=False, future=True
-    )
-    return _SessionLocal, _engine
+def create_session_factory(engine: Engine) -> sessionmaker[Session]:
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
 
 @contextmanager
-def get_session() -> Iterator[Session]:
-    SessionLocal, _ = _ensure_engine()
-    if SessionLocal is None:
-        raise RuntimeError("DATABASE_URL is not configured")
-    session = SessionLocal()
+def session_scope(factory: sessionmaker[Session]) -> Iterator[Session]:
+    """One unit of work: commit on success, roll back on error."""
+    session = factory()
     try:
         yield session
         session.commit()
@@ -52,10 +35,99 @@ def get_session() -> Iterator[Session]:
         session.close()
 
 
-def create_all() -> None:
-    """Create database tables if engine available."""
+class ShardSessions:
+    """One unit of work over the main database and the user shards.
+
+    Shard sessions open on first use. Commit goes shard by shard and the main
+    database (directory, change feed) last, so it is not atomic across
+    databases; ``rebalance_user_shards`` repairs what an interrupted commit leaves.
+    """
+
+    def __init__(
+        self, main: sessionmaker[Session], shards: Sequence[sessionmaker[Session]]
+    ) -> None:
+        self.main = main()
+        self._factories = list(shards)
+        self._open: dict[int, Session] = {}
+
+    @property
+    def count(self) -> int:
+        return len(self._factories)
+
+    def shard(self, index: int) -> Session:
+        session = self._open.get(index)
+        if session is None:
+            session = self._open[index] = self._factories[index]()
+        return session
+
+    def _sessions(self) -> list[Session]:
+        return [*self._open.values(), self.main]
+
+    def commit(self) -> None:
+        for session in self._sessions():
+            session.commit()
+
+    def rollback(self) -> None:
+        for session in self._sessions():
+            session.rollback()
+
+    def close(self) -> None:
+        for session in self._sessions():
+            session.close()
+
+
+@contextmanager
+def shard_session_scope(
+    main: sessionmaker[Session], shards: Sequence[sessionmaker[Session]]
+) -> Iterator[ShardSessions]:
+    sessions = ShardSessions(main, shards)
+    try:
+        yield sessions
+        sessions.commit()
+    except Exception:
+        sessions.rollback()
+        raise
+    finally:
+        sessions.close()
+
+
+def create_store_engine(url: str) -> Engine:
+    """Engine for a dedicated token-store database; SQLite files run in WAL mode.
+
+    WAL lets readers (token checks on every request) proceed while a writer
+    holds the lock, and synchronous=NORMAL fsyncs on checkpoints only.
+    """
+    engine = create_engine(url, pool_pre_ping=True, future=True)
+    if engine.dialect.name == "sqlite":
+
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, _record) -> None:  # type: ignore[no-untyped-def]
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+            cursor.close()
+
+    return engine
+
+
+def create_token_tables(engine: Engine) -> None:
+    from app.infrastructure.models.token import IssuedTokenORM, PasswordResetTokenORM
+
+    Base.metadata.create_all(
+        bind=engine, tables=[IssuedTokenORM.__table__, PasswordResetTokenORM.__table__]
+    )
+
+
+def create_shard_tables(engine: Engine) -> None:
+    from app.infrastructure.models.user import UserORM
+
+    Base.metadata.create_all(bind=engine, tables=[UserORM.__table__])
+
+
+def create_all(engine: Engine) -> None:
+    """Create the database tables on the given engine."""
+    from app.infrastructure.models import token as token_model  # noqa: F401 - ensure models are imported
     from app.infrastructure.models import user as user_model  # noqa: F401 - ensure models are imported
 
-    SessionLocal, engine = _ensure_engine()
-    if engine is not None:
-        Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from sqlalchemy import Float, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.infrastructure.db.session import Base
+
+
+class IssuedTokenORM(Base):
+    """Live access/refresh jtis; ``namespace`` separates the stores sharing the table."""
+
+    __tablename__ = "issued_tokens"
+
+    namespace: Mapped[str] = mapped_column(String(32), primary_key=True)
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Unix timestamp, same clock as the other stores; indexed for the purge job
+    expires_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+
+    __table_args__ = (Index("ix_issued_tokens_user", "namespace", "user_id"),)
+
+
+class PasswordResetTokenORM(Base):
+    """Outstanding reset tokens, keyed by SHA-256 so the table holds no usable secret."""
+
+    __tablename__ = "password_reset_tokens"
+
+    token_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    expires_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import String, Boolean, DateTime
+from sqlalchemy import BigInteger, Boolean, DateTime, Float, Index, Integer, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -16,9 +16,8 @@ class UserORM(Base):
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid4())
     )
-    email: Mapped[str] = mapped_column(
-        String(320), unique=True, index=True, nullable=False
-    )
+    # Unique case-insensitively, see uq_users_email_lower
+    email: Mapped[str] = mapped_column(String(320), nullable=False)
     full_name: Mapped[str] = mapped_column(String(256), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False, default="")
@@ -32,3 +31,43 @@ class UserORM(Base):
         onupdate=datetime.utcnow,
         nullable=False,
     )
+
+    __table_args__ = (
+        # Email lookups filter on lower(email); a plain index on email would not be used
+        Index("uq_users_email_lower", func.lower(email), unique=True),
+    )
+
+
+class UserChangeORM(Base):
+    """Transactional outbox of user changes, written with the change, read by the feed."""
+
+    __tablename__ = "user_changes"
+
+    seq: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True
+    )
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), nullable=False)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    version: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # Unix timestamp; indexed for retention and compaction
+    occurred_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_user_changes_user", "user_id", "seq"),
+        # SQLite AUTOINCREMENT: seq is never reused, even once retention empties the table
+        {"sqlite_autoincrement": True},
+    )
+
+
+class UserDirectoryORM(Base):
+    """Global index of sharded users: normalized email and current shard per user id.
+
+    Lives in the main database (next to the change feed), not on the shards.
+    """
+
+    __tablename__ = "user_directory"
+
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True)
+    # normalize_email() form, so uniqueness does not depend on each database's lower()
+    email: Mapped[str] = mapped_column(String(320), nullable=False, unique=True)
+    shard: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+if TYPE_CHECKING:
+    from app.api.container import AppContainer
+
+
+logger = structlog.get_logger()
+
+Probe = Callable[[], None]
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    ok: bool
+    latency_ms: float
+    checked_at: float  # time.monotonic()
+    error: str | None = None
+
+
+class ReadinessMonitor:
+    """Runs dependency probes on a background thread; ``/ready`` serves the cached results.
+
+    Kubelet probes every few seconds per pod would otherwise each open a DB
+    and Redis round trip. A result older than ``stale_after`` counts as failed,
+    so a probe stuck on a hung dependency still turns the pod unready.
+    """
+
+    def __init__(
+        self, probes: dict[str, Probe], *, interval_seconds: float = 5.0, stale_after: float = 15.0
+    ) -> None:
+        self.probes = probes
+        self.interval = interval_seconds
+        self.stale_after = stale_after
+        self._results: dict[str, ProbeResult] = {}
+        self._started = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="readiness-probes", daemon=True)
+
+    def run_once(self) -> None:
+        for name, probe in self.probes.items():
+            start = time.perf_counter()
+            try:
+                probe()
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            latency = (time.perf_counter() - start) * 1000
+            result = ProbeResult(error is None, round(latency, 2), time.monotonic(), error)
+            previous = self._results.get(name)
+            if previous is not None and previous.ok != result.ok:
+                logger.warning("readiness.changed", probe=name, ok=result.ok, error=error)
+            # Single dict assignment: readers never see a half-updated entry
+            self._results[name] = result
+
+    def start(self) -> None:
+        # First round inline, so the pod reports real state as soon as it serves
+        self.run_once()
+        self._started = True
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        checks: dict[str, dict[str, Any]] = {}
+        ready = self._started
+        for name in self.probes:
+            result = self._results.get(name)
+            if result is None:
+                checks[name] = {"ok": False, "error": "not checked yet"}
+                ready = False
+                continue
+            age = now - result.checked_at
+            ok = result.ok and age <= self.stale_after
+            checks[name] = {
+                "ok": ok,
+                "latency_ms": result.latency_ms,
+                "age_s": round(age, 2),
+            }
+            if result.error:
+                checks[name]["error"] = result.error
+            elif not ok:
+                checks[name]["error"] = "stale result"
+            ready = ready and ok
+        return {"status": "ready" if ready else "not_ready", "checks": checks}
+
+
+def _db_probe(engine: Engine) -> Probe:
+    def probe() -> None:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    return probe
+
+
+def _redis_probe(client: Any) -> Probe:
+    def probe() -> None:
+        client.ping()
+
+    return probe
+
+
+def build_probes(container: AppContainer) -> dict[str, Probe]:
+    """Probes for the dependencies this configuration actually uses."""
+    settings = container.settings
+    probes: dict[str, Probe] = {}
+    engine = container.engine
+    if engine is not None:
+        probes["database"] = _db_probe(engine)
+    for index, shard in enumerate(container.shard_engines):
+        probes[f"user_shard_{index}"] = _db_probe(shard)
+    if settings.TOKEN_STORE_BACKEND == "sql" and settings.TOKEN_STORE_DATABASE_URL:
+        # Resolved per run: creating the store tables must not fail startup
+        probes["token_store"] = lambda: _db_probe(container.token_store_engine)()
+    if settings.REDIS_URL:
+        probes["redis"] = _redis_probe(container.redis)
+    return probes
+
+
+def _warm_db_pool(engine: Engine, connections: int) -> int:
+    # Hold N connections at once so the pool really opens N, then return them all;
+    # never ask for more than the pool keeps, or the checkout would wait for a timeout
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        connections = min(connections, pool.size())
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+
+def _warm_redis_pool(client: Any, connections: int) -> int:
+    pool = client.connection_pool
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = pool.get_connection()
+            opened.append(conn)
+            conn.send_command("PING")
+            conn.read_response()
+    finally:
+        for conn in opened:
+            pool.release(conn)
+    return len(opened)
+
+
+def warm_up(container: AppContainer) -> dict[str, float]:
+    """Pre-open pooled connections and load the bcrypt backend before serving traffic.
+
+    Failures are logged, not raised: an unreachable dependency is reported by
+    ``/ready`` instead of crashing the worker.
+    """
+    from app.core.security import password_context
+
+    settings = container.settings
+    stats: dict[str, float] = {}
+    engine = container.engine
+    if engine is not None and settings.WARMUP_DB_CONNECTIONS > 0:
+        try:
+            stats["db_connections"] = _warm_db_pool(engine, settings.WARMUP_DB_CONNECTIONS)
+        except Exception as e:
+            logger.warning("startup.warmup_failed", target="database", error=str(e))
+    if settings.REDIS_URL and settings.WARMUP_REDIS_CONNECTIONS > 0:
+        try:
+            stats["redis_connections"] = _warm_redis_pool(
+                container.redis, settings.WARMUP_REDIS_CONNECTIONS
+            )
+        except Exception as e:
+            logger.warning("startup.warmup_failed", target="redis", error=str(e))
+    if settings.WARMUP_PASSWORD_HASH:
+        # passlib picks and self-tests the bcrypt backend on first use (several hashes)
+        start = time.perf_counter()
+        password_context(settings).hash("warm-up")
+        stats["bcrypt_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("startup.warmup", **stats)
+    return stats
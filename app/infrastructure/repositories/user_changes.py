@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from dataclasses import replace
+from typing import Iterable
+from uuid import UUID
+
+import structlog
+from sqlalchemy import bindparam, delete, exists, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import aliased
+
+from app.domain.user.changes import UserChange, UserChangeFeed
+from app.infrastructure.models.user import UserChangeORM
+from app.utils.exceptions import CursorExpiredError
+
+
+logger = structlog.get_logger()
+
+_changes = UserChangeORM.__table__
+
+
+class InMemoryUserChangeFeed(UserChangeFeed):
+    """Process-local feed, appended to by ``InMemoryUserRepository``."""
+
+    def __init__(self) -> None:
+        self._changes: list[UserChange] = []
+        self._seq = 0
+        # Highest seq dropped by retention; cursors below it have missed changes
+        self._horizon = 0
+        self._lock = threading.Lock()
+
+    def append(self, changes: Iterable[UserChange]) -> None:
+        with self._lock:
+            for change in changes:
+                self._seq += 1
+                self._changes.append(replace(change, seq=self._seq))
+
+    def read(self, since: int, limit: int) -> list[UserChange]:
+        with self._lock:
+            if since and since < self._horizon:
+                raise CursorExpiredError("cursor is older than the retained changes")
+            start = bisect.bisect_right(self._changes, since, key=lambda change: change.seq)
+            return self._changes[start : start + limit]
+
+    def head(self) -> int:
+        return self._seq
+
+    def compact(self, *, retention: float, compact_after: float, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            before = len(self._changes)
+            expired = [c.seq for c in self._changes if c.occurred_at < now - retention]
+            if expired:
+                self._horizon = max(self._horizon, max(expired))
+            kept = [c for c in self._changes if c.seq > self._horizon]
+            latest = {c.user_id: c.seq for c in kept}
+            self._changes = [
+                c for c in kept if c.occurred_at >= now - compact_after or latest[c.user_id] == c.seq
+            ]
+            return before - len(self._changes)
+
+
+class SQLUserChangeFeed(UserChangeFeed):
+    """Reads the ``user_changes`` outbox; rows are inserted by ``SQLUserRepository``.
+
+    Reads use short engine-level connections, so a waiting long-poll holds no
+    pooled connection between polls. Retention removes a prefix of the log, and
+    compaction never removes the oldest row, so ``min(seq) - 1`` is the
+    retention horizon a cursor is checked against.
+    """
+
+    def __init__(self, engine: Engine, *, batch_size: int = 1000) -> None:
+        self.engine = engine
+        self.batch_size = batch_size
+        c = _changes.c
+        self._page = (
+            select(c.seq, c.user_id, c.kind, c.version, c.occurred_at)
+            .where(c.seq > bindparam("since"))
+            .order_by(c.seq)
+            .limit(bindparam("limit"))
+        )
+        self._oldest = select(func.min(c.seq))
+        self._head = select(func.max(c.seq))
+
+    def read(self, since: int, limit: int) -> list[UserChange]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(self._page, {"since": since, "limit": limit}).all()
+            # A gap right after the cursor is either compaction/rollback (older rows
+            # remain) or retention (nothing at or below the cursor is left)
+            if since and rows and rows[0].seq > since + 1:
+                if conn.execute(self._oldest).scalar() == rows[0].seq:
+                    raise CursorExpiredError("cursor is older than the retained changes")
+        return [
+            UserChange(
+                user_id=UUID(str(row.user_id)),
+                kind=row.kind,
+                version=row.version,
+                seq=row.seq,
+                occurred_at=row.occurred_at,
+            )
+            for row in rows
+        ]
+
+    def head(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(self._head).scalar() or 0
+
+    def _delete_batches(self, stmt) -> int:  # type: ignore[no-untyped-def]
+        deleted = 0
+        while True:
+            with self.engine.begin() as conn:
+                count = conn.execute(stmt).rowcount
+            deleted += count
+            if count < self.batch_size:
+                return deleted
+
+    def compact(self, *, retention: float, compact_after: float, now: float | None = None) -> int:
+        """Drop expired and superseded rows in short batches (see ``purge_expired``)."""
+        now = time.time() if now is None else now
+        c = _changes.c
+        with self.engine.connect() as conn:
+            horizon = conn.execute(
+                select(func.max(c.seq)).where(c.occurred_at < now - retention)
+            ).scalar()
+        deleted = 0
+        if horizon is not None:
+            deleted += self._delete_batches(
+                delete(_changes).where(
+                    c.seq.in_(
+                        select(c.seq).where(c.seq <= horizon).order_by(c.seq).limit(self.batch_size)
+                    )
+                )
+            )
+        newer = aliased(_changes)
+        superseded = (
+            select(c.seq)
+            .where(
+                c.occurred_at < now - compact_after,
+                c.seq > select(func.min(newer.c.seq)).scalar_subquery(),
+                exists().where(newer.c.user_id == c.user_id, newer.c.seq > c.seq),
+            )
+            .limit(self.batch_size)
+        )
+        deleted += self._delete_batches(delete(_changes).where(c.seq.in_(superseded)))
+        return deleted
+
+
+class ChangeCompactor:
+    """Background thread running ``feed.compact`` every ``interval_seconds``."""
+
+    def __init__(
+        self,
+        feed: UserChangeFeed,
+        *,
+        interval_seconds: float = 300.0,
+        retention: float = 7 * 86400,
+        compact_after: float = 3600.0,
+    ) -> None:
+        self.feed = feed
+        self.interval = interval_seconds
+        self.retention = retention
+        self.compact_after = compact_after
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="user-changes-compact", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                deleted = self.feed.compact(retention=self.retention, compact_after=self.compact_after)
+            except Exception as e:  # keep compacting after transient DB errors
+                logger.warning("user_changes.compact_failed", error=str(e))
+                continue
+            if deleted:
+                logger.info("user_changes.compacted", deleted=deleted)
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
 from dataclasses import replace
-from typing import Dict
+from datetime import datetime
+from typing import Dict, Iterable, Sequence
 from uuid import UUID
 
-from app.domain.user.models import User
+from app.domain.user.changes import UserChange
+from app.domain.user.models import User, normalize_email
 from app.domain.user.repositories import UserRepository
+from app.infrastructure.repositories.user_changes import InMemoryUserChangeFeed
 
 
 class InMemoryUserRepository(UserRepository):
-    def __init__(self) -> None:
+    def __init__(self, changes: InMemoryUserChangeFeed | None = None) -> None:
         self._store: Dict[UUID, User] = {}
+        self.changes = changes if changes is not None else InMemoryUserChangeFeed()
 
     def add(self, user: User) -> User:
         self._store[user.id] = replace(user)
@@ -21,16 +25,28 @@ class InMemoryUserRepository(UserRepository):
         return replace(u) if u else None
 
     def get_by_email(self, email: str) -> User | None:
+        wanted = normalize_email(email)
         for u in self._store.values():
-            if u.email == email:
+            if normalize_email(u.email) == wanted:
                 return replace(u)
         return None
 
     def update(self, user: User) -> User:
         if user.id not in self._store:
             raise KeyError("user not found")
-        self._store[user.id] = replace(user)
+        # Same as the SQL repository: every update bumps updated_at (ETags rely on it)
+        self._store[user.id] = replace(user, updated_at=datetime.utcnow())
         return replace(self._store[user.id])
 
     def delete(self, user_id: UUID) -> None:
         self._store.pop(user_id, None)
+
+    def record_changes(self, changes: Sequence[UserChange]) -> None:
+        self.changes.append(changes)
+
+    def get_many(self, user_ids: Iterable[UUID]) -> list[User]:
+        return [replace(self._store[i]) for i in set(user_ids) if i in self._store]
+
+    def emails_in_use(self, emails: Iterable[str]) -> set[str]:
+        wanted = {normalize_email(email) for email in emails}
+        return {normalize_email(u.email) for u in self._store.values()} & wanted
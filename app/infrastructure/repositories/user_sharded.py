@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Sequence
+from uuid import UUID
+
+import structlog
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.domain.user.changes import UserChange
+from app.domain.user.models import User, normalize_email
+from app.domain.user.repositories import UserRepository
+from app.infrastructure.db.session import ShardSessions, session_scope
+from app.infrastructure.models.user import UserDirectoryORM, UserORM
+from app.infrastructure.repositories.user_sqlalchemy import SQLUserRepository
+
+
+logger = structlog.get_logger()
+
+_MASK64 = (1 << 64) - 1
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping & Veach) of a 64-bit key into ``buckets``.
+
+    Going from n to n + 1 buckets moves only ~1/(n + 1) of the keys, all of
+    them into the new bucket, so shards are only ever appended.
+    """
+    key &= _MASK64
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & _MASK64
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_for(user_id: UUID, shards: int) -> int:
+    return jump_hash(user_id.int ^ (user_id.int >> 64), shards)
+
+
+class ShardedUserRepository(UserRepository):
+    """Users spread over several databases by a jump hash of ``User.id``.
+
+    Every shard holds a plain ``users`` table. ``user_directory`` in the main
+    database maps each user id to its normalized email and current shard: it
+    enforces email uniqueness across shards and answers ``get_by_email`` with
+    one lookup. Reads by id go to the hashed shard and fall back to the
+    directory, so users stay reachable while ``rebalance_user_shards`` moves
+    them after a shard is appended. The change feed goes to the main database.
+    """
+
+    def __init__(self, sessions: ShardSessions) -> None:
+        self.sessions = sessions
+        self._main = SQLUserRepository(sessions.main)
+
+    def _shard(self, index: int) -> SQLUserRepository:
+        return SQLUserRepository(self.sessions.shard(index))
+
+    def _home(self, user_id: UUID) -> int:
+        return shard_for(user_id, self.sessions.count)
+
+    def _entry(self, user: User) -> dict[str, Any]:
+        return {
+            "user_id": str(user.id),
+            "email": normalize_email(user.email),
+            "shard": self._home(user.id),
+        }
+
+    def _directory_shards(self, user_ids: Iterable[UUID]) -> dict[UUID, int]:
+        ids = [str(user_id) for user_id in user_ids]
+        if not ids:
+            return {}
+        stmt = select(UserDirectoryORM.user_id, UserDirectoryORM.shard).where(
+            UserDirectoryORM.user_id.in_(ids)
+        )
+        return {
+            UUID(str(row.user_id)): row.shard
+            for row in self.sessions.main.execute(stmt)
+            if row.shard < self.sessions.count
+        }
+
+    def _locate(self, user_id: UUID, *, for_update: bool = False) -> tuple[int, User] | None:
+        def read(index: int) -> User | None:
+            repo = self._shard(index)
+            return repo.get_for_update(user_id) if for_update else repo.get(user_id)
+
+        home = self._home(user_id)
+        user = read(home)
+        if user is not None:
+            return home, user
+        shard = self._directory_shards([user_id]).get(user_id)
+        if shard is None or shard == home:
+            return None
+        user = read(shard)
+        if user is not None:
+            return shard, user
+        # Moved home between the two reads
+        user = read(home)
+        return (home, user) if user is not None else None
+
+    def _fetch_many(self, user_ids: set[UUID]) -> list[tuple[int, User]]:
+        by_shard: dict[int, list[UUID]] = {}
+        for user_id in user_ids:
+            by_shard.setdefault(self._home(user_id), []).append(user_id)
+        found = [
+            (index, user)
+            for index, ids in by_shard.items()
+            for user in self._shard(index).get_many(ids)
+        ]
+        missing = user_ids - {user.id for _index, user in found}
+        elsewhere: dict[int, list[UUID]] = {}
+        for user_id, index in self._directory_shards(missing).items():
+            if index != self._home(user_id):
+                elsewhere.setdefault(index, []).append(user_id)
+        found += [
+            (index, user)
+            for index, ids in elsewhere.items()
+            for user in self._shard(index).get_many(ids)
+        ]
+        return found
+
+    def add(self, user: User) -> User:
+        # The directory row claims the email across all shards, so it goes first
+        self.sessions.main.execute(insert(UserDirectoryORM).values(**self._entry(user)))
+        return self._shard(self._home(user.id)).add(user)
+
+    def get(self, user_id: UUID) -> Optional[User]:
+        found = self._locate(user_id)
+        return found[1] if found else None
+
+    def get_for_update(self, user_id: UUID) -> Optional[User]:
+        found = self._locate(user_id, for_update=True)
+        return found[1] if found else None
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        stmt = select(UserDirectoryORM.user_id).where(
+            UserDirectoryORM.email == normalize_email(email)
+        )
+        user_id = self.sessions.main.scalar(stmt)
+        return self.get(UUID(str(user_id))) if user_id is not None else None
+
+    def update(self, user: User) -> User:
+        found = self._locate(user.id, for_update=True)
+        if found is None:
+            raise KeyError("user not found")
+        self.sessions.main.execute(
+            update(UserDirectoryORM)
+            .where(UserDirectoryORM.user_id == str(user.id))
+            .values(email=normalize_email(user.email))
+        )
+        return self._shard(found[0]).update(user)
+
+    def delete(self, user_id: UUID) -> None:
+        # A user being moved has a row on both shards
+        shards = {self._home(user_id), *self._directory_shards([user_id]).values()}
+        for index in shards:
+            self._shard(index).delete(user_id)
+        self.sessions.main.execute(
+            delete(UserDirectoryORM).where(UserDirectoryORM.user_id == str(user_id))
+        )
+
+    def record_changes(self, changes: Sequence[UserChange]) -> None:
+        self._main.record_changes(changes)
+
+    def get_many(self, user_ids: Iterable[UUID]) -> list[User]:
+        return [user for _index, user in self._fetch_many(set(user_ids))]
+
+    def emails_in_use(self, emails: Iterable[str]) -> set[str]:
+        wanted = {normalize_email(email) for email in emails}
+        if not wanted:
+            return set()
+        stmt = select(UserDirectoryORM.email).where(UserDirectoryORM.email.in_(wanted))
+        return set(self.sessions.main.scalars(stmt))
+
+    def add_many(self, users: Sequence[User]) -> list[User]:
+        if not users:
+            return []
+        self.sessions.main.execute(insert(UserDirectoryORM), [self._entry(user) for user in users])
+        by_shard: dict[int, list[User]] = {}
+        for user in users:
+            by_shard.setdefault(self._home(user.id), []).append(user)
+        for index, group in by_shard.items():
+            self._shard(index).add_many(group)
+        return list(users)
+
+    def update_many(self, users: Sequence[User]) -> list[User]:
+        if not users:
+            return []
+        located = {user.id: index for index, user in self._fetch_many({user.id for user in users})}
+        by_shard: dict[int, list[User]] = {}
+        for user in users:
+            by_shard.setdefault(located.get(user.id, self._home(user.id)), []).append(user)
+        self.sessions.main.execute(
+            update(UserDirectoryORM),
+            [{"user_id": str(user.id), "email": normalize_email(user.email)} for user in users],
+        )
+        updated = {
+            user.id: user
+            for index, group in by_shard.items()
+            for user in self._shard(index).update_many(group)
+        }
+        return [updated[user.id] for user in users]
+
+
+@dataclass
+class RebalanceReport:
+    scanned: int = 0
+    moved: int = 0
+    repaired: int = 0  # directory rows created or corrected for users that stayed
+
+
+def _row(orm: UserORM) -> dict[str, Any]:
+    return {column.key: getattr(orm, column.key) for column in UserORM.__table__.columns}
+
+
+def rebalance_user_shards(
+    main: sessionmaker[Session],
+    shards: Sequence[sessionmaker[Session]],
+    *,
+    batch_size: int = 500,
+    dry_run: bool = False,
+) -> RebalanceReport:
+    """Move every user to its hashed shard and bring the directory in line.
+
+    Run after appending shards to ``USER_SHARD_URLS``, or to repair after an
+    interrupted commit. Per batch the source rows stay locked (``FOR UPDATE``
+    where supported) while users are copied to their new shard, the directory
+    is pointed there, and only then are the source rows deleted. A crash at any
+    step leaves every user readable, and a re-run completes the move.
+    """
+    report = RebalanceReport()
+    for index, factory in enumerate(shards):
+        after: str | None = None
+        while True:
+            stmt = select(UserORM).order_by(UserORM.id).limit(batch_size)
+            if after is not None:
+                stmt = stmt.where(UserORM.id > after)
+            if not dry_run:
+                stmt = stmt.with_for_update()
+            with session_scope(factory) as source:
+                rows = source.scalars(stmt).all()
+                if not rows:
+                    break
+                after = str(rows[-1].id)
+                report.scanned += len(rows)
+                _rebalance_batch(main, shards, index, source, rows, report, dry_run)
+    logger.info("users.rebalanced", shards=len(shards), dry_run=dry_run, **vars(report))
+    return report
+
+
+def _rebalance_batch(
+    main: sessionmaker[Session],
+    shards: Sequence[sessionmaker[Session]],
+    index: int,
+    source: Session,
+    rows: Sequence[UserORM],
+    report: RebalanceReport,
+    dry_run: bool,
+) -> None:
+    current = {str(orm.id): _row(orm) for orm in rows}
+    moving: dict[int, list[str]] = {}
+    for user_id in current:
+        target = shard_for(UUID(user_id), len(shards))
+        if target != index:
+            moving.setdefault(target, []).append(user_id)
+    report.moved += sum(map(len, moving.values()))
+
+    # 1. Copy to the new shard; a copy already there (earlier run) is newer, keep it
+    for target, ids in moving.items():
+        with session_scope(shards[target]) as dest:
+            present = {
+                str(orm.id): _row(orm)
+                for orm in dest.scalars(select(UserORM).where(UserORM.id.in_(ids)))
+            }
+            missing = [current[user_id] for user_id in ids if user_id not in present]
+            if missing and not dry_run:
+                dest.execute(insert(UserORM), missing)
+            current.update(present)
+
+    # 2. Point the directory at the shard each user lives on now
+    homes = {user_id: shard_for(UUID(user_id), len(shards)) for user_id in current}
+    with session_scope(main) as directory:
+        entries = {
+            str(entry.user_id): entry
+            for entry in directory.scalars(
+                select(UserDirectoryORM).where(UserDirectoryORM.user_id.in_(list(current)))
+            )
+        }
+        for user_id, row in current.items():
+            wanted = {"email": normalize_email(row["email"]), "shard": homes[user_id]}
+            entry = entries.get(user_id)
+            if entry is not None and (entry.email, entry.shard) == tuple(wanted.values()):
+                continue
+            if homes[user_id] == index:
+                report.repaired += 1
+            if dry_run:
+                continue
+            if entry is None:
+                directory.add(UserDirectoryORM(user_id=user_id, **wanted))
+            else:
+                entry.email, entry.shard = wanted["email"], wanted["shard"]
+
+    # 3. Only now drop the old copies (committed with the source batch)
+    moved_ids = [user_id for ids in moving.values() for user_id in ids]
+    if moved_ids and not dry_run:
+        source.execute(delete(UserORM).where(UserORM.id.in_(moved_ids)))
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy import select, delete
+from sqlalchemy import any_, bindparam, func, select, delete, insert, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.orm import Session
 
-from app.domain.user.models import User, Role
+from app.domain.user.changes import UserChange
+from app.domain.user.models import User, Role, normalize_email
 from app.domain.user.repositories import UserRepository
-from app.infrastructure.models.user import UserORM
+from app.infrastructure.models.user import UserChangeORM, UserORM
+
+
+# pg_advisory_xact_lock key serializing change feed appends ("user_ch" in ASCII)
+_CHANGES_LOCK_KEY = 0x757365725F6368
 
 
 class SQLUserRepository(UserRepository):
@@ -28,17 +35,20 @@ class SQLUserRepository(UserRepository):
             role=Role(orm.role) if getattr(orm, "role", None) else Role.USER,
         )
 
+    def _to_row(self, user: User) -> dict[str, object]:
+        return {
+            "id": str(user.id),
+            "email": user.email,
+            "full_name": user.full_name,
+            "is_active": user.is_active,
+            "password_hash": getattr(user, "password_hash", ""),
+            "role": user.role.value,
+            "created_at": user.created_at,
+            "updated_at": user.updated_at,
+        }
+
     def _to_orm(self, user: User) -> UserORM:
-        return UserORM(
-            id=str(user.id),
-            email=user.email,
-            full_name=user.full_name,
-            is_active=user.is_active,
-            password_hash=getattr(user, "password_hash", ""),
-            role=user.role.value,
-            created_at=user.created_at,
-            updated_at=user.updated_at,
-        )
+        return UserORM(**self._to_row(user))
 
     def add(self, user: User) -> User:
         orm = self._to_orm(user)
@@ -52,8 +62,15 @@ class SQLUserRepository(UserRepository):
         orm = self.session.scalar(stmt)
         return self._to_domain(orm) if orm else None
 
+    def get_for_update(self, user_id: UUID) -> Optional[User]:
+        stmt = select(UserORM).where(UserORM.id == str(user_id)).with_for_update()
+        orm = self.session.scalar(stmt)
+        return self._to_domain(orm) if orm else None
+
     def get_by_email(self, email: str) -> Optional[User]:
-        stmt = select(UserORM).where(UserORM.email == email)
+        # lower(email) is the unique index's expression, so this stays an index lookup;
+        # lowering the parameter in SQL too keeps both sides on the database's rules
+        stmt = select(UserORM).where(func.lower(UserORM.email) == func.lower(email.strip()))
         orm = self.session.scalar(stmt)
         return self._to_domain(orm) if orm else None
 
@@ -77,3 +94,61 @@ class SQLUserRepository(UserRepository):
     def delete(self, user_id: UUID) -> None:
         stmt = delete(UserORM).where(UserORM.id == str(user_id))
         self.session.execute(stmt)
+
+    def record_changes(self, changes: Sequence[UserChange]) -> None:
+        if not changes:
+            return
+        if self.session.get_bind().dialect.name == "postgresql":
+            # Held until commit, so seq order is commit order: otherwise a reader could
+            # move its cursor past a seq whose transaction has not committed yet
+            self.session.execute(select(func.pg_advisory_xact_lock(_CHANGES_LOCK_KEY)))
+        rows = [
+            {
+                "user_id": str(change.user_id),
+                "kind": change.kind,
+                "version": change.version,
+                "occurred_at": change.occurred_at,
+            }
+            for change in changes
+        ]
+        self.session.execute(insert(UserChangeORM), rows)
+
+    def get_many(self, user_ids: Iterable[UUID]) -> list[User]:
+        ids = list({str(user_id) for user_id in user_ids})
+        if not ids:
+            return []
+        if self.session.get_bind().dialect.name == "postgresql":
+            # One array parameter: the SQL text is the same for any number of ids,
+            # so the server-side prepared statement is reused (IN expands per length)
+            ids_param = bindparam("ids", ids, type_=ARRAY(PG_UUID(as_uuid=False)))
+            stmt = select(UserORM).where(UserORM.id == any_(ids_param))
+        else:
+            stmt = select(UserORM).where(UserORM.id.in_(ids))
+        return [self._to_domain(orm) for orm in self.session.scalars(stmt)]
+
+    def emails_in_use(self, emails: Iterable[str]) -> set[str]:
+        wanted = list({email.strip() for email in emails})
+        if not wanted:
+            return set()
+        stmt = select(UserORM.email).where(
+            func.lower(UserORM.email).in_([func.lower(email) for email in wanted])
+        )
+        return {normalize_email(email) for email in self.session.scalars(stmt)}
+
+    def add_many(self, users: Sequence[User]) -> list[User]:
+        # One executemany INSERT (multi-row VALUES batches), no per-row flush/refresh
+        if users:
+            self.session.execute(insert(UserORM), [self._to_row(user) for user in users])
+        return list(users)
+
+    def update_many(self, users: Sequence[User]) -> list[User]:
+        # ORM bulk UPDATE by primary key: a single executemany of UPDATE ... WHERE id = ?
+        if not users:
+            return []
+        now = datetime.utcnow()
+        updated = [replace(user, updated_at=now) for user in users]
+        rows = [self._to_row(user) for user in updated]
+        for row in rows:
+            del row["created_at"]
+        self.session.execute(update(UserORM), rows)
+        return updated
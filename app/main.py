@@ -1,29 +1,100 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from anyio import to_thread
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.responses import JSONResponse
 
-from app.core.config import get_settings
-from app.core.logging import setup_logging
-from app.core.i18n import set_language, _
+from app.core.config import Settings, get_settings, validate_settings
+from app.core.security import get_password_admission, public_jwks
+from app.core.logging import get_log_pipeline, setup_logging
+from app.core.i18n import load_translations, _
+from app.domain.user.models import Role
 from app.api.v1.routers.users import router as users_router
 from app.api.v1.routers.auth import router as auth_router
-from app.infrastructure.db.session import create_all
+from app.api.middleware import LocaleMiddleware, install_traffic_capture
+from app.api.container import AppContainer
+from app.api.dependencies import require_token_roles
+from app.api.responses import FastJSONResponse
+from app.infrastructure.cache.token_store_sql import ExpiryPurger
+from app.infrastructure.repositories.user_changes import ChangeCompactor
+from app.infrastructure.readiness import ReadinessMonitor, build_probes, warm_up
+
 
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """Build an application with its own ``AppContainer`` (``app.state.container``).
 
-def create_app() -> FastAPI:
-    settings = get_settings()
-    setup_logging(env=settings.ENV)
-    set_language(settings.LANG)
+    Apps created in one process share no stores, engines or connection pools,
+    and requests (limits, token signing, password cost) use the app's
+    ``settings``, which default to the environment (``get_settings()``).
+    """
+    # Settings passed in directly get the same checks as the environment's
+    settings = validate_settings(settings) if settings is not None else get_settings()
+    container = AppContainer(settings)
+    setup_logging(
+        env=settings.ENV,
+        level=settings.LOG_LEVEL,
+        queue_size=settings.LOG_QUEUE_SIZE,
+        batch_size=settings.LOG_BATCH_SIZE,
+        overflow=settings.LOG_OVERFLOW,
+        sample_rates=settings.LOG_SAMPLE_RATES,
+    )
+    load_translations(settings.LANGUAGES, default=settings.LANG)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        await to_thread.run_sync(container.startup)
+        # Pay cold-start costs (pool connects, bcrypt backend) before taking traffic
+        await to_thread.run_sync(warm_up, container)
+        readiness = ReadinessMonitor(
+            build_probes(container),
+            interval_seconds=settings.READINESS_PROBE_INTERVAL_SEC,
+            stale_after=settings.READINESS_STALE_AFTER_SEC,
+        )
+        await to_thread.run_sync(readiness.start)
+        app.state.readiness = readiness
+        # SQL token stores filter expired rows on read; the purger only reclaims space
+        purger = None
+        if settings.TOKEN_STORE_BACKEND == "sql":
+            purger = ExpiryPurger(
+                container.token_store_engine,
+                interval_seconds=settings.TOKEN_PURGE_INTERVAL_SEC,
+                batch_size=settings.TOKEN_PURGE_BATCH_SIZE,
+            )
+            purger.start()
+        # Bounded change feed: superseded events are collapsed, old ones dropped
+        compactor = ChangeCompactor(
+            container.user_change_feed(),
+            interval_seconds=settings.USER_CHANGES_COMPACT_INTERVAL_SEC,
+            retention=settings.USER_CHANGES_RETENTION_SEC,
+            compact_after=settings.USER_CHANGES_COMPACT_AFTER_SEC,
+        )
+        compactor.start()
+        try:
+            yield
+        finally:
+            readiness.stop()
+            compactor.stop()
+            if purger is not None:
+                purger.stop()
+            await to_thread.run_sync(container.shutdown)
 
     app = FastAPI(
+        lifespan=lifespan,
         title=settings.APP_NAME,
         version=settings.VERSION,
         docs_url="/docs" if settings.ENABLE_DOCS else None,
         redoc_url=None,
         servers=[{"url": settings.API_PREFIX}],
+        default_response_class=(
+            FastJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse
+        ),
     )
 
-    # Initialize DB (if configured)
-    create_all()
+    # Parse signing keys up front so a bad JWT_KEYS_DIR fails at startup, not on first login
+    public_jwks(settings)
+
+    app.state.container = container
 
     # Routers
     app.include_router(users_router, prefix=f"{settings.API_PREFIX}/v1", tags=["users"])
@@ -38,10 +109,48 @@ def create_app() -> FastAPI:
                 return JSONResponse({"detail": _("HTTPS required")}, status_code=403)
             return await call_next(request)
 
-    @app.get("/health", tags=["meta"])  # simple healthcheck
+    # Per-request language from Accept-Language (outermost, so every response is localized)
+    app.add_middleware(LocaleMiddleware)
+
+    # Anonymized traffic capture for deterministic replay (app/cli/replay.py)
+    if settings.TRAFFIC_CAPTURE_PATH:
+        app.state.traffic_capture = install_traffic_capture(
+            app, settings.TRAFFIC_CAPTURE_PATH, settings.TRAFFIC_CAPTURE_SAMPLE_RATE
+        )
+
+    @app.get("/health", tags=["meta"])  # liveness: the process serves requests
     def health() -> dict[str, str]:
         return {"status": "ok"}
 
+    @app.get("/ready", tags=["meta"])  # readiness: cached DB/Redis probe results
+    def ready(request: Request) -> JSONResponse:
+        readiness: ReadinessMonitor | None = getattr(request.app.state, "readiness", None)
+        if readiness is None:
+            body: dict[str, Any] = {"status": "starting", "checks": {}}
+        else:
+            body = readiness.snapshot()
+        return JSONResponse(
+            body,
+            status_code=200 if body["status"] == "ready" else 503,
+            headers={"Cache-Control": "no-store"},
+        )
+
+    # In-process counters (JSON); they reveal load and backend URLs, so admins only
+    @app.get("/metrics", tags=["meta"], dependencies=[Depends(require_token_roles(Role.ADMIN))])
+    def metrics(request: Request) -> dict[str, dict[str, Any]]:
+        counters = {"password_admission": get_password_admission().stats()}
+        pipeline = get_log_pipeline()
+        if pipeline is not None:
+            counters["logging"] = pipeline.stats()
+        for name, stats in request.app.state.container.breaker_stats().items():
+            counters[f"circuit_breaker:{name}"] = stats
+        return counters
+
+    @app.get("/.well-known/jwks.json", tags=["meta"])  # public keys for local verification
+    def jwks(response: Response) -> dict[str, list[dict[str, str]]]:
+        response.headers["Cache-Control"] = f"public, max-age={settings.JWKS_CACHE_MAX_AGE_SEC}"
+        return public_jwks(settings)
+
     @app.get("/")
     def root() -> dict[str, str]:
         return {"message": f"{settings.APP_NAME} is running"}
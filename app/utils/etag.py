@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping
+from uuid import UUID
+
+
+def updated_version(updated_at: datetime) -> int:
+    """``updated_at`` as integer microseconds since the epoch (naive values are UTC)."""
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    delta = updated_at - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def version_datetime(version: int) -> datetime:
+    return datetime.fromtimestamp(version // 1_000_000, tz=timezone.utc)
+
+
+def user_etag(user_id: UUID | str, version: int) -> str:
+    """Strong ETag of a user representation: changes whenever ``updated_at`` does."""
+    digest = hashlib.blake2b(f"{user_id}:{version}".encode("ascii"), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def etag_matches(header: str, etag: str, *, weak: bool) -> bool:
+    """Whether an If-Match/If-None-Match list matches ``etag``.
+
+    If-None-Match uses the weak comparison (``W/`` prefixes ignored), If-Match
+    the strong one (weak validators never match), per RFC 9110 section 13.1.
+    """
+    header = header.strip()
+    if header == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            if not weak:
+                continue
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, last_modified: datetime) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no If-None-Match is sent."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag, weak=True)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have second resolution
+        return last_modified.replace(microsecond=0) <= since
+    return False
@@ -1,5 +1,7 @@
 from fastapi import HTTPException, status
 
+from app.core.i18n import _
+
 
 class AppError(Exception):
     pass
@@ -9,7 +11,37 @@ class NotFoundError(AppError):
     pass
 
 
+class PreconditionFailedError(AppError):
+    """A conditional request's If-Match did not match the current representation."""
+
+
+class CursorExpiredError(AppError):
+    """A change feed cursor points before the retained events; the consumer must resync."""
+
+
+class ServiceUnavailableError(AppError):
+    """Temporary inability to serve the request; clients should retry later."""
+
+    def __init__(self, message: str = "service unavailable", retry_after: int = 1) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class OverloadedError(ServiceUnavailableError):
+    """Work was shed by admission control instead of queueing without bound."""
+
+
 def to_http(e: Exception) -> HTTPException:
+    if isinstance(e, ServiceUnavailableError):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=_(str(e)),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    if isinstance(e, PreconditionFailedError):
+        return HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    if isinstance(e, CursorExpiredError):
+        return HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
     if isinstance(e, NotFoundError):
         return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,51 @@
+"""Read-DTO construction from a domain User: model_validate vs the trusted factory.
+
+Run: uv run python -m benchmarks.dto [--number 50000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+import uuid
+from datetime import datetime, timezone
+
+from app.domain.user.models import Role, User
+from app.domain.user.schemas import UserReadDTO
+
+
+def run(number: int) -> dict[str, float]:
+    now = datetime.now(timezone.utc)
+    user = User(
+        id=uuid.uuid4(),
+        email="bench.user@example.com",
+        full_name="Bench User",
+        password_hash="$2b$12$" + "a" * 53,
+        role=Role.USER,
+        created_at=now,
+        updated_at=now,
+    )
+    results = {}
+    for name, fn in (
+        ("model_validate", lambda: UserReadDTO.model_validate(user)),
+        ("from_domain", lambda: UserReadDTO.from_domain(user)),
+    ):
+        best = min(timeit.repeat(fn, number=number, repeat=3))
+        results[name] = number / best
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=50000, help="Constructions per timing")
+    args = parser.parse_args(argv)
+    results = run(args.number)
+    base = results["model_validate"]
+    print(f"{'path':<16} {'ops/s':>12} {'us/op':>8} {'gain':>7}")
+    for name, ops in results.items():
+        print(f"{name:<16} {ops:>12,.0f} {1e6 / ops:>8.2f} {ops / base:>6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+"""Throughput of /auth/me and admin user CRUD with and without the fast JSON path.
+
+Runs the app in-process (httpx ASGITransport, in-memory repositories) once with
+FAST_JSON_RESPONSES=false and once with it enabled, plus a micro-benchmark of
+the serialization step alone.
+
+Run: uv run python -m benchmarks.responses [--requests 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.api.responses import FastJSONResponse
+from app.core.config import get_settings
+from app.domain.user.models import Role
+from app.domain.user.schemas import UserReadDTO
+
+
+async def _throughput(fast: bool, requests: int) -> dict[str, float]:
+    os.environ["FAST_JSON_RESPONSES"] = "true" if fast else "false"
+    os.environ["LOGIN_THROTTLE_ENABLED"] = "false"
+    os.environ["LOG_LEVEL"] = "WARNING"  # per-request log lines would dominate the timings
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    from app.cli.loadtest import _bootstrap_inprocess_admin
+    from app.main import create_app
+
+    app = create_app()
+    prefix = f"{get_settings().API_PREFIX}/v1"
+    email, password = _bootstrap_inprocess_admin()
+    transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        r = await client.post(
+            f"{prefix}/auth/login", data={"username": email, "password": password}
+        )
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        r = await client.post(
+            f"{prefix}/users",
+            json={"email": f"bench-{uuid.uuid4().hex[:8]}@example.com", "full_name": "Bench"},
+            headers=headers,
+        )
+        user_id = r.json()["id"]
+
+        async def me() -> None:
+            await client.get(f"{prefix}/auth/me", headers=headers)
+
+        async def read() -> None:
+            await client.get(f"{prefix}/users/{user_id}", headers=headers)
+
+        async def update() -> None:
+            await client.patch(
+                f"{prefix}/users/{user_id}", json={"full_name": "Bench User"}, headers=headers
+            )
+
+        results: dict[str, float] = {}
+        for name, call in (("GET /auth/me", me), ("GET /users/{id}", read), ("PATCH /users/{id}", update)):
+            for _ in range(min(100, requests)):  # warm-up
+                await call()
+            started = time.perf_counter()
+            for _ in range(requests):
+                await call()
+            results[name] = requests / (time.perf_counter() - started)
+    return results
+
+
+async def _serialization(number: int) -> dict[str, float]:
+    now = datetime.now(timezone.utc)
+    dto = UserReadDTO(
+        id=uuid.uuid4(),
+        email="bench@example.com",
+        full_name="Bench User",
+        is_active=True,
+        role=Role.USER,
+        created_at=now,
+        updated_at=now,
+    )
+    field = create_model_field(name="Response_bench", type_=UserReadDTO, mode="serialization")
+
+    started = time.perf_counter()
+    for _ in range(number):
+        # What FastAPI does for a route returning a model with response_model set
+        content = await serialize_response(field=field, response_content=dto)
+        JSONResponse(content)
+    default = number / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(number):
+        FastJSONResponse(dto)
+    fast = number / (time.perf_counter() - started)
+    return {"response_model + json": default, "dto_response": fast}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint")
+    parser.add_argument("--number", type=int, default=20000, help="Serializations per timing")
+    args = parser.parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    baseline = asyncio.run(_throughput(False, args.requests))
+    fast = asyncio.run(_throughput(True, args.requests))
+    print(f"{'endpoint':<20} {'default req/s':>14} {'fast req/s':>11} {'gain':>7}")
+    for name, base in baseline.items():
+        print(f"{name:<20} {base:>14,.0f} {fast[name]:>11,.0f} {fast[name] / base:>6.2f}x")
+
+    ser = asyncio.run(_serialization(args.number))
+    base, fast_ops = ser["response_model + json"], ser["dto_response"]
+    print()
+    print(f"{'serialization':<20} {'ops/s':>14}")
+    print(f"{'response_model+json':<20} {base:>14,.0f}")
+    print(f"{'dto_response':<20} {fast_ops:>14,.0f} {fast_ops / base:>6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,87 @@
+"""Micro-benchmark of the JWT codecs (encode and decode of an access token).
+
+Run: uv run python -m benchmarks.token_codec [--number 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+from app.core.config import Settings
+from app.core.keys import generate_private_key, private_key_pem
+from app.core.token_codec import FastTokenCodec, JoseTokenCodec, TokenCodec
+
+
+def _claims() -> dict[str, object]:
+    now = int(time.time())
+    return {
+        "sub": "5f0c6d1e-8a39-4bb8-9d5e-2f4f3b8f7c11",
+        "type": "access",
+        "jti": "0b8e1f1c-3c39-4c1e-8b6a-7d0f9a6f2e44",
+        "iat": now,
+        "nbf": now,
+        "exp": now + 900,
+        "iss": "fastapi_app",
+        "aud": "fastapi_clients",
+        "role": "user",
+    }
+
+
+def _ops_per_sec(fn, number: int) -> float:
+    best = min(timeit.repeat(fn, number=number, repeat=3))
+    return number / best
+
+
+def run(number: int) -> list[tuple[str, str, str, float]]:
+    results: list[tuple[str, str, str, float]] = []
+    with tempfile.TemporaryDirectory() as keys_dir:
+        for alg in ("HS256", "ES256", "EdDSA"):
+            if alg != "HS256":
+                for old in Path(keys_dir).glob("*.pem"):
+                    old.unlink()
+                (Path(keys_dir) / f"{alg}.pem").write_bytes(
+                    private_key_pem(generate_private_key(alg))
+                )
+            settings = Settings(
+                SECRET_KEY="benchmark-secret-benchmark-secret",
+                JWT_ALGORITHM=alg,
+                JWT_KEYS_DIR=keys_dir,
+                JWT_ACTIVE_KID=None if alg == "HS256" else alg,
+            )
+            codecs: list[tuple[str, TokenCodec]] = [("fast", FastTokenCodec(settings))]
+            if alg != "EdDSA":
+                codecs.insert(0, ("jose", JoseTokenCodec(settings)))
+            claims = _claims()
+            # Asymmetric signing is far slower; scale iterations to keep runtime sane
+            n = number if alg == "HS256" else max(1, number // 10)
+            for name, codec in codecs:
+                token = codec.encode(claims)
+                results.append((alg, name, "encode", _ops_per_sec(lambda: codec.encode(claims), n)))
+                results.append((alg, name, "decode", _ops_per_sec(lambda: codec.decode(token), n)))
+    return results
+
+
+def format_results(results: list[tuple[str, str, str, float]]) -> str:
+    baseline = {(alg, op): ops for alg, name, op, ops in results if name == "jose"}
+    lines = [f"{'alg':<6} {'codec':<5} {'op':<7} {'ops/s':>12} {'vs jose':>8}"]
+    for alg, name, op, ops in results:
+        base = baseline.get((alg, op))
+        ratio = f"{ops / base:.2f}x" if base else "-"
+        lines.append(f"{alg:<6} {name:<5} {op:<7} {ops:>12,.0f} {ratio:>8}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="Iterations per HS256 timing")
+    args = parser.parse_args(argv)
+    print(format_results(run(args.number)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+"""Token store operations per backend: memory, shared memory, SQLite (WAL), Redis, Postgres.
+
+Redis and Postgres are measured only when their URLs are given.
+
+Run: uv run python -m benchmarks.token_stores [--tokens 20000] [--number 100000]
+         [--redis-url redis://localhost:6379/15] [--database-url postgresql+psycopg://...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import tempfile
+import timeit
+import uuid
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import delete
+
+from app.infrastructure.cache.token_store import (
+    InMemoryTokenStore,
+    RedisTokenStore,
+    SharedMemoryTokenStore,
+    TokenStore,
+)
+from app.infrastructure.cache.token_store_sql import SQLTokenStore
+from app.infrastructure.db.session import create_store_engine, create_token_tables
+from app.infrastructure.models.token import IssuedTokenORM
+
+
+def _ops(fn, number: int) -> float:
+    return number / min(timeit.repeat(fn, number=number, repeat=3))
+
+
+def _sql_store(url: str) -> SQLTokenStore:
+    engine = create_store_engine(url)
+    create_token_tables(engine)
+    return SQLTokenStore(engine, namespace=f"bench:{uuid.uuid4().hex[:8]}")
+
+
+def _measure(store: TokenStore, tokens: int, number: int) -> dict[str, float]:
+    jtis = [str(uuid.uuid4()) for _ in range(tokens)]
+    for jti in jtis:
+        store.allow_access(jti, "bench-user", 3600)
+    hits = itertools.cycle(jtis)
+    misses = iter([str(uuid.uuid4()) for _ in range(number * 3)])
+    fresh = iter([str(uuid.uuid4()) for _ in range(number * 3)])
+    return {
+        "hit": _ops(lambda: store.is_access_allowed(next(hits)), number),
+        "miss": _ops(lambda: store.is_access_allowed(next(misses)), number),
+        "allow": _ops(lambda: store.allow_access(next(fresh), "bench-user", 3600), number),
+    }
+
+
+def run(
+    tokens: int, number: int, redis_url: str | None = None, database_url: str | None = None
+) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        stores: dict[str, Any] = {
+            "memory": lambda: InMemoryTokenStore(),
+            "shm": lambda: SharedMemoryTokenStore(
+                str(Path(tmp) / "bench.tbl"), capacity=(tokens + number * 3) * 2
+            ),
+            "sqlite": lambda: _sql_store(f"sqlite:///{Path(tmp) / 'bench.db'}"),
+        }
+        if redis_url:
+            from app.infrastructure.cache.redis_client import get_redis_client
+
+            stores["redis"] = lambda: RedisTokenStore(
+                get_redis_client(redis_url), namespace=f"bench:{uuid.uuid4().hex[:8]}"
+            )
+        if database_url:
+            stores["postgres"] = lambda: _sql_store(database_url)
+        for name, factory in stores.items():
+            store = factory()
+            results[name] = _measure(store, tokens, number)
+            if isinstance(store, SQLTokenStore):
+                # Leave nothing behind in a shared database
+                with store.engine.begin() as conn:
+                    conn.execute(delete(IssuedTokenORM).where(IssuedTokenORM.namespace == store.ns))
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=20000, help="Live tokens in each store")
+    parser.add_argument("--number", type=int, default=100000, help="Operations per timing")
+    parser.add_argument("--redis-url", help="Also measure RedisTokenStore")
+    parser.add_argument("--database-url", help="Also measure SQLTokenStore on this database")
+    args = parser.parse_args(argv)
+    results = run(args.tokens, args.number, args.redis_url, args.database_url)
+    print(f"{'store':<9} {'op':<6} {'ops/s':>12} {'us/op':>9}")
+    for name, ops in results.items():
+        for kind, value in ops.items():
+            print(f"{name:<9} {kind:<6} {value:>12,.0f} {1e6 / value:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
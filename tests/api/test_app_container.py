@@ -0,0 +1,80 @@
+import sqlite3
+
+import pytest
+from httpx import AsyncClient
+from jose import jwt
+
+from app.core.config import get_settings
+from app.main import create_app
+
+
+CREDS = {"email": "tenant@example.com", "full_name": "Tenant", "password": "secret123"}
+
+
+@pytest.mark.asyncio
+async def test_apps_in_one_process_share_no_state() -> None:
+    first, second = create_app(), create_app()
+    async with AsyncClient(app=first, base_url="http://test") as a, AsyncClient(
+        app=second, base_url="http://test"
+    ) as b:
+        assert (await a.post("/api/v1/auth/register", json=CREDS)).status_code == 201
+        assert (await b.post("/api/v1/auth/register", json=CREDS)).status_code == 201
+        r = await a.post(
+            "/api/v1/auth/login", data={"username": CREDS["email"], "password": CREDS["password"]}
+        )
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        assert (await a.get("/api/v1/auth/me", headers=headers)).status_code == 200
+        # Same signing key, but the token was issued into the other app's store
+        assert (await b.get("/api/v1/auth/me", headers=headers)).status_code == 401
+    assert first.state.container.token_store() is not second.state.container.token_store()
+
+
+@pytest.mark.asyncio
+async def test_each_app_owns_its_database_until_shutdown(tmp_path) -> None:
+    apps = []
+    for name, rounds in (("a", 4), ("b", 5)):
+        settings = get_settings().model_copy(
+            update={
+                "DATABASE_URL": f"sqlite:///{tmp_path / name}.db",
+                "TOKEN_ISSUER": f"issuer-{name}",
+                "PASSWORD_HASH_ROUNDS": rounds,
+            }
+        )
+        apps.append(create_app(settings))
+    for name, app in zip(("a", "b"), apps):
+        container = app.state.container
+        async with app.router.lifespan_context(app):
+            async with AsyncClient(app=app, base_url="http://test") as ac:
+                assert (await ac.post("/api/v1/auth/register", json=CREDS)).status_code == 201
+                login = {"username": CREDS["email"], "password": CREDS["password"]}
+                tokens = (await ac.post("/api/v1/auth/login", data=login)).json()
+                # Tokens are signed and checked with this app's settings, not the environment's
+                assert jwt.get_unverified_claims(tokens["access_token"])["iss"] == f"issuer-{name}"
+                r = await ac.post("/api/v1/auth/introspect", data={"token": tokens["access_token"]})
+                assert r.json()["active"] is True
+            engine = container.engine
+            assert engine is not None and engine.pool.checkedin() >= 1
+        # Shutdown disposed the pool and dropped every resource
+        assert engine.pool.checkedin() == 0 and container.breaker_stats() == {}
+    for name, cost in (("a", "04"), ("b", "05")):
+        with sqlite3.connect(tmp_path / f"{name}.db") as conn:
+            assert conn.execute("SELECT count(*) FROM users").fetchone() == (1,)
+            # ... and passwords are hashed at this app's bcrypt cost
+            (password_hash,) = conn.execute("SELECT password_hash FROM users").fetchone()
+            assert password_hash.startswith(f"$2b${cost}$")
+    assert get_settings().TOKEN_ISSUER != "issuer-a"
+
+
+def test_settings_passed_to_create_app_are_validated() -> None:
+    from app.core.config import Settings
+
+    insecure = Settings(ENV="prod", PASSWORD_HASH_ROUNDS=4, SECRET_KEY="x" * 32)
+    with pytest.raises(ValueError, match="PASSWORD_HASH_ROUNDS"):
+        create_app(insecure)
+    with pytest.raises(ValueError, match="SECRET_KEY"):
+        create_app(Settings(ENV="prod", SECRET_KEY="change-me"))
+    with pytest.raises(ValueError, match="REDIS_URL"):
+        create_app(Settings(TOKEN_STORE_BACKEND="redis", REDIS_URL=None))
+    # The test profile applies as well
+    app = create_app(Settings(ENV="test", PASSWORD_HASH_ROUNDS=None))
+    assert app.state.container.settings.PASSWORD_HASH_ROUNDS == 4
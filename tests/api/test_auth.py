@@ -123,7 +123,6 @@ async def test_admin_required_for_user_routes() -> None:
 @pytest.mark.asyncio
 async def test_admin_token_can_access_user_routes() -> None:
     from app.core.security import create_access_token
-    from app.api.dependencies import get_token_store
 
     app = create_app()
     async with AsyncClient(app=app, base_url="http://test") as ac:
@@ -139,7 +138,7 @@ async def test_admin_token_can_access_user_routes() -> None:
 
         # Forge an admin access token for that user and register it in token store
         access = create_access_token(user_id, extra={"role": "admin"})
-        store = get_token_store()
+        store = app.state.container.token_store()
         # default ACCESS_TOKEN_EXPIRES_MIN is 15
         store.allow_access(access["jti"], user_id, ttl_seconds=60)
         headers = {"Authorization": f"Bearer {access['token']}"}
@@ -189,7 +188,6 @@ async def test_refresh_rotation_invalidates_old() -> None:
 @pytest.mark.asyncio
 async def test_promote_user_to_admin_endpoint() -> None:
     from app.core.security import create_access_token
-    from app.api.dependencies import get_token_store
 
     app = create_app()
     async with AsyncClient(app=app, base_url="http://test") as ac:
@@ -207,7 +205,7 @@ async def test_promote_user_to_admin_endpoint() -> None:
 
         # Forge admin caller token
         forged = create_access_token(admin_candidate_id, extra={"role": "admin"})
-        store = get_token_store()
+        store = app.state.container.token_store()
         store.allow_access(forged["jti"], admin_candidate_id, ttl_seconds=60)
         headers = {"Authorization": f"Bearer {forged['token']}"}
 
@@ -302,3 +300,151 @@ async def test_https_only_enforced(monkeypatch) -> None:
     # cleanup for other tests
     del os.environ["REQUIRE_HTTPS"]
     get_settings.cache_clear()  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_login_throttled_per_email(monkeypatch) -> None:
+    from app.core.config import get_settings
+    from app.core import security
+
+    verified = []
+    original_verify = security.verify_password
+    monkeypatch.setattr(
+        "app.domain.user.services.verify_password",
+        lambda p, h, **kw: verified.append(p) or original_verify(p, h, **kw),
+    )
+    monkeypatch.setenv("LOGIN_MAX_ATTEMPTS_PER_EMAIL", "3")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        app = create_app()
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            payload = {
+                "email": "stuffed@example.com",
+                "full_name": "Stuffed",
+                "password": "secret123",
+            }
+            r = await ac.post("/api/v1/auth/register", json=payload)
+            assert r.status_code == 201
+            for _ in range(3):
+                r = await ac.post(
+                    "/api/v1/auth/login",
+                    data={"username": payload["email"], "password": "wrong-guess"},
+                )
+                assert r.status_code == 401
+            r = await ac.post(
+                "/api/v1/auth/login",
+                data={"username": payload["email"], "password": payload["password"]},
+            )
+            assert r.status_code == 429
+            assert int(r.headers["Retry-After"]) > 0
+            # rejected before the password was checked
+            assert len(verified) == 3
+    finally:
+        monkeypatch.delenv("LOGIN_MAX_ATTEMPTS_PER_EMAIL")
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_overload_returns_503(monkeypatch) -> None:
+    from uuid import uuid4
+
+    from app.core.config import get_settings
+    from app.core.security import create_access_token, get_password_admission
+
+    monkeypatch.setenv("PASSWORD_HASH_MAX_CONCURRENCY", "1")
+    monkeypatch.setenv("PASSWORD_HASH_MAX_QUEUE", "0")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        app = create_app()
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            # Occupy the only hashing slot, as a concurrent bcrypt call would
+            with get_password_admission().slot():
+                r = await ac.post(
+                    "/api/v1/auth/register",
+                    json={
+                        "email": "shed@example.com",
+                        "full_name": "Shed",
+                        "password": "secret123",
+                    },
+                    headers={"Accept-Language": "ru"},
+                )
+                assert r.status_code == 503 and r.json()["detail"] == "Сервер перегружен"
+                assert int(r.headers["Retry-After"]) >= 1
+                # cheap endpoints are unaffected
+                assert (await ac.get("/health")).status_code == 200
+            assert (await ac.get("/metrics")).status_code == 401
+            admin_id = str(uuid4())
+            access = create_access_token(admin_id, extra={"role": "admin"})
+            app.state.container.token_store().allow_access(access["jti"], admin_id, ttl_seconds=60)
+            headers = {"Authorization": f"Bearer {access['token']}"}
+            r = await ac.get("/metrics", headers=headers)
+            assert r.json()["password_admission"]["shed_queue_full"] >= 1
+    finally:
+        monkeypatch.delenv("PASSWORD_HASH_MAX_CONCURRENCY")
+        monkeypatch.delenv("PASSWORD_HASH_MAX_QUEUE")
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_list_sessions_and_logout_everywhere() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        payload = {
+            "email": "devices@example.com",
+            "full_name": "Many Devices",
+            "password": "secret123",
+        }
+        r = await ac.post("/api/v1/auth/register", json=payload)
+        assert r.status_code == 201
+        form = {"username": payload["email"], "password": payload["password"]}
+        phone = (await ac.post("/api/v1/auth/login", data=form)).json()
+        laptop = (await ac.post("/api/v1/auth/login", data=form)).json()
+        headers = {"Authorization": f"Bearer {laptop['access_token']}"}
+
+        r = await ac.get("/api/v1/auth/sessions", headers=headers)
+        assert r.status_code == 200
+        kinds = sorted(s["kind"] for s in r.json())
+        assert kinds == ["access", "access", "refresh", "refresh"]
+
+        r = await ac.post("/api/v1/auth/logout-all", headers=headers)
+        assert r.status_code == 204
+
+        for tokens in (phone, laptop):
+            r = await ac.get(
+                "/api/v1/auth/me",
+                headers={"Authorization": f"Bearer {tokens['access_token']}"},
+            )
+            assert r.status_code == 401
+            r = await ac.post(
+                "/api/v1/auth/refresh", params={"refresh_token": tokens["refresh_token"]}
+            )
+            assert r.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_token_store_outage_is_503_not_401() -> None:
+    from app.api.dependencies import get_token_store
+    from app.infrastructure.cache.circuit_breaker import CircuitOpenError
+
+    class _Down:
+        def is_access_allowed(self, jti: str) -> bool:
+            raise CircuitOpenError("redis unavailable", retry_after=7)
+
+        revoke_access = is_access_allowed
+
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        payload = {"email": "outage@example.com", "full_name": "Out Age", "password": "secret123"}
+        await ac.post("/api/v1/auth/register", json=payload)
+        r = await ac.post(
+            "/api/v1/auth/login",
+            data={"username": payload["email"], "password": payload["password"]},
+        )
+        access = r.json()["access_token"]
+
+        app.dependency_overrides[get_token_store] = lambda: _Down()
+        r = await ac.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {access}"})
+        assert r.status_code == 503 and r.headers["retry-after"] == "7"
+        # Logout must not report a revocation that did not happen
+        r = await ac.post("/api/v1/auth/logout", params={"token": access})
+        assert r.status_code == 503
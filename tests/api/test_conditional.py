@@ -0,0 +1,127 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from app.infrastructure.cache.version_cache import InMemoryUserVersionCache
+from app.main import create_app
+from app.utils.etag import etag_matches, is_not_modified, updated_version, user_etag
+
+
+def test_etag_comparison() -> None:
+    etag = user_etag("u1", 1)
+    assert etag != user_etag("u1", 2) and etag != user_etag("u2", 1)
+    assert etag_matches(f'"x", W/{etag}', etag, weak=True)
+    assert not etag_matches(f"W/{etag}", etag, weak=False)
+    assert etag_matches("*", etag, weak=False)
+
+
+def test_if_none_match_takes_precedence() -> None:
+    modified = datetime(2026, 1, 2, 3, 4, 5, 600000, tzinfo=timezone.utc)
+    since = "Fri, 02 Jan 2026 03:04:05 GMT"
+    assert is_not_modified({"if-modified-since": since}, '"a"', modified)
+    assert not is_not_modified({"if-modified-since": "garbage"}, '"a"', modified)
+    assert not is_not_modified({"if-none-match": '"b"', "if-modified-since": since}, '"a"', modified)
+
+
+def test_version_cache_keeps_newest_and_tombstones() -> None:
+    cache = InMemoryUserVersionCache(max_entries=2)
+    cache.remember("a", 5)
+    cache.remember("a", 3)
+    assert cache.get("a") == 5
+    cache.forget("a")
+    cache.remember("a", 9)
+    assert cache.get("a") is None
+    cache.remember("b", 1)
+    cache.remember("c", 1)
+    assert cache.get("b") == 1 and len(cache._data) == 2
+
+
+def test_redis_version_cache_remembers_a_batch_in_one_call() -> None:
+    import fakeredis
+
+    from app.infrastructure.cache.version_cache import RedisUserVersionCache
+
+    client = fakeredis.FakeRedis()
+    cache = RedisUserVersionCache(client)
+    cache.remember("a", 5)
+    cache.forget("gone")
+    calls = []
+    script = cache._remember
+    cache._remember = lambda **kwargs: calls.append(kwargs) or script(**kwargs)
+    cache.remember_many({"a": 3, "b": 7, "gone": 9})
+    assert len(calls) == 1
+    assert (cache.get("a"), cache.get("b"), cache.get("gone")) == (5, 7, None)
+
+
+async def _admin(app: FastAPI, ac: AsyncClient, email: str) -> dict[str, str]:
+    from app.core.security import create_access_token
+
+    r = await ac.post(
+        "/api/v1/auth/register",
+        json={"email": email, "full_name": "Cond Admin", "password": "secret123"},
+    )
+    user_id = r.json()["id"]
+    access = create_access_token(user_id, extra={"role": "admin"})
+    app.state.container.token_store().allow_access(access["jti"], user_id, ttl_seconds=60)
+    return {"Authorization": f"Bearer {access['token']}"}
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_and_if_match_update() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        headers = await _admin(app, ac, "cond-admin@example.com")
+        r = await ac.post(
+            "/api/v1/users", headers=headers, json={"email": "cond@example.com", "full_name": "Cond"}
+        )
+        user = r.json()
+        url = f"/api/v1/users/{user['id']}"
+
+        r = await ac.get(url, headers=headers)
+        assert r.status_code == 200
+        etag, last_modified = r.headers["etag"], r.headers["last-modified"]
+        assert etag == user_etag(user["id"], updated_version(datetime.fromisoformat(user["updated_at"])))
+        assert r.headers["cache-control"] == "private, no-cache"
+
+        r = await ac.get(url, headers={**headers, "If-None-Match": etag})
+        assert r.status_code == 304 and r.content == b""
+        assert r.headers["etag"] == etag
+        r = await ac.get(url, headers={**headers, "If-Modified-Since": last_modified})
+        assert r.status_code == 304
+
+        r = await ac.patch(url, headers={**headers, "If-Match": etag}, json={"full_name": "Cond 2"})
+        assert r.status_code == 200
+        new_etag = r.headers["etag"]
+        assert new_etag != etag
+
+        # Stale validators: the GET is a full 200, the PATCH is rejected
+        r = await ac.get(url, headers={**headers, "If-None-Match": etag})
+        assert r.status_code == 200 and r.json()["full_name"] == "Cond 2"
+        r = await ac.patch(url, headers={**headers, "If-Match": etag}, json={"full_name": "Cond 3"})
+        assert r.status_code == 412
+        r = await ac.get(url, headers=headers)
+        assert r.json()["full_name"] == "Cond 2" and r.headers["etag"] == new_etag
+
+
+@pytest.mark.asyncio
+async def test_me_not_modified_and_gone_after_delete() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.post(
+            "/api/v1/auth/register",
+            json={"email": "cond-me@example.com", "full_name": "Me", "password": "secret123"},
+        )
+        r = await ac.post(
+            "/api/v1/auth/login", data={"username": "cond-me@example.com", "password": "secret123"}
+        )
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        r = await ac.get("/api/v1/auth/me", headers=headers)
+        etag = r.headers["etag"]
+        r = await ac.get("/api/v1/auth/me", headers={**headers, "If-None-Match": etag})
+        assert r.status_code == 304
+
+        assert (await ac.delete("/api/v1/auth/me", headers=headers)).status_code == 204
+        r = await ac.get("/api/v1/auth/me", headers={**headers, "If-None-Match": etag})
+        assert r.status_code == 401
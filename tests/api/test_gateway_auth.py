@@ -0,0 +1,144 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import get_settings
+from app.main import create_app
+
+
+async def _login(ac: AsyncClient, email: str) -> dict[str, str]:
+    await ac.post(
+        "/api/v1/auth/register", json={"email": email, "full_name": "Gate", "password": "secret123"}
+    )
+    r = await ac.post("/api/v1/auth/login", data={"username": email, "password": "secret123"})
+    return r.json()
+
+
+@pytest.mark.asyncio
+async def test_introspection() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        tokens = await _login(ac, "introspect@example.com")
+        r = await ac.post("/api/v1/auth/introspect", data={"token": tokens["access_token"]})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["active"] is True and body["token_type"] == "access_token"
+        assert body["role"] == "user" and body["exp"] > body["iat"]
+        assert r.headers["cache-control"].startswith("private, max-age=")
+
+        r = await ac.post(
+            "/api/v1/auth/introspect",
+            data={"token": tokens["refresh_token"], "token_type_hint": "refresh_token"},
+        )
+        assert r.json()["token_type"] == "refresh_token"
+
+        r = await ac.post("/api/v1/auth/introspect", data={"token": "garbage"})
+        assert r.status_code == 200 and r.json() == {"active": False}
+
+        r = await ac.post(
+            "/api/v1/auth/introspect/batch",
+            json={"tokens": [tokens["access_token"], "garbage", tokens["refresh_token"]]},
+        )
+        assert [item["active"] for item in r.json()["results"]] == [True, False, True]
+
+        await ac.post("/api/v1/auth/logout", params={"token": tokens["access_token"]})
+        r = await ac.post("/api/v1/auth/introspect", data={"token": tokens["access_token"]})
+        assert r.json() == {"active": False}
+
+
+@pytest.mark.asyncio
+async def test_introspection_client_secret(monkeypatch) -> None:
+    monkeypatch.setenv("INTROSPECTION_TOKEN", "gateway-secret")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        app = create_app()
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            tokens = await _login(ac, "introspect-secret@example.com")
+            data = {"token": tokens["access_token"]}
+            r = await ac.post("/api/v1/auth/introspect", data=data)
+            assert r.status_code == 401
+            r = await ac.post(
+                "/api/v1/auth/introspect", data=data, headers={"Authorization": "Bearer gateway-secret"}
+            )
+            assert r.status_code == 200 and r.json()["active"] is True
+    finally:
+        monkeypatch.undo()
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_forward_auth_verify() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        tokens = await _login(ac, "verify@example.com")
+        me = await ac.get(
+            "/api/v1/auth/me", headers={"Authorization": f"Bearer {tokens['access_token']}"}
+        )
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+        r = await ac.get("/api/v1/auth/verify", headers=headers)
+        assert r.status_code == 204 and r.content == b""
+        assert r.headers["x-user-id"] == me.json()["id"] and r.headers["x-user-role"] == "user"
+        assert "Authorization" in r.headers["vary"]
+        r = await ac.post("/api/v1/auth/verify", headers=headers)
+        assert r.status_code == 204
+
+        r = await ac.get("/api/v1/auth/verify", params={"role": "admin"}, headers=headers)
+        assert r.status_code == 403
+
+        r = await ac.get("/api/v1/auth/verify")
+        assert r.status_code == 401 and r.headers["www-authenticate"] == "Bearer"
+        r = await ac.get(
+            "/api/v1/auth/verify", headers={"Authorization": f"Bearer {tokens['refresh_token']}"}
+        )
+        assert r.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_verify_uses_stored_role_unless_token_role_is_trusted(monkeypatch) -> None:
+    from app.core.security import create_access_token
+
+    monkeypatch.setenv("TRUST_TOKEN_ROLE", "false")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        app = create_app()
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            tokens = await _login(ac, "claims@example.com")
+            me = await ac.get(
+                "/api/v1/auth/me", headers={"Authorization": f"Bearer {tokens['access_token']}"}
+            )
+            user_id = me.json()["id"]
+            forged = create_access_token(user_id, extra={"role": "admin"})
+            app.state.container.token_store().allow_access(forged["jti"], user_id, ttl_seconds=60)
+            headers = {"Authorization": f"Bearer {forged['token']}"}
+            r = await ac.get("/api/v1/auth/verify", params={"role": "admin"}, headers=headers)
+            assert r.status_code == 403
+            r = await ac.get("/api/v1/auth/verify", headers=headers)
+            assert r.status_code == 204 and r.headers["x-user-role"] == "user"
+    finally:
+        monkeypatch.undo()
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_introspection_needs_a_client_secret_outside_dev(monkeypatch) -> None:
+    monkeypatch.setenv("ENV", "prod")
+    monkeypatch.setenv("SECRET_KEY", "x" * 32)
+    monkeypatch.setenv("INTROSPECTION_BATCH_MAX", "1")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        async with AsyncClient(app=create_app(), base_url="http://test") as ac:
+            r = await ac.post("/api/v1/auth/introspect", data={"token": "garbage"})
+            assert r.status_code == 404
+
+        monkeypatch.setenv("INTROSPECTION_TOKEN", "gateway-secret")
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+        async with AsyncClient(app=create_app(), base_url="http://test") as ac:
+            r = await ac.post(
+                "/api/v1/auth/introspect/batch",
+                json={"tokens": ["a", "b"]},
+                headers={"Authorization": "Bearer gateway-secret", "Accept-Language": "ru"},
+            )
+            assert r.status_code == 400 and r.json()["detail"] == "Не более 1 токенов в пакете"
+    finally:
+        monkeypatch.undo()
+        get_settings.cache_clear()  # type: ignore[attr-defined]
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import create_engine
+
+from app.infrastructure.readiness import ReadinessMonitor, _db_probe, _warm_db_pool
+from app.main import create_app
+
+
+def _down() -> None:
+    raise ConnectionError("connection refused")
+
+
+def test_monitor_reports_failures_and_latency() -> None:
+    engine = create_engine("sqlite://")
+    monitor = ReadinessMonitor({"database": _db_probe(engine), "redis": _down}, interval_seconds=60)
+    assert monitor.snapshot()["status"] == "not_ready"
+    monitor.start()
+    try:
+        snap = monitor.snapshot()
+        assert snap["status"] == "not_ready"
+        assert snap["checks"]["database"]["ok"] and snap["checks"]["database"]["latency_ms"] >= 0
+        assert snap["checks"]["redis"] == {
+            "ok": False,
+            "latency_ms": snap["checks"]["redis"]["latency_ms"],
+            "age_s": snap["checks"]["redis"]["age_s"],
+            "error": "ConnectionError: connection refused",
+        }
+    finally:
+        monitor.stop()
+
+
+def test_stale_results_count_as_failed() -> None:
+    monitor = ReadinessMonitor({"database": lambda: None}, interval_seconds=60, stale_after=0.01)
+    monitor.start()
+    try:
+        time.sleep(0.02)
+        snap = monitor.snapshot()
+        assert snap["status"] == "not_ready" and snap["checks"]["database"]["error"] == "stale result"
+    finally:
+        monitor.stop()
+
+
+def test_warm_db_pool_stays_within_pool_size(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'warm.db'}", pool_size=3, pool_timeout=1)
+    assert _warm_db_pool(engine, 10) == 3
+    assert engine.pool.checkedin() == 3
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint_follows_lifespan() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/ready")
+        assert r.status_code == 503 and r.json()["status"] == "starting"
+        async with app.router.lifespan_context(app):
+            r = await ac.get("/ready")
+            assert r.status_code == 200 and r.json()["status"] == "ready"
+            assert r.headers["cache-control"] == "no-store"
@@ -0,0 +1,55 @@
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from httpx import AsyncClient
+
+from app.api.responses import FastJSONResponse
+from app.core.config import get_settings
+from app.domain.user.models import Role
+from app.domain.user.schemas import UserReadDTO
+from app.main import create_app
+
+
+def test_fast_json_matches_default_encoding() -> None:
+    now = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+    dto = UserReadDTO(
+        id=uuid.uuid4(),
+        email="ünïcode@example.com",
+        full_name="Zoë «Test»",
+        is_active=True,
+        role=Role.ADMIN,
+        created_at=now,
+        updated_at=now,
+    )
+    body = FastJSONResponse(dto).body
+    assert json.loads(body) == jsonable_encoder(dto)
+    assert FastJSONResponse([dto]).body == b"[" + body + b"]"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fast", [True, False])
+async def test_me_response_identical_on_both_paths(fast: bool, monkeypatch) -> None:
+    monkeypatch.setenv("FAST_JSON_RESPONSES", "true" if fast else "false")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        app = create_app()
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            email = f"json-{fast}@example.com"
+            payload = {"email": email, "full_name": "Json User", "password": "secret123"}
+            r = await ac.post("/api/v1/auth/register", json=payload)
+            assert r.status_code == 201
+            created = r.json()
+            r = await ac.post(
+                "/api/v1/auth/login", data={"username": email, "password": "secret123"}
+            )
+            token = r.json()["access_token"]
+            r = await ac.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+            assert r.status_code == 200
+            assert r.headers["content-type"] == "application/json"
+            assert r.json() == created
+    finally:
+        monkeypatch.undo()
+        get_settings.cache_clear()  # type: ignore[attr-defined]
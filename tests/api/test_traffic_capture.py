@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.main import create_app
+
+
+@pytest.mark.asyncio
+async def test_capture_is_anonymized_and_replayable(tmp_path, monkeypatch) -> None:
+    from app.cli.replay import load_capture, replay
+    from app.core.config import get_settings
+
+    capture = tmp_path / "capture.jsonl"
+    monkeypatch.setenv("TRAFFIC_CAPTURE_PATH", str(capture))
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        app = create_app()
+    finally:
+        monkeypatch.delenv("TRAFFIC_CAPTURE_PATH")
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+
+    payload = {"email": "captured@example.com", "full_name": "Cap", "password": "secret123"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.post("/api/v1/auth/register", json=payload)
+        user_id = r.json()["id"]
+        r = await ac.post(
+            "/api/v1/auth/login",
+            data={"username": payload["email"], "password": payload["password"]},
+        )
+        tokens = r.json()
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        for _ in range(3):
+            assert (await ac.get("/api/v1/auth/me", headers=headers)).status_code == 200
+        r = await ac.post(
+            "/api/v1/auth/refresh", params={"refresh_token": tokens["refresh_token"]}
+        )
+        assert r.status_code == 200
+
+    # Flush buffered records
+    app.state.traffic_capture.flush()
+    text = capture.read_text()
+    assert payload["email"] not in text
+    assert user_id not in text
+    assert tokens["access_token"] not in text
+
+    records = load_capture(str(capture))
+    me = [r for r in records if r.route == "/api/v1/auth/me"]
+    assert len(me) == 3 and {r.identity for r in me} == {me[0].identity}
+    assert json.loads(text.splitlines()[0])["v"] == 1
+
+    report = await replay(str(capture), speed=0)
+    assert report["skipped"] == 0
+    assert report["status_mismatches"] == 0
+    assert report["steps"]["GET /api/v1/auth/me"]["count"] == 3
+
+
+def test_appended_capture_sessions_stay_apart(tmp_path) -> None:
+    from app.cli.replay import load_capture
+
+    capture = tmp_path / "capture.jsonl"
+    lines = [
+        {"v": 1, "started_at": 1000.0},
+        {"m": "GET", "r": "/api/v1/auth/me", "s": 200, "d": 1.0, "u": 1, "t": 0.5},
+        {"m": "GET", "r": "/api/v1/users/{user_id}", "s": 200, "d": 1.0, "u": 1,
+         "p": {"user_id": 2}, "t": 1.0},
+        {"v": 1, "started_at": 1060.0},
+        {"m": "GET", "r": "/api/v1/auth/me", "s": 200, "d": 1.0, "u": 1, "t": 0.25},
+        {"m": "GET", "r": "/api/v1/users/{user_id}", "s": 200, "d": 1.0, "u": 2,
+         "p": {"user_id": 1}, "t": 0.75},
+    ]
+    capture.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+    records = load_capture(str(capture))
+    assert [r.t for r in records] == [0.5, 1.0, 60.25, 60.75]
+    first, second = records[:2], records[2:]
+    assert first[0].identity == first[1].identity
+    assert second[0].identity == second[1].params["user_id"]
+    assert first[0].identity != second[0].identity
+    assert first[1].params["user_id"] != second[1].identity
@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from app.core.config import get_settings
+from app.domain.user.models import Role
+from app.main import create_app
+
+
+async def _admin(app: FastAPI, ac: AsyncClient, email: str) -> dict[str, str]:
+    from app.core.security import create_access_token
+
+    r = await ac.post(
+        "/api/v1/auth/register",
+        json={"email": email, "full_name": "Feed Admin", "password": "secret123"},
+    )
+    user_id = r.json()["id"]
+    access = create_access_token(user_id, extra={"role": "admin"})
+    app.state.container.token_store().allow_access(access["jti"], user_id, ttl_seconds=60)
+    return {"Authorization": f"Bearer {access['token']}"}
+
+
+async def _create(ac: AsyncClient, headers: dict[str, str], email: str) -> str:
+    r = await ac.post("/api/v1/users", headers=headers, json={"email": email, "full_name": "Watched"})
+    return r.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_long_poll_returns_as_soon_as_a_change_is_committed() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        headers = await _admin(app, ac, "feed-admin@example.com")
+        user_id = await _create(ac, headers, "feed-watched@example.com")
+        r = await ac.get("/api/v1/users/changes", headers=headers)
+        assert r.status_code == 200 and r.headers["cache-control"] == "no-store"
+        cursor = r.json()["cursor"]
+        assert r.json()["changes"] == []
+
+        async def deactivate() -> None:
+            await asyncio.sleep(0.3)
+            await ac.patch(
+                f"/api/v1/users/{user_id}",
+                headers=headers,
+                json={"full_name": "Watched", "is_active": False},
+            )
+
+        poll = ac.get(f"/api/v1/users/changes?since={cursor}&wait=10", headers=headers)
+        r, _ = await asyncio.gather(poll, deactivate())
+        body = r.json()
+        assert [(c["user_id"], c["kind"]) for c in body["changes"]] == [(user_id, "deactivated")]
+        assert body["cursor"] == body["changes"][0]["seq"] > cursor
+
+        # Nothing new: an immediate poll returns the same cursor
+        r = await ac.get(f"/api/v1/users/changes?since={body['cursor']}", headers=headers)
+        assert r.json() == {"changes": [], "cursor": body["cursor"]}
+
+        r = await ac.post(
+            "/api/v1/auth/register",
+            json={"email": "feed-user@example.com", "full_name": "Plain", "password": "secret123"},
+        )
+        r = await ac.post(
+            "/api/v1/auth/login", data={"username": "feed-user@example.com", "password": "secret123"}
+        )
+        plain = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        assert (await ac.get("/api/v1/users/changes", headers=plain)).status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_expired_cursor_is_gone() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        headers = await _admin(app, ac, "feed-admin-2@example.com")
+        await _create(ac, headers, "feed-gone@example.com")
+        app.state.container.user_change_feed().compact(retention=0, compact_after=0)
+        r = await ac.get("/api/v1/users/changes?since=1", headers=headers)
+        assert r.status_code == 410
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_resumes_from_last_event_id(monkeypatch) -> None:
+    monkeypatch.setenv("USER_CHANGES_STREAM_MAX_SEC", "0.3")
+    monkeypatch.setenv("USER_CHANGES_POLL_INTERVAL_SEC", "0.05")
+    get_settings.cache_clear()
+    try:
+        app = create_app()
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            headers = await _admin(app, ac, "feed-admin-3@example.com")
+            cursor = (await ac.get("/api/v1/users/changes", headers=headers)).json()["cursor"]
+            first = await _create(ac, headers, "feed-sse-1@example.com")
+            second = await _create(ac, headers, "feed-sse-2@example.com")
+
+            r = await ac.get(f"/api/v1/users/changes/stream?since={cursor}", headers=headers)
+            assert r.headers["content-type"].startswith("text/event-stream")
+            frames = [f for f in r.text.split("\n\n") if f]
+            assert frames[0] == f'id: {cursor}\nevent: ready\ndata: {{"cursor":{cursor}}}'
+            events = [dict(line.split(": ", 1) for line in f.split("\n")) for f in frames[1:]]
+            assert [json.loads(e["data"])["user_id"] for e in events] == [first, second]
+            assert {e["event"] for e in events} == {"created"}
+
+            resume = {**headers, "Last-Event-ID": events[0]["id"]}
+            r = await ac.get("/api/v1/users/changes/stream", headers=resume)
+            resumed = [f for f in r.text.split("\n\n") if f.startswith("id:")][1:]
+            assert len(resumed) == 1 and second in resumed[0]
+    finally:
+        monkeypatch.undo()
+        get_settings.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_feed_checks_the_stored_role_unless_token_role_is_trusted(monkeypatch) -> None:
+    monkeypatch.setenv("TRUST_TOKEN_ROLE", "false")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        app = create_app()
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            # A role claim alone no longer opens the feed
+            headers = await _admin(app, ac, "claimed-admin@example.com")
+            assert (await ac.get("/api/v1/users/changes", headers=headers)).status_code == 403
+            me = await ac.get("/api/v1/auth/me", headers=headers)
+            with app.state.container.user_service() as svc:
+                svc.set_role(me.json()["id"], Role.ADMIN)
+            # Role changes revoke tokens, so log in again as the stored admin
+            login = {"username": "claimed-admin@example.com", "password": "secret123"}
+            r = await ac.post("/api/v1/auth/login", data=login)
+            headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+            assert (await ac.get("/api/v1/users/changes", headers=headers)).status_code == 200
+    finally:
+        monkeypatch.undo()
+        get_settings.cache_clear()  # type: ignore[attr-defined]
@@ -0,0 +1,120 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from app.main import create_app
+
+
+async def _admin(app: FastAPI, ac: AsyncClient, email: str) -> dict[str, str]:
+    from app.core.security import create_access_token
+
+    r = await ac.post(
+        "/api/v1/auth/register",
+        json={"email": email, "full_name": "Batch Admin", "password": "secret123"},
+    )
+    user_id = r.json()["id"]
+    access = create_access_token(user_id, extra={"role": "admin"})
+    app.state.container.token_store().allow_access(access["jti"], user_id, ttl_seconds=60)
+    return {"Authorization": f"Bearer {access['token']}"}
+
+
+@pytest.mark.asyncio
+async def test_atomic_batch_applies_all_or_nothing() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        headers = await _admin(app, ac, "batch-admin@example.com")
+        r = await ac.post(
+            "/api/v1/users", headers=headers, json={"email": "b-existing@example.com", "full_name": "Old"}
+        )
+        existing = r.json()["id"]
+
+        ops = [
+            {"op": "create", "email": "b-new@example.com", "full_name": "New One"},
+            {"op": "update", "user_id": existing, "full_name": "Renamed"},
+            {"op": "deactivate", "user_id": str(uuid.uuid4())},
+        ]
+        r = await ac.post("/api/v1/users/batch", headers=headers, json={"operations": ops})
+        assert r.status_code == 409
+        body = r.json()
+        assert [item["status"] for item in body["results"]] == ["skipped", "skipped", "error"]
+        assert body["results"][2]["error"] == "user not found" and body["applied"] == 0
+        assert (await ac.get(f"/api/v1/users/{existing}", headers=headers)).json()["full_name"] == "Old"
+
+        ops[2] = {"op": "set_role", "user_id": existing, "role": "admin"}
+        r = await ac.post("/api/v1/users/batch", headers=headers, json={"operations": ops})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["applied"] == 3 and body["failed"] == 0
+        created = body["results"][0]["user"]
+        assert created["email"] == "b-new@example.com"
+        r = await ac.get(f"/api/v1/users/{existing}", headers=headers)
+        assert r.json()["full_name"] == "Renamed" and r.json()["role"] == "admin"
+        assert body["results"][2]["user"] == r.json()
+
+
+@pytest.mark.asyncio
+async def test_best_effort_batch_reports_per_item() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        headers = await _admin(app, ac, "batch-admin2@example.com")
+        ops = [
+            {"op": "create", "email": "b-dup@example.com", "full_name": "First"},
+            {"op": "create", "email": "b-dup@example.com", "full_name": "Second"},
+            {"op": "create", "email": "batch-admin2@example.com", "full_name": "Taken"},
+        ]
+        r = await ac.post(
+            "/api/v1/users/batch", headers=headers, json={"operations": ops, "mode": "best_effort"}
+        )
+        assert r.status_code == 200
+        body = r.json()
+        assert [item["status"] for item in body["results"]] == ["ok", "error", "error"]
+        assert body["results"][1]["error"] == "email already in use"
+        new_id = body["results"][0]["user"]["id"]
+
+        # Later operations in a batch see earlier ones
+        ops = [
+            {"op": "update", "user_id": new_id, "full_name": "Renamed", "is_active": True},
+            {"op": "deactivate", "user_id": new_id},
+        ]
+        r = await ac.post("/api/v1/users/batch", headers=headers, json={"operations": ops})
+        results = r.json()["results"]
+        assert results[1]["user"]["full_name"] == "Renamed" and not results[1]["user"]["is_active"]
+
+
+@pytest.mark.asyncio
+async def test_batch_requires_admin_and_valid_ops() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.post("/api/v1/users/batch", json={"operations": []})
+        assert r.status_code == 401
+        headers = await _admin(app, ac, "batch-admin3@example.com")
+        r = await ac.post("/api/v1/users/batch", headers=headers, json={"operations": []})
+        assert r.status_code == 422
+        r = await ac.post(
+            "/api/v1/users/batch", headers=headers, json={"operations": [{"op": "drop", "user_id": "x"}]}
+        )
+        assert r.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_lookup_returns_users_in_request_order() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        headers = await _admin(app, ac, "lookup-admin@example.com")
+        ids = []
+        for i in range(3):
+            r = await ac.post(
+                "/api/v1/users", headers=headers, json={"email": f"lk{i}@example.com", "full_name": f"Lk {i}"}
+            )
+            ids.append(r.json()["id"])
+        unknown = str(uuid.uuid4())
+        wanted = [ids[2], unknown, ids[0], ids[2]]
+        r = await ac.post("/api/v1/users/lookup", headers=headers, json={"ids": wanted})
+        assert r.status_code == 200
+        body = r.json()
+        assert [u["id"] for u in body["users"]] == [ids[2], ids[0]]
+        assert body["missing"] == [unknown]
+        r = await ac.post("/api/v1/users/lookup", headers=headers, json={"ids": ["nope"]})
+        assert r.status_code == 422
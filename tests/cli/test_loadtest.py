@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pytest
+
+from app.cli.loadtest import LoadConfig, parse_mix, percentile, run_load
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([], 50) == 0.0
+
+
+def test_parse_mix() -> None:
+    assert parse_mix("me=20,login=2,register") == {"me": 20, "login": 2, "register": 1}
+
+
+@pytest.mark.asyncio
+async def test_run_load_in_process_reports_steps() -> None:
+    config = LoadConfig(
+        duration=30.0,
+        max_requests=12,
+        concurrency=2,
+        mix={"me": 5, "refresh": 1, "admin": 1},
+        seed=7,
+    )
+    report = await run_load(config)
+    steps = report["steps"]
+    # Sessions are bootstrapped lazily: every virtual user registers and logs in first
+    assert steps["register"]["count"] >= 1 and steps["login"]["count"] >= 1
+    assert steps["me"]["count"] >= 1
+    assert all(s["errors"] == 0 for s in steps.values())
+    for s in steps.values():
+        assert s["p50_ms"] <= s["p95_ms"] <= s["p99_ms"] <= s["max_ms"]
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import sqlite3
+
+from app.cli.manage import main as manage
+from app.core.config import get_settings
+
+
+def test_create_superuser_and_promote_existing(tmp_path, monkeypatch, capsys) -> None:
+    db = tmp_path / "users.db"
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{db}")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    args = ["create-superuser", "--email", "Root@example.com", "--full-name", "Root User"]
+    assert manage([*args, "--password", "secret123"]) == 0
+    assert manage([*args, "--password", "secret123"]) == 1
+    assert manage([*args, "--password", "secret123", "--upgrade-if-exists"]) == 0
+    assert "Promoted to admin" in capsys.readouterr().out
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT role FROM users").fetchall() == [("admin",)]
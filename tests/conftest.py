@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+# Test profile (cheap bcrypt, no production-only checks); must be set before
+# app modules build settings
+os.environ.setdefault("ENV", "test")
+
+from app.core.config import get_settings  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_settings(tmp_path, monkeypatch):
+    """Every test reads fresh settings; each ``create_app()`` brings its own stores.
+
+    Shared-memory tables go to the test's own directory, so tests also stay
+    independent when the suite is split across processes.
+    """
+    monkeypatch.setenv("SHM_STORE_DIR", str(tmp_path / "shm"))
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    yield
+    get_settings.cache_clear()  # type: ignore[attr-defined]
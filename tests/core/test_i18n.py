@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+from app.core import i18n
+from app.core.i18n import _, activate, deactivate, load_translations, negotiate_language
+from app.main import create_app
+
+
+@pytest.fixture
+def compiled_locales(tmp_path: Path):
+    locales = tmp_path / "locales"
+    shutil.copytree(Path(i18n.__file__).resolve().parent.parent / "locales", locales)
+    assert len(i18n.compile_catalogs(locales)) == 2
+    load_translations(["en", "ru"], default="en", locales_dir=locales)
+    yield locales
+    load_translations(["en", "ru"], default="en")
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("ru-RU,ru;q=0.9,en;q=0.8", "ru"),
+        ("en-US,en;q=0.9,ru;q=0.8", "en"),
+        ("de-DE, ru;q=0.5", "ru"),
+        ("fr, de", "en"),
+        ("ru;q=0, en;q=0.1", "en"),
+        ("*", "en"),
+        ("", "en"),
+        ("ru;q=bogus, en", "en"),
+    ],
+)
+def test_negotiate_language(compiled_locales: Path, header: str, expected: str) -> None:
+    assert negotiate_language(header) == expected
+
+
+def test_translations_come_from_compiled_catalog(compiled_locales: Path) -> None:
+    # "HTTPS required" is translated in the .po; the translator must use the .mo
+    ru = i18n._translators["ru"]
+    assert ru.gettext("HTTPS required") == "Требуется HTTPS"
+    assert getattr(ru, "_catalog", {}).get("HTTPS required") == "Требуется HTTPS"
+
+
+def test_context_scoped_language(compiled_locales: Path) -> None:
+    assert _("invalid token") == "invalid token"
+    token = activate("ru")
+    try:
+        assert _("invalid token") == "Неверный токен"
+    finally:
+        deactivate(token)
+    assert _("invalid token") == "invalid token"
+
+
+@pytest.mark.asyncio
+async def test_accept_language_per_request() -> None:
+    app = create_app()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        headers = {"Authorization": "Bearer not-a-token"}
+        r_ru = await ac.get("/api/v1/auth/me", headers={**headers, "Accept-Language": "ru"})
+        r_en = await ac.get("/api/v1/auth/me", headers={**headers, "Accept-Language": "en-GB"})
+    assert r_ru.status_code == r_en.status_code == 401
+    assert r_ru.json()["detail"] == "Неверный токен"
+    assert r_ru.headers["content-language"] == "ru"
+    assert r_en.json()["detail"] == "invalid token"
+    assert r_en.headers["content-language"] == "en"
+    assert "Accept-Language" in r_en.headers["vary"]
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from httpx import AsyncClient
+from jose import jwt
+
+from app.core.config import get_settings
+from app.core.keys import b64url_decode, b64url_encode, generate_private_key, private_key_pem
+from app.core.security import create_access_token, decode_token
+from app.main import create_app
+
+
+def _write_key(directory: Path, kid: str, alg: str) -> None:
+    (directory / f"{kid}.pem").write_bytes(private_key_pem(generate_private_key(alg)))
+
+
+@pytest.fixture
+def keys_dir(tmp_path, monkeypatch):
+    def configure(alg: str, active_kid: str | None = None) -> Path:
+        monkeypatch.setenv("JWT_ALGORITHM", alg)
+        monkeypatch.setenv("JWT_KEYS_DIR", str(tmp_path))
+        if active_kid:
+            monkeypatch.setenv("JWT_ACTIVE_KID", active_kid)
+        else:
+            monkeypatch.delenv("JWT_ACTIVE_KID", raising=False)
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+        return tmp_path
+
+    yield configure
+    monkeypatch.undo()
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+
+
+@pytest.mark.parametrize("alg", ["EdDSA", "ES256"])
+def test_asymmetric_round_trip_and_tamper(keys_dir, alg: str) -> None:
+    _write_key(keys_dir(alg), "k1", alg)
+    token = create_access_token("user-1")["token"]
+    header = json.loads(b64url_decode(token.split(".")[0]))
+    assert header == {"alg": alg, "typ": "JWT", "kid": "k1"}
+    assert decode_token(token)["sub"] == "user-1"
+
+    h, p, s = token.split(".")
+    claims = json.loads(b64url_decode(p))
+    claims["sub"] = "admin"
+    forged = f"{h}.{b64url_encode(json.dumps(claims).encode())}.{s}"
+    with pytest.raises(ValueError):
+        decode_token(forged)
+
+
+def test_rejects_unknown_kid_and_alg_confusion(keys_dir) -> None:
+    _write_key(keys_dir("EdDSA"), "k1", "EdDSA")
+    token = create_access_token("user-1")["token"]
+    _, p, s = token.split(".")
+    for header in ({"alg": "EdDSA", "kid": "nope"}, {"alg": "HS256", "kid": "k1"}):
+        h = b64url_encode(json.dumps(header).encode())
+        with pytest.raises(ValueError):
+            decode_token(f"{h}.{p}.{s}")
+
+
+def test_rotation_keeps_old_tokens_valid(keys_dir) -> None:
+    directory = keys_dir("EdDSA")
+    _write_key(directory, "2026-01", "EdDSA")
+    old_token = create_access_token("user-1")["token"]
+
+    # New key becomes active; the old one is kept as verification-only
+    old = directory / "2026-01.pem"
+    private = serialization.load_pem_private_key(old.read_bytes(), password=None)
+    (directory / "2026-01.pub.pem").write_bytes(
+        private.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+    )
+    old.unlink()
+    _write_key(directory, "2026-02", "EdDSA")
+    keys_dir("EdDSA", active_kid="2026-02")
+
+    new_token = create_access_token("user-1")["token"]
+    assert json.loads(b64url_decode(new_token.split(".")[0]))["kid"] == "2026-02"
+    assert decode_token(old_token)["sub"] == "user-1"
+    assert decode_token(new_token)["sub"] == "user-1"
+
+
+@pytest.mark.asyncio
+async def test_jwks_endpoint_verifies_tokens(keys_dir) -> None:
+    _write_key(keys_dir("ES256"), "k1", "ES256")
+    app = create_app()
+    token = create_access_token("user-1")["token"]
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/.well-known/jwks.json")
+    assert r.status_code == 200
+    assert r.headers["cache-control"] == "public, max-age=300"
+    (jwk,) = r.json()["keys"]
+    assert jwk["kid"] == "k1" and jwk["kty"] == "EC" and "d" not in jwk
+    # A downstream service verifies with a stock JOSE library and the published key
+    settings = get_settings()
+    claims = jwt.decode(
+        token, jwk, algorithms=["ES256"], audience=settings.TOKEN_AUDIENCE
+    )
+    assert claims["sub"] == "user-1"
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import io
+import json
+import threading
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.logging import LogPipeline
+
+
+class _GatedStream(io.StringIO):
+    """Stream whose writes wait for a gate, simulating a backed-up stdout."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+
+    def write(self, s: str) -> int:
+        self.entered.set()
+        self.gate.wait(5)
+        return super().write(s)
+
+
+def _render(event_dict: dict) -> str:
+    return json.dumps(event_dict)
+
+
+def test_batches_and_renders_off_thread() -> None:
+    stream = io.StringIO()
+    pipeline = LogPipeline(_render, batch_size=64, stream=stream)
+    for i in range(100):
+        pipeline.submit({"event": "e", "i": i})
+    pipeline.flush()
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line)["i"] for line in lines] == list(range(100))
+    stats = pipeline.stats()
+    assert stats["written"] == 100 and stats["batches"] < 100
+    pipeline.close()
+
+
+def test_drop_policy_never_blocks_and_counts() -> None:
+    stream = _GatedStream()
+    pipeline = LogPipeline(_render, queue_size=2, overflow="drop", stream=stream)
+    pipeline.submit({"event": "first"})
+    assert stream.entered.wait(5)  # writer is now stuck on the first record
+    for i in range(10):
+        pipeline.submit({"event": "e", "i": i})
+    assert pipeline.stats()["dropped"] == 8
+    stream.gate.set()
+    pipeline.flush()
+    assert pipeline.stats()["written"] == 3
+    pipeline.close()
+
+
+def test_block_policy_waits_for_space() -> None:
+    stream = _GatedStream()
+    pipeline = LogPipeline(_render, queue_size=1, overflow="block", stream=stream)
+    pipeline.submit({"event": "first"})
+    assert stream.entered.wait(5)
+    pipeline.submit({"event": "queued"})
+    done = threading.Event()
+
+    def producer() -> None:
+        pipeline.submit({"event": "blocked"})
+        done.set()
+
+    t = threading.Thread(target=producer)
+    t.start()
+    assert not done.wait(0.1)
+    stream.gate.set()
+    t.join(5)
+    pipeline.flush()
+    stats = pipeline.stats()
+    assert stats["blocked"] == 1 and stats["dropped"] == 0 and stats["written"] == 3
+    pipeline.close()
+
+
+def test_sampling_per_event() -> None:
+    pipeline = LogPipeline(_render, sample_rates={"noisy": 0.0, "half": 1.0}, stream=io.StringIO())
+    assert not pipeline.sample("noisy")
+    assert pipeline.sample("half") and pipeline.sample("other")
+    assert pipeline.stats()["sampled_out"] == 1
+    pipeline.close()
+
+
+def test_log_level_is_validated_in_settings(monkeypatch) -> None:
+    from app.core.config import get_settings
+
+    try:
+        monkeypatch.setenv("LOG_LEVEL", "warning")
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+        assert get_settings().LOG_LEVEL == "WARNING"
+        # An unknown level fails in Settings, not later in setup_logging
+        monkeypatch.setenv("LOG_LEVEL", "VERBOSE")
+        get_settings.cache_clear()  # type: ignore[attr-defined]
+        with pytest.raises(ValidationError):
+            get_settings()
+    finally:
+        monkeypatch.undo()
+        get_settings.cache_clear()  # type: ignore[attr-defined]
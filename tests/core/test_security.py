@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from app.core.security import AdmissionController
+from app.utils.exceptions import OverloadedError
+
+
+def test_admission_sheds_when_queue_full() -> None:
+    ctl = AdmissionController(max_concurrency=1, max_queue=0, queue_timeout=1.0)
+    with ctl.slot():
+        with pytest.raises(OverloadedError) as exc:
+            with ctl.slot():
+                pass
+        assert exc.value.retry_after >= 1
+    stats = ctl.stats()
+    assert stats["shed_queue_full"] == 1 and stats["admitted"] == 1
+    with ctl.slot():  # released slot is reusable
+        pass
+
+
+def test_admission_queue_deadline() -> None:
+    ctl = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+    with ctl.slot():
+        started = time.monotonic()
+        with pytest.raises(OverloadedError):
+            with ctl.slot():
+                pass
+        assert time.monotonic() - started >= 0.05
+    assert ctl.stats()["shed_timeout"] == 1
+
+
+def test_admission_waiter_admitted_when_slot_frees() -> None:
+    ctl = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=2.0)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def holder() -> None:
+        with ctl.slot():
+            entered.set()
+            release.wait()
+
+    t = threading.Thread(target=holder)
+    t.start()
+    entered.wait()
+    threading.Timer(0.05, release.set).start()
+    with ctl.slot():
+        assert ctl.stats()["active"] == 1
+    t.join()
+    assert ctl.stats()["admitted"] == 2
+
+
+def test_test_profile_hashes_cheaply_and_verifies_default_cost(monkeypatch) -> None:
+    from app.core.config import get_settings
+    from app.core.security import get_password_hash, pwd_context, verify_password
+
+    assert get_settings().PASSWORD_HASH_ROUNDS == 4
+    cheap = get_password_hash("secret123")
+    assert cheap.startswith("$2b$04$") and verify_password("secret123", cheap)
+    # Hashes made at the production cost still verify under the test profile
+    assert verify_password("secret123", pwd_context.hash("secret123", rounds=10))
+
+    monkeypatch.setenv("ENV", "prod")
+    monkeypatch.setenv("SECRET_KEY", "x" * 32)
+    monkeypatch.setenv("PASSWORD_HASH_ROUNDS", "4")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    with pytest.raises(ValueError):
+        get_settings()
+    monkeypatch.delenv("PASSWORD_HASH_ROUNDS")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    assert get_settings().PASSWORD_HASH_ROUNDS is None
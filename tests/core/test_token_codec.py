@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core.config import Settings
+from app.core.keys import b64url_encode, generate_private_key, private_key_pem
+from app.core.token_codec import FastTokenCodec, JoseTokenCodec, TokenCodec
+
+
+SECRET = "conformance-secret-conformance-secret"
+ALGORITHMS = ["HS256", "ES256", "EdDSA"]
+
+
+def _settings(alg: str, keys_dir: Path, **overrides: object) -> Settings:
+    if alg != "HS256" and not any(keys_dir.glob("*.pem")):
+        (keys_dir / "k1.pem").write_bytes(private_key_pem(generate_private_key(alg)))
+    values: dict[str, object] = {
+        "SECRET_KEY": SECRET,
+        "JWT_ALGORITHM": alg,
+        "JWT_KEYS_DIR": str(keys_dir),
+        "TOKEN_ISSUER": "issuer",
+        "TOKEN_AUDIENCE": "clients",
+    }
+    values.update(overrides)
+    return Settings(**values)  # type: ignore[arg-type]
+
+
+def _codecs(settings: Settings) -> list[TokenCodec]:
+    codecs: list[TokenCodec] = [FastTokenCodec(settings)]
+    if settings.JWT_ALGORITHM != "EdDSA":
+        codecs.append(JoseTokenCodec(settings))
+    return codecs
+
+
+def _claims(**overrides: object) -> dict[str, object]:
+    now = int(time.time())
+    claims: dict[str, object] = {
+        "sub": "user-1",
+        "type": "access",
+        "jti": "jti-1",
+        "iat": now,
+        "nbf": now,
+        "exp": now + 60,
+        "iss": "issuer",
+        "aud": "clients",
+        "role": "user",
+    }
+    claims.update(overrides)
+    return {k: v for k, v in claims.items() if v is not None}
+
+
+@pytest.mark.parametrize("alg", ALGORITHMS)
+def test_codecs_are_interchangeable(alg: str, tmp_path: Path) -> None:
+    codecs = _codecs(_settings(alg, tmp_path))
+    claims = _claims()
+    for encoder in codecs:
+        token = encoder.encode(claims)
+        for decoder in codecs:
+            assert decoder.decode(token) == claims
+
+
+def test_hmac_tokens_are_byte_identical(tmp_path: Path) -> None:
+    fast, jose = _codecs(_settings("HS256", tmp_path))
+    claims = _claims()
+    assert fast.encode(claims) == jose.encode(claims)
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"exp": int(time.time()) - 10},
+        {"nbf": int(time.time()) + 60},
+        {"exp": None},
+        {"iat": None},
+        {"nbf": None},
+        {"iss": "someone-else"},
+        {"iss": None},
+        {"aud": "other-clients"},
+        {"aud": None},
+        {"aud": 42},
+        {"sub": 123},
+        {"exp": "soon"},
+    ],
+    ids=lambda o: ",".join(f"{k}={v}" for k, v in o.items()),
+)
+@pytest.mark.parametrize("alg", ALGORITHMS)
+def test_codecs_reject_invalid_claims(alg: str, overrides: dict, tmp_path: Path) -> None:
+    codecs = _codecs(_settings(alg, tmp_path))
+    token = codecs[0].encode(_claims(**overrides))
+    for codec in codecs:
+        with pytest.raises(ValueError):
+            codec.decode(token)
+
+
+@pytest.mark.parametrize("alg", ALGORITHMS)
+def test_codecs_reject_forged_tokens(alg: str, tmp_path: Path) -> None:
+    settings = _settings(alg, tmp_path)
+    codecs = _codecs(settings)
+    token = codecs[0].encode(_claims())
+    header, payload, signature = token.split(".")
+    elevated = b64url_encode(json.dumps(_claims(role="admin")).encode())
+    unsigned = b64url_encode(b'{"alg":"none","typ":"JWT"}')
+    other_key = _settings(alg, tmp_path / "other", SECRET_KEY="x" * 40) if alg == "HS256" else None
+    forged = [
+        f"{header}.{elevated}.{signature}",
+        f"{header}.{payload}.{signature[:-4]}AAAA",
+        f"{unsigned}.{payload}.",
+        f"{header}.{payload}",
+        f"{header}.{payload}.{signature}.{signature}",
+        "",
+        "not-a-token",
+    ]
+    if other_key is not None:
+        forged.append(FastTokenCodec(other_key).encode(_claims()))
+    for codec in codecs:
+        for bad in forged:
+            with pytest.raises(ValueError):
+                codec.decode(bad)
+
+
+def test_ring_keys_of_another_algorithm_are_rejected(tmp_path: Path) -> None:
+    (tmp_path / "a-ed.pem").write_bytes(private_key_pem(generate_private_key("EdDSA")))
+    (tmp_path / "b-es.pem").write_bytes(private_key_pem(generate_private_key("ES256")))
+    eddsa = FastTokenCodec(_settings("EdDSA", tmp_path, JWT_ACTIVE_KID="a-ed"))
+    es256 = FastTokenCodec(_settings("ES256", tmp_path, JWT_ACTIVE_KID="b-es"))
+    token = es256.encode(_claims())
+    assert es256.decode(token) == _claims()
+    with pytest.raises(ValueError):
+        eddsa.decode(token)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import random
+import string
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.domain.user.models import Role, User
+from app.domain.user.schemas import UserCreateDTO, UserReadDTO
+
+
+_NAME_ALPHABET = string.ascii_letters + " -'." + "éøßЖжü漢字🙂"
+
+
+def _random_user(rng: random.Random) -> User:
+    local = "".join(rng.choices(string.ascii_letters + string.digits + "._+-", k=rng.randint(1, 20)))
+    local = local.strip(".").replace("..", ".") or "x"
+    domain = rng.choice(["example.com", "Example.ORG", "sub.example.net", "bücher.example"])
+    # Stored emails have been through EmailStr on the way in (register/create)
+    email = str(UserCreateDTO(email=f"{local}@{domain}", full_name="xx").email)
+    created = datetime(2000, 1, 1) + timedelta(seconds=rng.randint(0, 10**9), microseconds=rng.randint(0, 999999))
+    if rng.random() < 0.5:
+        created = created.replace(tzinfo=timezone(timedelta(minutes=rng.randint(-720, 840))))
+    return User(
+        id=uuid.UUID(int=rng.getrandbits(128)),
+        email=email,
+        full_name="".join(rng.choices(_NAME_ALPHABET, k=rng.randint(0, 40))),
+        is_active=rng.random() < 0.8,
+        password_hash=rng.choice(["", "$2b$12$" + "a" * 53]),
+        role=rng.choice(list(Role)),
+        created_at=created,
+        updated_at=created + timedelta(seconds=rng.randint(0, 10**6)),
+    )
+
+
+def test_from_domain_matches_model_validate() -> None:
+    rng = random.Random(20261018)
+    for _ in range(500):
+        user = _random_user(rng)
+        trusted = UserReadDTO.from_domain(user)
+        validated = UserReadDTO.model_validate(user)
+        assert trusted == validated, user
+        assert trusted.model_fields_set == validated.model_fields_set
+        assert trusted.model_dump() == validated.model_dump()
+        assert trusted.model_dump_json() == validated.model_dump_json()
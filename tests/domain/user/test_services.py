@@ -132,6 +132,16 @@ def test_authenticate_success(service) -> None:
     assert authed.id == user.id
 
 
+def test_emails_are_case_insensitive(service) -> None:
+    user = service.register(
+        UserRegisterDTO(email="Grace.Hopper@Example.com", full_name="Grace", password="cobol60")
+    )
+    assert user.email.startswith("Grace.Hopper@")  # stored as entered
+    with pytest.raises(ValueError):
+        service.create(UserCreateDTO(email="grace.hopper@example.com", full_name="Copy"))
+    assert service.authenticate(" GRACE.HOPPER@EXAMPLE.COM", "cobol60").id == user.id
+
+
 def test_authenticate_invalid_password_raises(service) -> None:
     service.register(
         UserRegisterDTO(email="gina@example.com", full_name="Gina", password="correct")
@@ -179,3 +189,61 @@ def test_password_reset_success(
 def test_password_reset_invalid_token_raises(service) -> None:
     with pytest.raises(ValueError):
         service.reset_password("invalid-token", "whatever123")
+
+
+def test_sessions_revoked_on_deactivate_role_change_reset_and_delete(repo, reset_store) -> None:
+    from app.domain.user.models import Role
+    from app.domain.user.services import UserService
+    from app.infrastructure.cache.token_store import InMemoryTokenStore
+
+    access, refresh = InMemoryTokenStore(), InMemoryTokenStore()
+    svc = UserService(
+        user_repo=repo, password_reset_store=reset_store, session_stores=(access, refresh)
+    )
+    user = svc.register(
+        UserRegisterDTO(email="sess@example.com", full_name="Sess", password="secret123")
+    )
+    uid = str(user.id)
+
+    def login() -> None:
+        access.allow_access(str(uuid4()), uid, 60)
+        refresh.allow_access(str(uuid4()), uid, 60)
+
+    login()
+    assert len(access.list_sessions(uid)) == 1
+    svc.set_role(uid, Role.ADMIN)
+    assert access.list_sessions(uid) == [] and refresh.list_sessions(uid) == []
+
+    login()
+    svc.set_role(uid, Role.ADMIN)  # unchanged role keeps sessions
+    assert len(access.list_sessions(uid)) == 1
+
+    svc.reset_password(svc.request_password_reset("sess@example.com"), "newsecret456")
+    assert access.list_sessions(uid) == []
+
+    login()
+    svc.update(uid, UserUpdateDTO(full_name="Sess", is_active=False))
+    assert refresh.list_sessions(uid) == []
+
+    login()
+    svc.update(uid, UserUpdateDTO(full_name="Still Sess"))  # already inactive: nothing to revoke
+    assert len(refresh.list_sessions(uid)) == 1
+
+    login()
+    svc.delete(uid)
+    assert access.list_sessions(uid) == [] and refresh.list_sessions(uid) == []
+
+
+def test_versions_are_recorded_on_writes_only(repo) -> None:
+    from app.domain.user.models import User
+    from app.domain.user.services import UserService
+    from app.infrastructure.cache.version_cache import InMemoryUserVersionCache
+
+    versions = InMemoryUserVersionCache()
+    svc = UserService(user_repo=repo, version_cache=versions)
+    user = repo.add(User(email="ver@example.com", full_name="Ver"))
+    svc.get(str(user.id))
+    svc.get_many([user.id])
+    assert versions.get(str(user.id)) is None
+    svc.update(str(user.id), UserUpdateDTO(full_name="Version"))
+    assert versions.get(str(user.id)) is not None
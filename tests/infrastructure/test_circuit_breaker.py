@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import fakeredis
+import pytest
+import redis
+
+from app.infrastructure.cache.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.infrastructure.cache.redis_client import GuardedRedis
+from app.infrastructure.cache.token_store import RedisTokenStore
+from app.utils.exceptions import ServiceUnavailableError
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _fail() -> None:
+    raise ConnectionError("refused")
+
+
+def test_breaker_opens_half_opens_and_closes() -> None:
+    clock = _Clock()
+    breaker = CircuitBreaker("dep", failure_threshold=3, reset_timeout=10, clock=clock)
+    for _ in range(3):
+        with pytest.raises(ServiceUnavailableError):
+            breaker.call(_fail)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as rejected:
+        breaker.call(lambda: "never called")
+    assert rejected.value.retry_after == 10
+
+    # After the reset timeout a single trial goes through; its failure reopens
+    clock.now += 10
+    with pytest.raises(ServiceUnavailableError):
+        breaker.call(_fail)
+    assert breaker.state == "open"
+
+    clock.now += 10
+
+    def trial() -> str:
+        # A concurrent call during the trial is rejected
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: "second")
+        return "ok"
+
+    assert breaker.call(trial) == "ok" and breaker.state == "closed"
+    # Errors other than failure_types mean the dependency answered
+    with pytest.raises(KeyError):
+        breaker.call(lambda: {}["missing"])
+    stats = breaker.stats()
+    assert (stats["opened"], stats["half_opened"], stats["closed"]) == (2, 2, 1)
+    assert stats["failures"] == 4 and stats["rejected"] == 2 and stats["consecutive_failures"] == 0
+
+
+def test_redis_outage_fails_fast_and_serves_recent_token_checks() -> None:
+    server = fakeredis.FakeServer()
+    breaker = CircuitBreaker(
+        "redis",
+        failure_threshold=2,
+        reset_timeout=60,
+        failure_types=(redis.exceptions.ConnectionError, redis.exceptions.TimeoutError),
+    )
+    client = GuardedRedis(fakeredis.FakeRedis(server=server), breaker)
+    store = RedisTokenStore(client, local_read_ttl=30)
+    store.allow_access("seen", "u1", 60)  # Lua script through the proxy
+    assert store.is_access_allowed("seen") and not store.is_access_allowed("gone")
+    assert [s.jti for s in store.list_sessions("u1")] == ["seen"]  # pipelines too
+
+    server.connected = False
+    assert store.is_access_allowed("seen") and not store.is_access_allowed("gone")
+    assert store.local_reads == 2
+    with pytest.raises(ServiceUnavailableError):
+        store.is_access_allowed("never-seen")
+    with pytest.raises(ServiceUnavailableError):
+        store.allow_access("new", "u1", 60)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        store.revoke_access("seen")
+
+    # Without local reads every check fails closed
+    with pytest.raises(ServiceUnavailableError):
+        RedisTokenStore(client).is_access_allowed("seen")
+
+
+def test_revoked_tokens_are_not_served_from_local_reads() -> None:
+    server = fakeredis.FakeServer()
+    breaker = CircuitBreaker(
+        "redis", failure_threshold=1, failure_types=(redis.exceptions.ConnectionError,)
+    )
+    store = RedisTokenStore(
+        GuardedRedis(fakeredis.FakeRedis(server=server), breaker), local_read_ttl=30
+    )
+    for jti in ("a1", "a2", "c1", "other"):
+        store.allow_access(jti, "u2" if jti == "other" else "u1", 60)
+        assert store.is_access_allowed(jti)
+    assert store.consume("c1") == "u1"
+    assert store.revoke_all_for_user("u1") == 2
+
+    server.connected = False
+    for jti in ("a1", "a2", "c1"):
+        with pytest.raises(ServiceUnavailableError):
+            store.is_access_allowed(jti)
+    assert store.is_access_allowed("other")
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from app.infrastructure.cache import rate_limiter
+from app.infrastructure.cache.rate_limiter import (
+    InMemoryRateLimiter,
+    sliding_window_retry_after,
+)
+
+
+def test_in_memory_limiter_blocks_over_limit(monkeypatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+    limiter = InMemoryRateLimiter()
+    assert all(limiter.hit("k", 3, 60).allowed for _ in range(3))
+    blocked = limiter.hit("k", 3, 60)
+    assert not blocked.allowed and blocked.retry_after > 0
+    # other keys are independent
+    assert limiter.hit("other", 3, 60).allowed
+
+
+def test_in_memory_limiter_window_slides(monkeypatch) -> None:
+    now = [1200.0]  # start of a 60s window
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+    limiter = InMemoryRateLimiter()
+    for _ in range(3):
+        limiter.hit("k", 3, 60)
+    # Early in the next window the previous count still weighs in
+    now[0] = 1260.0 + 6
+    assert not limiter.hit("k", 3, 60).allowed
+    # Two thirds into the next window the weight of 3 previous hits drops to 1
+    now[0] = 1260.0 + 41
+    assert limiter.hit("k", 3, 60).allowed
+    # Two idle windows reset history entirely
+    now[0] = 1500.0
+    assert all(limiter.hit("k", 3, 60).allowed for _ in range(3))
+
+
+def test_retry_after_is_when_estimate_allows_again() -> None:
+    # limit 3, 3 hits in current window 10s in: wait out this window + 1/3 of next
+    assert sliding_window_retry_after(0, 3, 3, 60, 10) == 70
+    # previous window saturated, nothing yet in current: decay within this window
+    assert sliding_window_retry_after(3, 0, 3, 60, 0) == 20
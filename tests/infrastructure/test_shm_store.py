@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import multiprocessing
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+
+from app.infrastructure.cache.password_reset_store import SharedMemoryPasswordResetStore
+from app.infrastructure.cache.shm_table import SharedMemoryTable
+from app.infrastructure.cache.token_store import SharedMemoryTokenStore
+from app.utils.exceptions import ServiceUnavailableError
+
+
+def test_token_store_roundtrip(tmp_path: Path) -> None:
+    store = SharedMemoryTokenStore(str(tmp_path / "access.tbl"), capacity=64)
+    jti = str(uuid.uuid4())
+    store.allow_access(jti, "u1", 60)
+    store.allow_access("not-a-uuid", "u1", 60)
+    store.allow_access("other", "u2", 60)
+    assert store.is_access_allowed(jti) and not store.is_access_allowed(str(uuid.uuid4()))
+    sessions = store.list_sessions("u1")
+    assert len(sessions) == 2 and jti in {s.jti for s in sessions}
+    store.revoke_access(jti)
+    assert not store.is_access_allowed(jti)
+    assert store.revoke_all_for_user("u1") == 1
+    assert not store.is_access_allowed("not-a-uuid") and store.is_access_allowed("other")
+
+
+def test_expired_tokens_are_not_allowed(tmp_path: Path) -> None:
+    store = SharedMemoryTokenStore(str(tmp_path / "access.tbl"), capacity=64)
+    store.allow_access("gone", "u1", -1)
+    assert not store.is_access_allowed("gone")
+    assert store.consume("gone") is None
+    assert store.list_sessions("u1") == []
+
+
+def test_table_compacts_tombstones(tmp_path: Path) -> None:
+    # Far more inserts+deletes than slots: tombstones must be reclaimed
+    store = SharedMemoryTokenStore(str(tmp_path / "access.tbl"), capacity=16)
+    for i in range(200):
+        store.allow_access(f"t{i}", "u1", 60)
+        assert store.consume(f"t{i}") == "u1"
+    store.allow_access("last", "u1", 60)
+    assert store.is_access_allowed("last")
+
+
+def test_table_past_75_percent_live_compacts_only_when_it_frees_slots(
+    tmp_path: Path, monkeypatch
+) -> None:
+    table = SharedMemoryTable(str(tmp_path / "live.tbl"), capacity=16)
+    compactions = []
+    compact = table._compact
+    monkeypatch.setattr(table, "_compact", lambda now: compactions.append(now) or compact(now))
+    keys = [uuid.uuid4().bytes for _ in range(15)]
+    for key in keys[:14]:
+        table.put(key, 1, "u1", time.time() + 60)
+    # Only live entries: nothing to reclaim, so no rebuild on every insert
+    assert len(compactions) <= 1 and table._warned_full
+    before = len(compactions)
+    table.pop(keys[0], 1)
+    table.put(keys[14], 1, "u1", time.time() + 60)
+    assert len(compactions) == before + 1  # the tombstone made it worthwhile
+    table.put(keys[0], 1, "u1", time.time() - 1)  # already expired
+    table.put(keys[0], 1, "u1", time.time() + 60)
+    assert len(compactions) == before + 2
+    table.put(uuid.uuid4().bytes, 1, "u1", time.time() + 60)
+    with pytest.raises(ServiceUnavailableError):
+        table.put(uuid.uuid4().bytes, 1, "u1", time.time() + 60)
+    assert all(table.get(key, 1) is not None for key in keys)
+    table.close()
+
+
+def test_reput_after_a_tombstone_keeps_the_tombstone_count(tmp_path: Path) -> None:
+    table = SharedMemoryTable(str(tmp_path / "chain.tbl"), capacity=8)
+    # Same home slot: B sits right after A in the probe chain
+    a, b = bytes(16), b"\x08" + bytes(15)
+    table.put(a, 1, "u1", time.time() + 60)
+    table.put(b, 1, "u1", time.time() + 60)
+    table.pop(a, 1)
+    assert table._tombstones() == 1
+    for _ in range(2):
+        # The probe passes A's tombstone but overwrites B's own slot
+        table.put(b, 1, "u1", time.time() + 60)
+        assert table._tombstones() == 1
+    assert table.get(b, 1) is not None and table.get(a, 1) is None
+    table.close()
+
+
+def test_layout_mismatch_is_rejected(tmp_path: Path) -> None:
+    path = str(tmp_path / "t.tbl")
+    SharedMemoryTable(path, capacity=64).close()
+    with pytest.raises(ValueError):
+        SharedMemoryTable(path, capacity=128)
+
+
+def test_reset_store_does_not_keep_token(tmp_path: Path) -> None:
+    path = tmp_path / "reset.tbl"
+    store = SharedMemoryPasswordResetStore(str(path), capacity=64)
+    token = store.issue("u1", 60)
+    assert store.peek(token) == "u1"
+    assert token.encode() not in path.read_bytes()
+    assert store.consume(token) == "u1"
+    assert store.consume(token) is None
+
+
+def _allow(path: str, jti: str) -> None:
+    SharedMemoryTokenStore(path, capacity=64).allow_access(jti, "u1", 60)
+
+
+def _consume(path: str, jti: str, barrier, results) -> None:
+    store = SharedMemoryTokenStore(path, capacity=64)
+    barrier.wait()
+    results.put(store.consume(jti))
+
+
+def test_state_is_shared_between_processes(tmp_path: Path) -> None:
+    ctx = multiprocessing.get_context("fork")
+    path = str(tmp_path / "access.tbl")
+    store = SharedMemoryTokenStore(path, capacity=64)
+    proc = ctx.Process(target=_allow, args=(path, "from-child"))
+    proc.start()
+    proc.join()
+    assert store.is_access_allowed("from-child")
+
+    # A refresh token is redeemed by exactly one worker process
+    store.allow_access("refresh", "u1", 60)
+    barrier, results = ctx.Barrier(4), ctx.Queue()
+    procs = [ctx.Process(target=_consume, args=(path, "refresh", barrier, results)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    outcomes = [results.get(timeout=10) for _ in procs]
+    for p in procs:
+        p.join()
+    assert outcomes.count("u1") == 1 and outcomes.count(None) == 3
+
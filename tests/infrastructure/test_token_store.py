@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import fakeredis
+import pytest
+from sqlalchemy import create_engine
+
+from app.infrastructure.cache.password_reset_store import InMemoryPasswordResetStore
+from app.infrastructure.cache.token_store import (
+    InMemoryTokenStore,
+    RedisTokenStore,
+    SharedMemoryTokenStore,
+)
+from app.infrastructure.cache.token_store_sql import SQLTokenStore
+from app.infrastructure.db.session import create_token_tables
+
+
+def test_rotate_consumes_old_and_allows_new_pair() -> None:
+    access, refresh = InMemoryTokenStore(), InMemoryTokenStore()
+    refresh.allow_access("r1", "u1", 60)
+    assert refresh.rotate("r1", "r2", "u1", 60, access_store=access, access_jti="a2", access_ttl_seconds=60)
+    assert not refresh.is_access_allowed("r1")
+    assert refresh.is_access_allowed("r2") and access.is_access_allowed("a2")
+    # replaying the old refresh fails and mints nothing
+    assert not refresh.rotate("r1", "r3", "u1", 60, access_store=access, access_jti="a3", access_ttl_seconds=60)
+    assert not refresh.is_access_allowed("r3") and not access.is_access_allowed("a3")
+
+
+def _sql_store(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tokens.db'}")
+    create_token_tables(engine)
+    return SQLTokenStore(engine, namespace="auth:refresh")
+
+
+@pytest.mark.parametrize(
+    "make_refresh",
+    [
+        lambda tmp_path: InMemoryTokenStore(),
+        lambda tmp_path: SharedMemoryTokenStore(str(tmp_path / "refresh.tbl"), capacity=64),
+        _sql_store,
+        lambda tmp_path: RedisTokenStore(fakeredis.FakeRedis(), namespace="auth:refresh"),
+    ],
+    ids=["memory", "shm", "sql", "redis"],
+)
+def test_rotate_rejects_foreign_owner(tmp_path, make_refresh) -> None:
+    # A separate access store takes the generic path of every backend
+    access, refresh = InMemoryTokenStore(), make_refresh(tmp_path)
+    refresh.allow_access("r1", "u1", 60)
+    assert not refresh.rotate("r1", "r2", "u2", 60, access_store=access, access_jti="a2", access_ttl_seconds=60)
+    # The owner's token is left intact and still rotates
+    assert refresh.is_access_allowed("r1") and not access.is_access_allowed("a2")
+    assert refresh.rotate("r1", "r2", "u1", 60, access_store=access, access_jti="a2", access_ttl_seconds=60)
+
+
+def test_concurrent_rotation_has_single_winner() -> None:
+    access, refresh = InMemoryTokenStore(), InMemoryTokenStore()
+    refresh.allow_access("r1", "u1", 60)
+
+    def attempt(i: int) -> bool:
+        return refresh.rotate(
+            "r1", f"r-{i}", "u1", 60, access_store=access, access_jti=f"a-{i}", access_ttl_seconds=60
+        )
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(attempt, range(32)))
+    assert results.count(True) == 1
+
+
+def test_reset_token_consumed_once_under_concurrency() -> None:
+    store = InMemoryPasswordResetStore()
+    token = store.issue("u1", 60)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: store.consume(token), range(16)))
+    assert results.count("u1") == 1
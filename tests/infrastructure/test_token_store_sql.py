@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.infrastructure.cache.token_store_sql import (
+    SQLPasswordResetStore,
+    SQLTokenStore,
+    purge_expired,
+)
+from app.infrastructure.db.session import create_store_engine, create_token_tables
+from app.infrastructure.models.token import IssuedTokenORM
+
+
+@pytest.fixture
+def engine(tmp_path: Path):
+    engine = create_store_engine(f"sqlite:///{tmp_path / 'tokens.db'}")
+    create_token_tables(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_sqlite_runs_in_wal_mode(engine) -> None:
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+
+
+def test_token_store_roundtrip(engine) -> None:
+    access = SQLTokenStore(engine, namespace="auth:access")
+    refresh = SQLTokenStore(engine, namespace="auth:refresh")
+    access.allow_access("a1", "u1", 60)
+    access.allow_access("a2", "u1", 120)
+    refresh.allow_access("a1", "u2", 60)  # same jti in another namespace
+    assert access.is_access_allowed("a1") and not access.is_access_allowed("zz")
+    assert [s.jti for s in access.list_sessions("u1")] == ["a1", "a2"]
+    access.revoke_access("a1")
+    assert not access.is_access_allowed("a1") and refresh.is_access_allowed("a1")
+    assert access.revoke_all_for_user("u1") == 1
+    assert access.list_sessions("u1") == []
+    assert refresh.consume("a1") == "u2" and refresh.consume("a1") is None
+
+
+def test_expired_tokens_are_rejected(engine) -> None:
+    store = SQLTokenStore(engine)
+    store.allow_access("old", "u1", -1)
+    assert not store.is_access_allowed("old")
+    assert store.consume("old") is None
+
+
+def test_rotation_is_atomic(engine) -> None:
+    access, refresh = SQLTokenStore(engine, "auth:access"), SQLTokenStore(engine, "auth:refresh")
+    refresh.allow_access("r1", "u1", 60)
+    assert not refresh.rotate("r1", "r2", "u2", 60, access_store=access, access_jti="a2", access_ttl_seconds=60)
+    # a foreign owner does not burn the token
+    assert refresh.is_access_allowed("r1")
+
+    def attempt(i: int) -> bool:
+        return refresh.rotate(
+            "r1", f"r-{i}", "u1", 60, access_store=access, access_jti=f"a-{i}", access_ttl_seconds=60
+        )
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(attempt, range(16)))
+    assert results.count(True) == 1
+    assert len(access.list_sessions("u1")) == 1 and len(refresh.list_sessions("u1")) == 1
+
+
+def test_reset_store(engine) -> None:
+    store = SQLPasswordResetStore(engine)
+    token = store.issue("u1", 60)
+    assert store.peek(token) == "u1"
+    assert store.consume(token) == "u1"
+    assert store.consume(token) is None and store.peek(token) is None
+    expired = store.issue("u1", -1)
+    assert store.peek(expired) is None and store.consume(expired) is None
+
+
+def test_purge_deletes_expired_in_batches(engine) -> None:
+    store = SQLTokenStore(engine)
+    resets = SQLPasswordResetStore(engine)
+    for i in range(25):
+        store.allow_access(f"dead-{i}", "u1", -1)
+    store.allow_access("live", "u1", 60)
+    resets.issue("u1", -1)
+    assert purge_expired(engine, batch_size=10, now=time.time()) == 26
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(IssuedTokenORM)).scalar() == 1
+    assert store.is_access_allowed("live")
+
+
+@pytest.mark.asyncio
+async def test_app_uses_sql_backend(tmp_path: Path, monkeypatch) -> None:
+    from httpx import AsyncClient
+
+    from app.core.config import get_settings
+    from app.main import create_app
+
+    monkeypatch.setenv("TOKEN_STORE_BACKEND", "sql")
+    monkeypatch.setenv("TOKEN_STORE_DATABASE_URL", f"sqlite:///{tmp_path / 'app-tokens.db'}")
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    try:
+        app = create_app()
+        async with app.router.lifespan_context(app):
+            async with AsyncClient(app=app, base_url="http://test") as ac:
+                creds = {"email": "sqlstore@example.com", "full_name": "Sql", "password": "secret123"}
+                assert (await ac.post("/api/v1/auth/register", json=creds)).status_code == 201
+                r = await ac.post(
+                    "/api/v1/auth/login", data={"username": creds["email"], "password": "secret123"}
+                )
+                tokens = r.json()
+                r = await ac.post("/api/v1/auth/refresh", params={"refresh_token": tokens["refresh_token"]})
+                assert r.status_code == 200
+                r = await ac.post("/api/v1/auth/refresh", params={"refresh_token": tokens["refresh_token"]})
+                assert r.status_code == 401
+    finally:
+        monkeypatch.undo()
+        get_settings.cache_clear()  # type: ignore[attr-defined]
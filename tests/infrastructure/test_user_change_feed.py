@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.domain.user.changes import UserChange
+from app.domain.user.models import User
+from app.domain.user.schemas import UserUpdateDTO
+from app.domain.user.services import UserService
+from app.infrastructure.db.session import Base
+from app.infrastructure.models import user as user_model  # noqa: F401 - register tables
+from app.infrastructure.repositories.user_changes import InMemoryUserChangeFeed, SQLUserChangeFeed
+from app.infrastructure.repositories.user_sqlalchemy import SQLUserRepository
+from app.utils.etag import updated_version
+from app.utils.exceptions import CursorExpiredError
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_changes_commit_and_roll_back_with_the_write(engine) -> None:
+    feed = SQLUserChangeFeed(engine)
+    with Session(engine) as session:
+        user = SQLUserRepository(session).add(User(email="feed@example.com", full_name="Feed"))
+        SQLUserRepository(session).record_changes([UserChange(user.id, "created")])
+        session.commit()
+    with Session(engine) as session:
+        svc = UserService(SQLUserRepository(session))
+        svc.update(str(user.id), UserUpdateDTO(full_name="Renamed", is_active=False))
+        session.rollback()
+    assert [(change.seq, change.kind) for change in feed.read(0, 10)] == [(1, "created")]
+
+    with Session(engine) as session:
+        svc = UserService(SQLUserRepository(session))
+        updated = svc.update(str(user.id), UserUpdateDTO(full_name="Renamed", is_active=False))
+        svc.delete(str(user.id))
+        session.commit()
+    changes = feed.read(1, 10)
+    assert [change.kind for change in changes] == ["deactivated", "deleted"]
+    assert changes[0].user_id == user.id and changes[1].version is None
+    assert changes[0].version == updated_version(updated.updated_at)  # the ETag's version
+    assert feed.head() == changes[-1].seq and feed.read(changes[-1].seq, 10) == []
+
+
+@pytest.mark.parametrize("make_feed", ["memory", "sql"])
+def test_compaction_keeps_latest_per_user_and_retention_expires_cursors(engine, make_feed) -> None:
+    now = time.time()
+    a, b, c = User(), User(), User()
+    events = [
+        UserChange(a.id, "created", occurred_at=now - 500),
+        UserChange(a.id, "updated", occurred_at=now - 400),
+        UserChange(c.id, "created", occurred_at=now - 300),
+        UserChange(a.id, "role_changed", occurred_at=now - 200),
+        UserChange(b.id, "created", occurred_at=now - 10),
+    ]
+    if make_feed == "memory":
+        feed = InMemoryUserChangeFeed()
+        feed.append(events)
+    else:
+        feed = SQLUserChangeFeed(engine, batch_size=1)
+        with Session(engine) as session:
+            SQLUserRepository(session).record_changes(events)
+            session.commit()
+
+    # Older than 100 s collapses to the last change per user; nothing is expired yet
+    feed.compact(retention=1000, compact_after=100, now=now)
+    kept = [change.seq for change in feed.read(0, 10)]
+    assert 2 not in kept and kept[-3:] == [3, 4, 5]
+    assert [change.seq for change in feed.read(1, 10)] == [3, 4, 5]
+
+    # Retention drops everything older than 250 s, incl. user c's only change
+    feed.compact(retention=250, compact_after=100, now=now)
+    assert [change.seq for change in feed.read(3, 10)] == [4, 5]
+    with pytest.raises(CursorExpiredError):
+        feed.read(2, 10)
+    assert [change.seq for change in feed.read(0, 10)] == [4, 5]  # 0 = start of the retained feed
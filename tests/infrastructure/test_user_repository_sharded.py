@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from dataclasses import replace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.domain.user.models import User
+from app.domain.user.schemas import UserBatchDTO
+from app.domain.user.services import UserService
+from app.infrastructure.db.session import (
+    create_all,
+    create_session_factory,
+    create_shard_tables,
+    shard_session_scope,
+)
+from app.infrastructure.models.user import UserChangeORM, UserDirectoryORM, UserORM
+from app.infrastructure.repositories.user_sharded import (
+    ShardedUserRepository,
+    jump_hash,
+    rebalance_user_shards,
+    shard_for,
+)
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """The main database (directory, change feed) and three SQLite shard stand-ins."""
+    main = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+    create_all(main)
+    shards = [create_engine(f"sqlite:///{tmp_path / f'users{i}.db'}") for i in range(3)]
+    for engine in shards:
+        create_shard_tables(engine)
+    yield create_session_factory(main), [create_session_factory(e) for e in shards]
+    for engine in (main, *shards):
+        engine.dispose()
+
+
+def _counts(factories) -> list[int]:
+    counts = []
+    for factory in factories:
+        with factory() as session:
+            counts.append(session.scalar(select(func.count()).select_from(UserORM)))
+    return counts
+
+
+def test_jump_hash_moves_only_to_the_new_bucket() -> None:
+    keys = [uuid4() for _ in range(3000)]
+    before = [shard_for(key, 2) for key in keys]
+    after = [shard_for(key, 3) for key in keys]
+    moved = [b for a, b in zip(before, after) if a != b]
+    assert set(moved) == {2} and 800 < len(moved) < 1200
+    assert all(0 <= b < 3 for b in after) and jump_hash(123, 1) == 0
+
+
+def test_routes_by_id_and_finds_emails_through_the_directory(databases) -> None:
+    main, shards = databases
+    with shard_session_scope(main, shards) as sessions:
+        repo = ShardedUserRepository(sessions)
+        users = repo.add_many(
+            [User(email=f"U{i}@Example.com", full_name=f"U {i}") for i in range(30)]
+        )
+        single = repo.add(User(email="single@example.com", full_name="Single"))
+        with pytest.raises(IntegrityError):  # unique across shards
+            repo.add(User(email="SINGLE@example.com", full_name="Twin"))
+    assert all(_counts(shards)) and sum(_counts(shards)) == 31
+
+    with shard_session_scope(main, shards) as sessions:
+        repo = ShardedUserRepository(sessions)
+        assert repo.get_by_email(" u7@EXAMPLE.com ").id == users[7].id
+        assert repo.emails_in_use(["U3@example.com", "nobody@example.com"]) == {"u3@example.com"}
+        assert {u.id for u in repo.get_many([single.id, users[0].id, uuid4()])} == {
+            single.id,
+            users[0].id,
+        }
+        svc = UserService(repo)
+        ops = [{"op": "set_role", "user_id": str(u.id), "role": "admin"} for u in users[:5]]
+        assert svc.apply_batch(UserBatchDTO(operations=ops).operations).applied == 5
+        renamed = repo.update(replace(repo.get(single.id), email="renamed@example.com"))
+        repo.delete(users[1].id)
+    with shard_session_scope(main, shards) as sessions:
+        repo = ShardedUserRepository(sessions)
+        assert repo.get_by_email("renamed@example.com").id == renamed.id
+        assert repo.get_by_email("single@example.com") is None and repo.get(users[1].id) is None
+        assert {u.role.value for u in repo.get_many([u.id for u in users[:5]])} == {"admin"}
+    with main() as session:
+        # The change feed is written once, to the main database
+        assert session.scalar(select(func.count()).select_from(UserChangeORM)) == 5
+
+
+def test_rebalance_moves_users_after_adding_a_shard(databases) -> None:
+    main, shards = databases
+    with shard_session_scope(main, shards[:2]) as sessions:
+        users = ShardedUserRepository(sessions).add_many(
+            [User(email=f"r{i}@example.com", full_name=f"R {i}") for i in range(60)]
+        )
+    homes = {u.id: shard_for(u.id, 3) for u in users}
+    to_move = sum(1 for u in users if homes[u.id] != shard_for(u.id, 2))
+    assert to_move and _counts(shards)[2] == 0
+
+    # Before the rebalance every user is still found through the directory
+    with shard_session_scope(main, shards) as sessions:
+        repo = ShardedUserRepository(sessions)
+        assert len(repo.get_many(list(homes))) == 60
+        assert all(repo.get_by_email(u.email) is not None for u in users)
+
+    dry = rebalance_user_shards(main, shards, batch_size=7, dry_run=True)
+    assert (dry.scanned, dry.moved, _counts(shards)[2]) == (60, to_move, 0)
+
+    report = rebalance_user_shards(main, shards, batch_size=7)
+    # Moved users are scanned again on the new shard, where they now belong
+    assert (report.scanned, report.moved, report.repaired) == (60 + to_move, to_move, 0)
+    assert _counts(shards) == [Counter(homes.values())[i] for i in range(3)]
+    with main() as session:
+        directory = dict(
+            session.execute(select(UserDirectoryORM.user_id, UserDirectoryORM.shard)).all()
+        )
+    assert {str(user_id): shard for user_id, shard in homes.items()} == directory
+
+    # Idempotent; a lost directory row is recreated
+    with main.begin() as session:
+        session.delete(session.get(UserDirectoryORM, str(users[0].id)))
+    again = rebalance_user_shards(main, shards)
+    assert (again.moved, again.repaired) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_app_and_cli_run_on_sharded_users(tmp_path, monkeypatch, capsys) -> None:
+    from httpx import AsyncClient
+
+    from app.cli.manage import main as manage
+    from app.core.config import get_settings
+    from app.main import create_app
+
+    shard_urls = [f"sqlite:///{tmp_path / f'app-users{i}.db'}" for i in range(2)]
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app-main.db'}")
+    monkeypatch.setenv("USER_SHARD_URLS", json.dumps(shard_urls))
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            for i in range(6):
+                creds = {"email": f"Shard{i}@example.com", "full_name": "Shard User"}
+                r = await ac.post("/api/v1/auth/register", json={**creds, "password": "secret123"})
+                assert r.status_code == 201
+            login = {"username": "shard3@EXAMPLE.com", "password": "secret123"}
+            r = await ac.post("/api/v1/auth/login", data=login)
+            me = await ac.get(
+                "/api/v1/auth/me", headers={"Authorization": f"Bearer {r.json()['access_token']}"}
+            )
+            assert me.json()["email"] == "Shard3@example.com"
+            checks = (await ac.get("/ready")).json()["checks"]
+            assert {"database", "user_shard_0", "user_shard_1"} <= set(checks)
+
+    monkeypatch.setenv(
+        "USER_SHARD_URLS", json.dumps([*shard_urls, f"sqlite:///{tmp_path / 'app-users2.db'}"])
+    )
+    get_settings.cache_clear()  # type: ignore[attr-defined]
+    assert manage(["rebalance-shards", "--dry-run"]) == 0
+    assert manage(["rebalance-shards"]) == 0
+    out = capsys.readouterr().out
+    assert "DRY RUN: Scanned 6 users on 3 shards" in out and "repaired 0" in out
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.domain.user.models import Role, User
+from app.domain.user.schemas import UserBatchDTO
+from app.domain.user.services import UserService
+from app.infrastructure.db.session import Base
+from app.infrastructure.models import user as user_model  # noqa: F401 - register table
+from app.infrastructure.repositories.user_sqlalchemy import SQLUserRepository
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def test_batch_uses_set_based_statements(session: Session) -> None:
+    repo = SQLUserRepository(session)
+    existing = repo.add_many([User(email=f"e{i}@example.com", full_name=f"User {i}") for i in range(50)])
+    session.commit()
+
+    statements: list[str] = []
+    event.listen(
+        session.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2].split()[0])
+    )
+    ops = [{"op": "create", "email": f"n{i}@example.com", "full_name": f"New {i}"} for i in range(50)]
+    ops += [{"op": "set_role", "user_id": str(u.id), "role": "admin"} for u in existing]
+    result = UserService(repo).apply_batch(UserBatchDTO(operations=ops).operations)
+    session.commit()
+
+    assert result.applied == 100 and result.failed == 0
+    # one SELECT per lookup kind, one INSERT and one UPDATE executemany, one outbox INSERT
+    assert statements == ["SELECT", "SELECT", "INSERT", "UPDATE", "INSERT"]
+    assert {u.role for u in repo.get_many([u.id for u in existing])} == {Role.ADMIN}
+    assert repo.emails_in_use(["n0@example.com", "missing@example.com"]) == {"n0@example.com"}
+
+
+def test_get_many_uses_any_array_on_postgres(session: Session, monkeypatch) -> None:
+    repo = SQLUserRepository(session)
+    captured = []
+    monkeypatch.setattr(session.get_bind().dialect, "name", "postgresql")
+    monkeypatch.setattr(session, "scalars", lambda stmt: captured.append(stmt) or [])
+    repo.get_many([User().id, User().id])
+    sql = str(captured[0].compile(dialect=postgresql.dialect()))
+    assert "WHERE users.id = ANY (%(ids)s" in sql and " IN " not in sql
+
+
+def test_email_lookup_is_case_insensitive_and_uses_the_index(session: Session) -> None:
+    repo = SQLUserRepository(session)
+    user = repo.add(User(email="Ada.Lovelace@example.com", full_name="Ada"))
+    session.commit()
+
+    statements: list[tuple[str, tuple]] = []
+    event.listen(
+        session.get_bind(), "before_cursor_execute", lambda *a: statements.append((a[2], a[3]))
+    )
+    assert repo.get_by_email("ada.lovelace@EXAMPLE.com").id == user.id
+    assert repo.emails_in_use(["ADA.LOVELACE@example.com", "x@example.com"]) == {
+        "ada.lovelace@example.com"
+    }
+
+    # The login lookup exactly as emitted: an index search, not a table scan
+    sql, params = statements[0]
+    plan = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "USING INDEX uq_users_email_lower" in details and "SCAN" not in details
+
+    # The database enforces it too (concurrent signups both passing the check)
+    with pytest.raises(IntegrityError):
+        repo.add(User(email="ADA.LOVELACE@EXAMPLE.COM", full_name="Duplicate"))